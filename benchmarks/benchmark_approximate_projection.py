@@ -0,0 +1,43 @@
+"""
+Benchmark exact and approximate data projections at several resolutions on refined cube scaffolds,
+reporting errors of approximate projections against exact projections.
+
+Usage: python benchmarks/benchmark_approximate_projection.py [elementsCountPerAxis ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+
+
+def main(elementsCounts):
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        pointsCount = 5000
+        writeSurfaceData(pointsCount, zincDataFileName)
+        for elementsCount in elementsCounts:
+            zincModelFileName = os.path.join(directory, "model" + str(elementsCount) + ".exf")
+            facesCount = writeRefinedCubeModel(elementsCount, zincModelFileName)
+            for resolution in (0.0, 0.05, 0.02, 0.01):
+                fitter = Fitter(zincModelFileName, zincDataFileName)
+                fitter.load()
+                config = fitter.getInitialFitterStepConfig()
+                config.setApproximateProjectionResolution(resolution)
+                startTime = time.perf_counter()
+                fitter.calculateDataProjections(config)
+                elapsedTime = time.perf_counter() - startTime
+                print("faces", facesCount, "points", pointsCount,
+                      ("approximate resolution " + str(resolution)) if resolution else "exact",
+                      "projection %.3f s" % elapsedTime, "RMS, maximum error", fitter.getDataRMSAndMaximumProjectionError())
+                errors = fitter.getApproximateDataProjectionErrors().get("surface")
+                if errors:
+                    print("    sampled", errors[0], "points: increase in projection distance RMS %.3g maximum %.3g" %
+                          errors[1:])
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [4, 8, 16])
@@ -0,0 +1,117 @@
+"""
+Benchmark data projections with and without the spatial index on refined cube scaffolds,
+with data points scattered within 2% of the cube surface.
+
+Usage: python benchmarks/benchmark_data_projection.py [elementsCountPerAxis ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.field import findOrCreateFieldCoordinates, findOrCreateFieldGroup
+from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.zinc.context import Context
+from cmlibs.zinc.element import Element, Elementbasis
+from cmlibs.zinc.field import Field
+
+from scaffoldfitter.fitter import Fitter
+
+
+def writeRefinedCubeModel(elementsCount, zincModelFileName):
+    """
+    Write trilinear cube of side 1 with elementsCount elements per axis and group "surface" on its faces.
+    """
+    context = Context("model")
+    region = context.getDefaultRegion()
+    fieldmodule = region.getFieldmodule()
+    with ChangeManager(fieldmodule):
+        coordinates = findOrCreateFieldCoordinates(fieldmodule)
+        nodes = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+        nodetemplate = nodes.createNodetemplate()
+        nodetemplate.defineField(coordinates)
+        fieldcache = fieldmodule.createFieldcache()
+        nodesCount = elementsCount + 1
+        for k in range(nodesCount):
+            for j in range(nodesCount):
+                for i in range(nodesCount):
+                    node = nodes.createNode(1 + i + nodesCount * (j + nodesCount * k), nodetemplate)
+                    fieldcache.setNode(node)
+                    coordinates.assignReal(fieldcache, [i / elementsCount, j / elementsCount, k / elementsCount])
+        mesh = fieldmodule.findMeshByDimension(3)
+        elementtemplate = mesh.createElementtemplate()
+        elementtemplate.setElementShapeType(Element.SHAPE_TYPE_CUBE)
+        eft = mesh.createElementfieldtemplate(
+            fieldmodule.createElementbasis(3, Elementbasis.FUNCTION_TYPE_LINEAR_LAGRANGE))
+        elementtemplate.defineField(coordinates, -1, eft)
+        for k in range(elementsCount):
+            for j in range(elementsCount):
+                for i in range(elementsCount):
+                    element = mesh.createElement(1 + i + elementsCount * (j + elementsCount * k), elementtemplate)
+                    base = 1 + i + nodesCount * (j + nodesCount * k)
+                    element.setNodesByIdentifier(eft, [
+                        base, base + 1, base + nodesCount, base + nodesCount + 1,
+                        base + nodesCount * nodesCount, base + nodesCount * nodesCount + 1,
+                        base + nodesCount * nodesCount + nodesCount, base + nodesCount * nodesCount + nodesCount + 1])
+        fieldmodule.defineAllFaces()
+        surface = findOrCreateFieldGroup(fieldmodule, "surface")
+        surface.setSubelementHandlingMode(surface.SUBELEMENT_HANDLING_MODE_FULL)
+        surface.getOrCreateMeshGroup(fieldmodule.findMeshByDimension(2)).addElementsConditional(
+            fieldmodule.createFieldIsExterior())
+    region.writeFile(zincModelFileName)
+    return surface.getMeshGroup(fieldmodule.findMeshByDimension(2)).getSize()
+
+
+def writeSurfaceData(pointsCount, zincDataFileName):
+    """
+    Write pointsCount data points in group "surface", randomly within 0.02 of the surface of the unit cube.
+    """
+    random.seed(1)
+    context = Context("data")
+    region = context.getDefaultRegion()
+    fieldmodule = region.getFieldmodule()
+    with ChangeManager(fieldmodule):
+        coordinates = findOrCreateFieldCoordinates(fieldmodule, "data_coordinates")
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        nodetemplate = datapoints.createNodetemplate()
+        nodetemplate.defineField(coordinates)
+        group = findOrCreateFieldGroup(fieldmodule, "surface")
+        nodesetGroup = group.getOrCreateNodesetGroup(datapoints)
+        fieldcache = fieldmodule.createFieldcache()
+        for identifier in range(1, pointsCount + 1):
+            x = [random.uniform(0.0, 1.0) for c in range(3)]
+            x[random.randrange(3)] = random.choice([0.0, 1.0]) + random.uniform(-0.02, 0.02)
+            node = datapoints.createNode(identifier, nodetemplate)
+            fieldcache.setNode(node)
+            coordinates.assignReal(fieldcache, x)
+            nodesetGroup.addNode(node)
+    region.writeFile(zincDataFileName)
+
+
+def main(elementsCounts):
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        pointsCount = 5000
+        writeSurfaceData(pointsCount, zincDataFileName)
+        for elementsCount in elementsCounts:
+            zincModelFileName = os.path.join(directory, "model" + str(elementsCount) + ".exf")
+            facesCount = writeRefinedCubeModel(elementsCount, zincModelFileName)
+            results = []
+            for spatialIndex in (False, True):
+                fitter = Fitter(zincModelFileName, zincDataFileName)
+                fitter.setDataProjectionSpatialIndex(spatialIndex)
+                fitter.load()
+                config = fitter.getInitialFitterStepConfig()
+                startTime = time.perf_counter()
+                fitter.calculateDataProjections(config)
+                elapsedTime = time.perf_counter() - startTime
+                results.append(fitter.getDataRMSAndMaximumProjectionError())
+                print("faces", facesCount, "points", pointsCount, "spatial index" if spatialIndex else "all elements",
+                      "projection %.3f s" % elapsedTime)
+            print("    RMS, maximum error", results[0], results[1])
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [4, 8, 16, 32])
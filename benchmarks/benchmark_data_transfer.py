@@ -0,0 +1,79 @@
+"""
+Benchmark loading data with transfer into the model region via text buffers or direct copy.
+Each case is run in a separate process to measure its peak memory.
+
+Usage: python benchmarks/benchmark_data_transfer.py [pointsCount ...]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.field import findOrCreateFieldCoordinates, findOrCreateFieldGroup
+from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.zinc.context import Context
+
+from scaffoldfitter.fitter import Fitter
+
+here = os.path.abspath(os.path.dirname(__file__))
+zincModelFileName = os.path.join(here, "..", "tests", "resources", "cube_to_sphere.exf")
+
+
+def writeSyntheticData(pointsCount, zincDataFileName):
+    """
+    Write data file with pointsCount nodes and pointsCount datapoints with data_coordinates,
+    with every third point in a "top" group.
+    """
+    context = Context("benchmark")
+    region = context.getDefaultRegion()
+    fieldmodule = region.getFieldmodule()
+    with ChangeManager(fieldmodule):
+        coordinates = findOrCreateFieldCoordinates(fieldmodule, "data_coordinates")
+        group = findOrCreateFieldGroup(fieldmodule, "top")
+        fieldcache = fieldmodule.createFieldcache()
+        for nodesetName in ("nodes", "datapoints"):
+            nodeset = fieldmodule.findNodesetByName(nodesetName)
+            nodesetGroup = group.getOrCreateNodesetGroup(nodeset)
+            nodetemplate = nodeset.createNodetemplate()
+            nodetemplate.defineField(coordinates)
+            for identifier in range(1, pointsCount + 1):
+                node = nodeset.createNode(identifier, nodetemplate)
+                fieldcache.setNode(node)
+                coordinates.assignReal(fieldcache, [identifier / pointsCount, 0.5, 1.0])
+                if (identifier % 3) == 0:
+                    nodesetGroup.addNode(node)
+    region.writeFile(zincDataFileName)
+
+
+def runLoad(zincDataFileName, directDataTransfer, queue):
+    fitter = Fitter(zincModelFileName, zincDataFileName)
+    fitter.setDirectDataTransfer(directDataTransfer)
+    startMaxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    startTime = time.perf_counter()
+    fitter.load()
+    elapsedTime = time.perf_counter() - startTime
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsedTime, (maxRss - startMaxRss) / 1024.0))
+
+
+def main(pointsCounts):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as dataDirectory:
+        for pointsCount in pointsCounts:
+            zincDataFileName = os.path.join(dataDirectory, "data" + str(pointsCount) + ".exf")
+            writeSyntheticData(pointsCount, zincDataFileName)
+            for name, directDataTransfer in (("buffer", False), ("direct", True)):
+                queue = context.Queue()
+                process = context.Process(target=runLoad, args=(zincDataFileName, directDataTransfer, queue))
+                process.start()
+                elapsedTime, peakMemoryIncrease = queue.get()
+                process.join()
+                print("points", 2 * pointsCount, name, "load %.3f s," % elapsedTime,
+                      "peak memory increase %.1f MB" % peakMemoryIncrease)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50000, 500000])
@@ -0,0 +1,120 @@
+"""
+Benchmark assigning deformation penalties on refined cube scaffolds with many annotation groups, testing every
+element against every group as before, or via the element group index.
+
+Usage: python benchmarks/benchmark_deformation_penalties.py [elementsCountPerAxis ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.field import findOrCreateFieldGroup, getGroupList
+from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.zinc.context import Context
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+from scaffoldfitter.fitterstepfit import FitterStepFit
+
+
+def addSlabGroups(zincFileName, groupsCount):
+    """
+    Add groupsCount groups "slab<n>" each containing elements with identifier modulo groupsCount equal to n.
+    """
+    context = Context("groups")
+    region = context.getDefaultRegion()
+    region.readFile(zincFileName)
+    fieldmodule = region.getFieldmodule()
+    mesh = fieldmodule.findMeshByDimension(3)
+    with ChangeManager(fieldmodule):
+        meshGroups = [findOrCreateFieldGroup(fieldmodule, "slab" + str(n)).getOrCreateMeshGroup(mesh)
+                      for n in range(groupsCount)]
+        elementIter = mesh.createElementiterator()
+        element = elementIter.next()
+        while element.isValid():
+            meshGroups[element.getIdentifier() % groupsCount].addElement(element)
+            element = elementIter.next()
+    region.writeFile(zincFileName)
+
+
+def assignDeformationPenaltiesByElement(fitter, fitterStepFit, activeMeshGroups):
+    """
+    Assign deformation penalties testing every element against every group, as previously done.
+    """
+    fieldmodule = fitter.getFieldmodule()
+    mesh = fitter.getHighestDimensionMesh()
+    groups = []
+    for group in (getGroupList(fieldmodule) + [None]):
+        if group:
+            meshGroup = group.getMeshGroup(mesh)
+            if (not meshGroup.isValid()) or (meshGroup.getSize() == 0):
+                continue
+            groupName = group.getName()
+        else:
+            meshGroup = None
+            groupName = None
+        strainPenalty, setLocally, inheritable = fitterStepFit.getGroupStrainPenalty(groupName, 9)
+        strainSet = setLocally or ((setLocally is False) and inheritable)
+        curvaturePenalty, setLocally, inheritable = fitterStepFit.getGroupCurvaturePenalty(groupName, 27)
+        curvatureSet = setLocally or ((setLocally is False) and inheritable)
+        groups.append((group, meshGroup, strainPenalty, strainSet, curvaturePenalty, curvatureSet))
+    deformActiveMeshGroup, strainActiveMeshGroup, curvatureActiveMeshGroup = activeMeshGroups
+    with ChangeManager(fieldmodule):
+        for activeMeshGroup in activeMeshGroups:
+            activeMeshGroup.removeAllElements()
+        fieldcache = fieldmodule.createFieldcache()
+        elementIter = mesh.createElementiterator()
+        element = elementIter.next()
+        while element.isValid():
+            fieldcache.setElement(element)
+            strainPenalty = curvaturePenalty = None
+            for group, meshGroup, groupStrainPenalty, strainSet, groupCurvaturePenalty, curvatureSet in groups:
+                if (not group) or meshGroup.containsElement(element):
+                    if (not strainPenalty) and (strainSet or (not group)):
+                        strainPenalty = groupStrainPenalty
+                    if (not curvaturePenalty) and (curvatureSet or (not group)):
+                        curvaturePenalty = groupCurvaturePenalty
+            fitter.getStrainPenaltyField().assignReal(fieldcache, strainPenalty)
+            fitter.getCurvaturePenaltyField().assignReal(fieldcache, curvaturePenalty)
+            if any((s > 0.0) for s in strainPenalty):
+                strainActiveMeshGroup.addElement(element)
+            if any((s > 0.0) for s in curvaturePenalty):
+                curvatureActiveMeshGroup.addElement(element)
+            deformActiveMeshGroup.addElement(element)
+            element = elementIter.next()
+
+
+def main(elementsCounts):
+    groupsCount = 100
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        writeSurfaceData(1000, zincDataFileName)
+        for elementsCount in elementsCounts:
+            zincModelFileName = os.path.join(directory, "model" + str(elementsCount) + ".exf")
+            writeRefinedCubeModel(elementsCount, zincModelFileName)
+            addSlabGroups(zincModelFileName, groupsCount)
+            fitter = Fitter(zincModelFileName, zincDataFileName)
+            fit = FitterStepFit()
+            fitter.addFitterStep(fit)
+            fit.setGroupStrainPenalty(None, [0.01])
+            fit.setGroupCurvaturePenalty(None, [0.01])
+            for n in range(0, groupsCount, 3):
+                fit.setGroupStrainPenalty("slab" + str(n), [0.1 * n])
+            fitter.load()
+            elementsTotal = fitter.getHighestDimensionMesh().getSize()
+            times = []
+            for repeat in range(2):
+                startTime = time.perf_counter()
+                activeMeshGroups = fitter.assignDeformationPenalties(fit)
+                times.append(time.perf_counter() - startTime)
+            startTime = time.perf_counter()
+            assignDeformationPenaltiesByElement(fitter, fit, activeMeshGroups)
+            byElementTime = time.perf_counter() - startTime
+            print("elements", elementsTotal, "groups", groupsCount, "test every group %.3f s" % byElementTime,
+                  "index first %.3f s" % times[0], "reused %.3f s" % times[1])
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 20, 40])
@@ -0,0 +1,96 @@
+"""
+Benchmark loading data in 2 overlapping groups, defining data projection fields on every point of each group
+as before, or only on points not already defined by a previous group.
+
+Usage: python benchmarks/benchmark_field_definition.py [pointsCount ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.field import findOrCreateFieldGroup
+from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.zinc.context import Context
+from cmlibs.zinc.field import Field
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+
+
+def addGroupCopy(zincFileName, groupName, copyName):
+    """
+    Add group copyName with the same elements and nodes/data points as group groupName to zinc file.
+    """
+    context = Context("copy")
+    region = context.getDefaultRegion()
+    region.readFile(zincFileName)
+    fieldmodule = region.getFieldmodule()
+    with ChangeManager(fieldmodule):
+        group = fieldmodule.findFieldByName(groupName).castGroup()
+        copyGroup = findOrCreateFieldGroup(fieldmodule, copyName)
+        for dimension in range(1, 4):
+            mesh = fieldmodule.findMeshByDimension(dimension)
+            if group.getMeshGroup(mesh).isValid():
+                copyGroup.getOrCreateMeshGroup(mesh).addElementsConditional(group)
+        for domainType in (Field.DOMAIN_TYPE_NODES, Field.DOMAIN_TYPE_DATAPOINTS):
+            nodeset = fieldmodule.findNodesetByFieldDomainType(domainType)
+            if group.getNodesetGroup(nodeset).isValid():
+                copyGroup.getOrCreateNodesetGroup(nodeset).addNodesConditional(group)
+    region.writeFile(zincFileName)
+
+
+def defineFieldsByMerge(fitter, group, meshDimension):
+    """
+    Define data projection fields by merging on every data point in group, as previously done.
+    """
+    fieldmodule = fitter.getFieldmodule()
+    datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+    with ChangeManager(fieldmodule):
+        nodetemplate = datapoints.createNodetemplate()
+        nodetemplate.defineField(fitter.getDataHostLocationField())
+        nodetemplate.defineField(fitter.getDataWeightField())
+        nodetemplate.defineField(fitter.getDataProjectionOrientationField())
+        nodetemplate.defineField(fitter._dataProjectionLocationFields[meshDimension - 1])
+        nodeIter = group.getNodesetGroup(datapoints).createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            node.merge(nodetemplate)
+            node = nodeIter.next()
+
+
+def main(pointsCounts):
+    defineFieldsOnGroup = Fitter._defineDataProjectionFieldsOnGroup
+    with tempfile.TemporaryDirectory() as directory:
+        zincModelFileName = os.path.join(directory, "model.exf")
+        writeRefinedCubeModel(4, zincModelFileName)
+        addGroupCopy(zincModelFileName, "surface", "surface_copy")
+        for pointsCount in pointsCounts:
+            zincDataFileName = os.path.join(directory, "data" + str(pointsCount) + ".exf")
+            writeSurfaceData(pointsCount, zincDataFileName)
+            addGroupCopy(zincDataFileName, "surface", "surface_copy")
+            for bulk in (False, True):
+                # time the fields definition within load, which also projects data
+                defineTimes = []
+
+                def timedDefineFields(fitter, group, meshDimension):
+                    startTime = time.perf_counter()
+                    if bulk:
+                        defineFieldsOnGroup(fitter, group, meshDimension)
+                    else:
+                        defineFieldsByMerge(fitter, group, meshDimension)
+                    defineTimes.append(time.perf_counter() - startTime)
+
+                Fitter._defineDataProjectionFieldsOnGroup = timedDefineFields
+                fitter = Fitter(zincModelFileName, zincDataFileName)
+                startTime = time.perf_counter()
+                fitter.load()
+                loadTime = time.perf_counter() - startTime
+                print("points", pointsCount, "in 2 overlapping groups", "load %.3f s" % loadTime,
+                      "define fields on", "undefined points" if bulk else "all points", "%.3f s" % sum(defineTimes))
+    Fitter._defineDataProjectionFieldsOnGroup = defineFieldsOnGroup
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
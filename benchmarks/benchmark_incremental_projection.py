@@ -0,0 +1,66 @@
+"""
+Benchmark recalculating data projections after a small change in model geometry, as between iterations of
+a converging fit, with and without incremental projection on refined cube scaffolds.
+
+Usage: python benchmarks/benchmark_incremental_projection.py [elementsCountPerAxis ...]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.zinc.field import Field
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+from scaffoldfitter.fitterstepfit import FitterStepFit
+
+
+def perturbModel(fitter, amplitude):
+    """
+    Add smooth displacement of up to amplitude to model coordinates, as a fit iteration might.
+    """
+    fieldmodule = fitter.getFieldmodule()
+    coordinates = fitter.getModelCoordinatesField()
+    nodes = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+    with ChangeManager(fieldmodule):
+        fieldcache = fieldmodule.createFieldcache()
+        nodeIter = nodes.createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            fieldcache.setNode(node)
+            result, x = coordinates.evaluateReal(fieldcache, 3)
+            coordinates.assignReal(fieldcache, [x[c] + amplitude * math.sin(3.0 * x[(c + 1) % 3]) for c in range(3)])
+            node = nodeIter.next()
+
+
+def main(elementsCounts):
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        pointsCount = 5000
+        writeSurfaceData(pointsCount, zincDataFileName)
+        for elementsCount in elementsCounts:
+            zincModelFileName = os.path.join(directory, "model" + str(elementsCount) + ".exf")
+            facesCount = writeRefinedCubeModel(elementsCount, zincModelFileName)
+            results = []
+            for incremental in (False, True):
+                fitter = Fitter(zincModelFileName, zincDataFileName)
+                fitter.load()
+                fit = FitterStepFit()
+                fitter.addFitterStep(fit)
+                fit.setIncrementalProjection(incremental)
+                perturbModel(fitter, 0.2 / elementsCount)
+                startTime = time.perf_counter()
+                fitter.calculateDataProjections(fit)
+                elapsedTime = time.perf_counter() - startTime
+                results.append(fitter.getDataRMSAndMaximumProjectionError())
+                print("faces", facesCount, "points", pointsCount, "incremental" if incremental else "full",
+                      "projection %.3f s" % elapsedTime)
+            print("    RMS, maximum error", results[0], results[1])
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [4, 8, 16, 32])
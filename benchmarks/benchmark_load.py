@@ -0,0 +1,84 @@
+"""
+Benchmark loading refined cube scaffolds plus the first assignment of deformation penalties, with penalty
+values zeroed on every element during load as before, or only set by the assignment which covers every element.
+
+Usage: python benchmarks/benchmark_load.py [elementsCountPerAxis ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.general import ChangeManager
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+from scaffoldfitter.fitterstepfit import FitterStepFit
+
+
+def defineCommonMeshFieldsZeroed(fitter):
+    """
+    Define penalty fields, then zero them on every element with 27-value buffers in the same loop, as
+    previously done.
+    """
+    defineCommonMeshFields(fitter)
+    fieldmodule = fitter.getFieldmodule()
+    mesh = fitter.getHighestDimensionMesh()
+    strainPenaltyField = fitter._strainPenaltyField
+    curvaturePenaltyField = fitter._curvaturePenaltyField
+    with ChangeManager(fieldmodule):
+        fieldcache = fieldmodule.createFieldcache()
+        zeroValues = [0.0] * 27
+        elemIter = mesh.createElementiterator()
+        element = elemIter.next()
+        while element.isValid():
+            fieldcache.setElement(element)
+            strainPenaltyField.assignReal(fieldcache, zeroValues)
+            curvaturePenaltyField.assignReal(fieldcache, zeroValues)
+            element = elemIter.next()
+
+
+defineCommonMeshFields = Fitter._defineCommonMeshFields
+
+
+def main(elementsCounts):
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        writeSurfaceData(1000, zincDataFileName)
+        for elementsCount in elementsCounts:
+            zincModelFileName = os.path.join(directory, "model" + str(elementsCount) + ".exf")
+            writeRefinedCubeModel(elementsCount, zincModelFileName)
+            for zeroed in (True, False):
+                defineTimes = []
+
+                def timedDefineCommonMeshFields(fitter):
+                    startTime = time.perf_counter()
+                    if zeroed:
+                        defineCommonMeshFieldsZeroed(fitter)
+                    else:
+                        defineCommonMeshFields(fitter)
+                    defineTimes.append(time.perf_counter() - startTime)
+
+                Fitter._defineCommonMeshFields = timedDefineCommonMeshFields
+                fitter = Fitter(zincModelFileName, zincDataFileName)
+                startTime = time.perf_counter()
+                fitter.load()
+                loadTime = time.perf_counter() - startTime
+                fit = FitterStepFit()
+                fitter.addFitterStep(fit)
+                fit.setGroupStrainPenalty(None, [0.01])
+                fit.setGroupCurvaturePenalty(None, [0.1])
+                startTime = time.perf_counter()
+                fitter.assignDeformationPenalties(fit)
+                assignTime = time.perf_counter() - startTime
+                print("elements", fitter.getHighestDimensionMesh().getSize(),
+                      "zeroed on load" if zeroed else "assigned only",
+                      "define penalty fields %.3f s" % sum(defineTimes), "load %.3f s" % loadTime,
+                      "first assign %.3f s" % assignTime, "load + assign %.3f s" % (loadTime + assignTime))
+                fitter.cleanup()
+    Fitter._defineCommonMeshFields = defineCommonMeshFields
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 20, 40])
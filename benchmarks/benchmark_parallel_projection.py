@@ -0,0 +1,106 @@
+"""
+Benchmark scaling of nearest data point locations found in worker processes on refined cube scaffolds,
+with data points scattered within 2% of the cube surface, as a prototype for parallel data projection.
+Each worker reads the model and data once, then finds locations for a contiguous chunk of data points on
+each pass, so copying the model and data is excluded from the timed passes.
+Compare with the serial Fitter data projection time printed first.
+
+Usage: python benchmarks/benchmark_parallel_projection.py [elementsCountPerAxis [pointsCount [processCount ...]]]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from cmlibs.utils.zinc.field import findOrCreateFieldGroup
+from cmlibs.zinc.context import Context
+from cmlibs.zinc.field import Field, FieldFindMeshLocation
+from cmlibs.zinc.result import RESULT_OK
+
+from benchmark_data_projection import writeRefinedCubeModel, writeSurfaceData
+from scaffoldfitter.fitter import Fitter
+
+
+# worker state: model and data read once per process
+workerState = {}
+
+
+def initialiseWorker(zincModelFileName, zincDataFileName):
+    """
+    Read model and data into worker process and create find mesh location field on surface faces.
+    """
+    context = Context("worker")
+    region = context.getDefaultRegion()
+    assert region.readFile(zincModelFileName) == RESULT_OK, "Worker: Failed to read model"
+    assert region.readFile(zincDataFileName) == RESULT_OK, "Worker: Failed to read data"
+    fieldmodule = region.getFieldmodule()
+    mesh2d = fieldmodule.findMeshByDimension(2)
+    surfaceMeshGroup = findOrCreateFieldGroup(fieldmodule, "surface").getMeshGroup(mesh2d)
+    findLocation = fieldmodule.createFieldFindMeshLocation(
+        fieldmodule.findFieldByName("data_coordinates"), fieldmodule.findFieldByName("coordinates"), mesh2d)
+    findLocation.setSearchMesh(surfaceMeshGroup)
+    findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+    workerState.update({
+        "context": context,
+        "datapoints": fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS),
+        "fieldcache": fieldmodule.createFieldcache(),
+        "findLocation": findLocation
+    })
+
+
+def findLocations(identifierRange):
+    """
+    Find nearest surface locations of data points in identifier range.
+    :param identifierRange: (first, last) data point identifiers, inclusive.
+    :return: List of (element identifier, xi) for each data point.
+    """
+    datapoints = workerState["datapoints"]
+    fieldcache = workerState["fieldcache"]
+    findLocation = workerState["findLocation"]
+    locations = []
+    for identifier in range(identifierRange[0], identifierRange[1] + 1):
+        fieldcache.setNode(datapoints.findNodeByIdentifier(identifier))
+        element, xi = findLocation.evaluateMeshLocation(fieldcache, 2)
+        locations.append((element.getIdentifier(), xi))
+    return locations
+
+
+def main(elementsCount, pointsCount, processCounts):
+    with tempfile.TemporaryDirectory() as directory:
+        zincDataFileName = os.path.join(directory, "data.exf")
+        writeSurfaceData(pointsCount, zincDataFileName)
+        zincModelFileName = os.path.join(directory, "model.exf")
+        facesCount = writeRefinedCubeModel(elementsCount, zincModelFileName)
+        fitter = Fitter(zincModelFileName, zincDataFileName)
+        fitter.load()
+        startTime = time.perf_counter()
+        fitter.calculateDataProjections(fitter.getInitialFitterStepConfig())
+        print("faces", facesCount, "points", pointsCount, "serial fitter projection %.3f s" %
+              (time.perf_counter() - startTime))
+        fitter.cleanup()
+        serialLocations = None
+        for processCount in processCounts:
+            chunkSize = -(-pointsCount // processCount)
+            identifierRanges = [(first, min(first + chunkSize - 1, pointsCount))
+                                for first in range(1, pointsCount + 1, chunkSize)]
+            with multiprocessing.get_context("spawn").Pool(
+                    processCount, initialiseWorker, (zincModelFileName, zincDataFileName)) as pool:
+                pool.map(findLocations, identifierRanges)  # exclude worker start up and model copy time
+                startTime = time.perf_counter()
+                locations = [location for chunkLocations in pool.map(findLocations, identifierRanges)
+                             for location in chunkLocations]
+                elapsedTime = time.perf_counter() - startTime
+            if serialLocations is None:
+                serialTime = elapsedTime
+                serialLocations = locations
+            print("faces", facesCount, "points", pointsCount, "processes", processCount,
+                  "find locations %.3f s" % elapsedTime, "speed up %.2f" % (serialTime / elapsedTime),
+                  "matches 1 process" if locations == serialLocations else "DIFFERS FROM 1 PROCESS")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20000,
+         [int(arg) for arg in sys.argv[3:]] or [1, 2, 4, 8])
@@ -2,18 +2,33 @@
 Main class for fitting scaffolds.
 """
 
+import array
+import hashlib
+import itertools
 import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from operator import add as add_int
 
 from cmlibs.maths.vectorops import add, mult, sub
 from cmlibs.utils.zinc.field import assignFieldParameters, createFieldFiniteElementClone, getGroupList, \
-    findOrCreateFieldFiniteElement, findOrCreateFieldStoredMeshLocation, getUniqueFieldName, orphanFieldByName, \
+    findOrCreateFieldCoordinates, findOrCreateFieldFiniteElement, findOrCreateFieldGroup, \
+    findOrCreateFieldStoredMeshLocation, findOrCreateFieldStoredString, getUniqueFieldName, orphanFieldByName, \
     create_jacobian_determinant_field
 from cmlibs.utils.zinc.finiteelement import evaluate_field_nodeset_range, findNodeWithName, get_scalar_field_minimum_in_mesh
 from cmlibs.utils.zinc.general import ChangeManager
+from cmlibs.utils.zinc.group import domain_iterator_to_identifier_ranges, mesh_group_add_identifier_ranges, \
+    mesh_group_to_identifier_ranges, nodeset_group_add_identifier_ranges, nodeset_group_to_identifier_ranges
 from cmlibs.utils.zinc.region import write_to_buffer, read_from_buffer
 from cmlibs.zinc.context import Context
-from cmlibs.zinc.element import Elementbasis, Elementfieldtemplate
+from cmlibs.zinc.element import Element, Elementbasis, Elementfieldtemplate
 from cmlibs.zinc.field import Field, FieldFindMeshLocation, FieldGroup
+from cmlibs.zinc.node import Node
 from cmlibs.zinc.result import RESULT_OK, RESULT_WARNING_PART_DONE
 
 from scaffoldfitter.fitterexceptions import FitterModelCoordinateField
@@ -22,12 +37,391 @@ from scaffoldfitter.fitterstepconfig import FitterStepConfig
 from scaffoldfitter.fitterstepfit import FitterStepFit
 
 
-def _next_available_identifier(node_set, candidate):
-    node = node_set.findNodeByIdentifier(candidate)
+def _get_free_identifiers(used_identifier_ranges, count):
+    """
+    Get the lowest positive identifiers not in the used identifier ranges.
+    :param used_identifier_ranges: Sorted list of used identifier ranges [start, stop] e.g. [[1,30],[55,55]].
+    :param count: Number of free identifiers to get.
+    :return: List of count free identifiers in ascending order.
+    """
+    free_identifiers = []
+    start = 1
+    for used_start, used_stop in used_identifier_ranges + [[None, None]]:
+        stop = (start + count - len(free_identifiers)) if (used_start is None) else \
+            min(used_start, start + count - len(free_identifiers))
+        if stop > start:
+            free_identifiers.extend(range(start, stop))
+            if len(free_identifiers) == count:
+                break
+        if used_stop is not None:
+            start = max(start, used_stop + 1)
+    return free_identifiers
+
+
+def _get_nodes_and_identifiers(nodeset):
+    """
+    Get all nodes in nodeset with their identifiers, in one iteration.
+    :param nodeset: Zinc Nodeset.
+    :return: list(Node), list(identifiers) in ascending order of identifier.
+    """
+    nodes = []
+    identifiers = []
+    nodeIterator = nodeset.createNodeiterator()
+    node = nodeIterator.next()
     while node.isValid():
-        candidate += 1
-        node = node_set.findNodeByIdentifier(candidate)
-    return candidate
+        nodes.append(node)
+        identifiers.append(node.getIdentifier())
+        node = nodeIterator.next()
+    return nodes, identifiers
+
+
+def _set_node_identifiers(nodes, old_identifiers, new_identifiers):
+    """
+    Change identifiers of nodes, ordered so no new identifier is in use when set.
+    Requires mapping from old to new identifiers to be increasing.
+    :param nodes: List of Zinc Node from the same nodeset, in ascending order of identifier.
+    :param old_identifiers: Existing identifiers of nodes.
+    :param new_identifiers: New identifiers for nodes, in ascending order.
+    """
+    # identifiers increasing must be set from highest, then identifiers decreasing from lowest
+    for i in range(len(nodes) - 1, -1, -1):
+        if new_identifiers[i] > old_identifiers[i]:
+            result = nodes[i].setIdentifier(new_identifiers[i])
+            assert result == RESULT_OK, "Failed to change identifier " + str(old_identifiers[i]) + \
+                " to " + str(new_identifiers[i])
+    for i in range(len(nodes)):
+        if new_identifiers[i] < old_identifiers[i]:
+            result = nodes[i].setIdentifier(new_identifiers[i])
+            assert result == RESULT_OK, "Failed to change identifier " + str(old_identifiers[i]) + \
+                " to " + str(new_identifiers[i])
+
+
+def _decimate_points(coordinates, fieldcache, nodeset, mode, spacing):
+    """
+    Get spatially uniform subset of nodes in nodeset.
+    :param coordinates: Field giving node coordinates.
+    :param fieldcache: Fieldcache for evaluating coordinates.
+    :param nodeset: Nodeset or NodesetGroup to decimate.
+    :param mode: "voxel" keeps the node closest to the centre of each cube of side spacing containing nodes.
+    "poisson" keeps nodes in order of identifier if no kept node is closer than spacing.
+    :param spacing: Absolute spacing > 0.0.
+    :return: List of nodes kept.
+    """
+    componentsCount = coordinates.getNumberOfComponents()
+    # map from tuple of integer cell indexes to voxel: [distanceSquared, node], poisson: list of (x, node)
+    cells = {}
+    cellSize = spacing if (mode == "voxel") else spacing / math.sqrt(componentsCount)
+    spacingSquared = spacing * spacing
+    neighbourOffsets = list(itertools.product(range(-2, 3), repeat=componentsCount))
+    nodeiterator = nodeset.createNodeiterator()
+    node = nodeiterator.next()
+    while node.isValid():
+        fieldcache.setNode(node)
+        result, x = coordinates.evaluateReal(fieldcache, componentsCount)
+        if result == RESULT_OK:
+            if componentsCount == 1:
+                x = [x]
+            cell = tuple(math.floor(value / cellSize) for value in x)
+            if mode == "voxel":
+                distanceSquared = sum(((value / cellSize) - (index + 0.5)) ** 2 for value, index in zip(x, cell))
+                best = cells.get(cell)
+                if (not best) or (distanceSquared < best[0]):
+                    cells[cell] = [distanceSquared, node]
+            else:
+                for offset in neighbourOffsets:
+                    for keptX, keptNode in cells.get(tuple(index + delta for index, delta in zip(cell, offset)), ()):
+                        if sum((a - b) * (a - b) for a, b in zip(x, keptX)) < spacingSquared:
+                            break
+                    else:
+                        continue
+                    break
+                else:
+                    cells.setdefault(cell, []).append((x, node))
+        node = nodeiterator.next()
+    if mode == "voxel":
+        return [best[1] for best in cells.values()]
+    return [keptNode for kept in cells.values() for keptX, keptNode in kept]
+
+
+def _array_to_little_endian_bytes(values):
+    """
+    :param values: array.array to convert.
+    :return: bytes of values in little endian byte order, for machine independent files and hashes.
+    """
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from_little_endian_bytes(typecode, data):
+    """
+    :param typecode: array.array typecode of values.
+    :param data: bytes of values in little endian byte order.
+    :return: array.array of values.
+    """
+    values = array.array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _get_nodeset_group_fingerprint(nodeset_group):
+    """
+    :param nodeset_group: Zinc NodesetGroup.
+    :return: Hex digest of the identifiers of nodes in the nodeset group, to detect membership changes.
+    """
+    identifier_ranges = array.array("q", itertools.chain.from_iterable(
+        nodeset_group_to_identifier_ranges(nodeset_group)))
+    return hashlib.sha256(_array_to_little_endian_bytes(identifier_ranges)).hexdigest()
+
+
+def _get_outlier_threshold(lengths, mode, value):
+    """
+    Get statistical threshold on projection lengths above which data points are outliers.
+    :param lengths: Non-empty array of data projection lengths.
+    :param mode: "percentile" or "mad"; see FitterStepConfig.getGroupOutlierThreshold.
+    :param value: Percentile from 0.0 to 100.0, or number of scaled median absolute deviations.
+    :return: Threshold length.
+    """
+    if mode == "percentile":
+        sorted_lengths = sorted(lengths)
+        position = 0.01 * value * (len(sorted_lengths) - 1)
+        index = min(int(position), len(sorted_lengths) - 2)
+        if index < 0:
+            return sorted_lengths[0]
+        return sorted_lengths[index] + (position - index) * (sorted_lengths[index + 1] - sorted_lengths[index])
+    assert mode == "mad", "Invalid outlier threshold mode " + str(mode)
+    median = statistics.median(lengths)
+    median_absolute_deviation = statistics.median(abs(length - median) for length in lengths)
+    return median + value * 1.4826 * median_absolute_deviation
+
+
+class _ElementBoundsGrid:
+    """
+    Uniform grid of cells referencing elements whose sampled, padded coordinate bounding boxes overlap them,
+    for finding candidate elements nearest to points.
+    """
+
+    def __init__(self, coordinates, fieldcache, meshGroup, samplesCount=4, padding=0.1):
+        """
+        :param coordinates: Field giving element coordinates.
+        :param fieldcache: Fieldcache for evaluating coordinates.
+        :param meshGroup: Mesh or MeshGroup containing elements to index.
+        :param samplesCount: Number of sample points in each xi direction for bounding boxes.
+        :param padding: Proportion of largest bounding box size to expand each box by, to contain curved elements.
+        """
+        self._componentsCount = componentsCount = coordinates.getNumberOfComponents()
+        meshDimension = meshGroup.getDimension()
+        xiSamples = [i / (samplesCount - 1) for i in range(samplesCount)]
+        xis = list(itertools.product(xiSamples, repeat=meshDimension))
+        self._elements = []
+        self._boxes = []  # list of (minimums, maximums) for each element
+        sizes = []
+        elementiterator = meshGroup.createElementiterator()
+        element = elementiterator.next()
+        while element.isValid():
+            minimums = None
+            for xi in xis:
+                fieldcache.setMeshLocation(element, list(xi))
+                result, x = coordinates.evaluateReal(fieldcache, componentsCount)
+                if result == RESULT_OK:
+                    if componentsCount == 1:
+                        x = [x]
+                    if minimums is None:
+                        minimums = list(x)
+                        maximums = list(x)
+                    else:
+                        for c in range(componentsCount):
+                            if x[c] < minimums[c]:
+                                minimums[c] = x[c]
+                            elif x[c] > maximums[c]:
+                                maximums[c] = x[c]
+            if minimums is not None:
+                size = max(maximums[c] - minimums[c] for c in range(componentsCount))
+                pad = padding * size
+                self._elements.append(element)
+                self._boxes.append(([value - pad for value in minimums], [value + pad for value in maximums]))
+                sizes.append(size)
+            element = elementiterator.next()
+        self._cellSize = max(sum(sizes) / len(sizes), 1.0E-12) if sizes else 1.0
+        self._cells = {}  # map tuple cell indexes -> list of element indexes
+        self._shellOffsets = []  # cached lists of cell offsets at each Chebyshev distance
+        for index, (minimums, maximums) in enumerate(self._boxes):
+            ranges = [range(math.floor(minimums[c] / self._cellSize), math.floor(maximums[c] / self._cellSize) + 1)
+                      for c in range(componentsCount)]
+            for cell in itertools.product(*ranges):
+                self._cells.setdefault(cell, []).append(index)
+
+    def getCellSize(self):
+        return self._cellSize
+
+    def _getShellOffsets(self, ring):
+        """
+        :return: List of tuples of cell index offsets at Chebyshev distance ring from a cell.
+        """
+        while len(self._shellOffsets) <= ring:
+            shellRing = len(self._shellOffsets)
+            self._shellOffsets.append(
+                [offset for offset in itertools.product(range(-shellRing, shellRing + 1), repeat=self._componentsCount)
+                 if max(abs(delta) for delta in offset) == shellRing])
+        return self._shellOffsets[ring]
+
+    def getCell(self, x):
+        """
+        :return: Tuple of indexes of cell containing coordinates x.
+        """
+        return tuple(math.floor(value / self._cellSize) for value in x)
+
+    def getCellCandidateElements(self, cell):
+        """
+        Get elements which may be nearest to any point in cell: those with bounding box no further from the cell
+        than the smallest maximum distance between the cell and any bounding box.
+        :param cell: Tuple of cell indexes.
+        :return: List of Zinc Element.
+        """
+        if not self._cells:
+            return []
+        componentsCount = self._componentsCount
+        cellMinimums = [index * self._cellSize for index in cell]
+        cellMaximums = [value + self._cellSize for value in cellMinimums]
+        found = set()
+        upperBoundSquared = math.inf
+        ring = 0
+        while True:
+            if ((2 * ring + 1) ** componentsCount) > len(self._cells):
+                # cheaper to visit all boxes than all cells on shell
+                shellIndexes = range(len(self._boxes))
+            else:
+                # visit cells on shell at Chebyshev distance ring from cell
+                shellIndexes = []
+                for offset in self._getShellOffsets(ring):
+                    shellIndexes.extend(self._cells.get(tuple(map(add_int, cell, offset)), ()))
+            for index in shellIndexes:
+                if index in found:
+                    continue
+                found.add(index)
+                minimums, maximums = self._boxes[index]
+                maximumDistanceSquared = 0.0
+                for cellMinimum, cellMaximum, minimum, maximum in \
+                        zip(cellMinimums, cellMaximums, minimums, maximums):
+                    distance = max(cellMaximum - minimum, maximum - cellMinimum)
+                    maximumDistanceSquared += distance * distance
+                if maximumDistanceSquared < upperBoundSquared:
+                    upperBoundSquared = maximumDistanceSquared
+            # boxes only in cells further out are at least ring * cellSize from cell
+            if (len(found) == len(self._boxes)) or ((ring * self._cellSize) ** 2 >= upperBoundSquared):
+                break
+            ring += 1
+        candidates = []
+        for index in found:
+            minimums, maximums = self._boxes[index]
+            minimumDistanceSquared = 0.0
+            for cellMinimum, cellMaximum, minimum, maximum in zip(cellMinimums, cellMaximums, minimums, maximums):
+                distance = max(minimum - cellMaximum, cellMinimum - maximum, 0.0)
+                minimumDistanceSquared += distance * distance
+            if minimumDistanceSquared <= upperBoundSquared:
+                candidates.append(self._elements[index])
+        return candidates
+
+
+class _NearestSampleGrid:
+    """
+    Uniform grid of cells containing coordinates sampled over elements no further apart than the cell size,
+    for finding the element with the sample nearest to points.
+    """
+
+    def __init__(self, coordinates, fieldcache, meshGroup, cellSize):
+        """
+        :param coordinates: Field giving element coordinates.
+        :param fieldcache: Fieldcache for evaluating coordinates.
+        :param meshGroup: Mesh or MeshGroup containing elements to sample.
+        :param cellSize: Size of grid cells, and approximate maximum spacing of samples in elements.
+        """
+        self._componentsCount = componentsCount = coordinates.getNumberOfComponents()
+        meshDimension = meshGroup.getDimension()
+        self._cellSize = cellSize
+        self._elements = []
+        self._cells = {}  # map tuple cell indexes -> list of (coordinates, element index)
+        self._shellOffsets = []  # cached lists of cell offsets at each Chebyshev distance
+        coarseXis = list(itertools.product([0.0, 0.5, 1.0], repeat=meshDimension))
+        elementiterator = meshGroup.createElementiterator()
+        element = elementiterator.next()
+        while element.isValid():
+            # get element size from coarse samples to choose number of samples in each xi direction
+            minimums = maximums = None
+            for xi in coarseXis:
+                fieldcache.setMeshLocation(element, list(xi))
+                result, x = coordinates.evaluateReal(fieldcache, componentsCount)
+                if result == RESULT_OK:
+                    if componentsCount == 1:
+                        x = [x]
+                    minimums = list(map(min, minimums, x)) if minimums else list(x)
+                    maximums = list(map(max, maximums, x)) if maximums else list(x)
+            if minimums:
+                size = max(maximum - minimum for minimum, maximum in zip(minimums, maximums))
+                samplesCount = max(2, math.ceil(size / cellSize) + 1)
+                xiSamples = [i / (samplesCount - 1) for i in range(samplesCount)]
+                index = len(self._elements)
+                self._elements.append(element)
+                for xi in itertools.product(xiSamples, repeat=meshDimension):
+                    fieldcache.setMeshLocation(element, list(xi))
+                    result, x = coordinates.evaluateReal(fieldcache, componentsCount)
+                    if result == RESULT_OK:
+                        if componentsCount == 1:
+                            x = [x]
+                        self._cells.setdefault(self.getCell(x), []).append((x, index))
+            element = elementiterator.next()
+
+    def _getShellOffsets(self, ring):
+        """
+        :return: List of tuples of cell index offsets at Chebyshev distance ring from a cell.
+        """
+        while len(self._shellOffsets) <= ring:
+            shellRing = len(self._shellOffsets)
+            self._shellOffsets.append(
+                [offset for offset in itertools.product(range(-shellRing, shellRing + 1), repeat=self._componentsCount)
+                 if max(abs(delta) for delta in offset) == shellRing])
+        return self._shellOffsets[ring]
+
+    def getCell(self, x):
+        """
+        :return: Tuple of indexes of cell containing coordinates x.
+        """
+        return tuple(math.floor(value / self._cellSize) for value in x)
+
+    def findNearestElement(self, x):
+        """
+        :param x: Coordinates to find nearest sample to.
+        :return: Zinc Element with sample nearest to x, or None if no samples.
+        """
+        cell = self.getCell(x)
+        nearestDistanceSquared = math.inf
+        nearestIndex = None
+        ring = 0
+        while True:
+            allCells = ((2 * ring + 1) ** self._componentsCount) > len(self._cells)
+            if allCells:
+                # cheaper to visit all occupied cells than all cells on shell
+                cellsSamples = self._cells.values()
+            else:
+                cellsSamples = [self._cells.get(tuple(map(add_int, cell, offset)))
+                                for offset in self._getShellOffsets(ring)]
+            for samples in cellsSamples:
+                if samples:
+                    for sampleX, index in samples:
+                        distanceSquared = 0.0
+                        for value, sampleValue in zip(x, sampleX):
+                            distanceSquared += (value - sampleValue) * (value - sampleValue)
+                        if distanceSquared < nearestDistanceSquared:
+                            nearestDistanceSquared = distanceSquared
+                            nearestIndex = index
+            # samples only in cells further out are at least ring * cellSize from x
+            if allCells or ((ring * self._cellSize) ** 2 >= nearestDistanceSquared):
+                break
+            ring += 1
+        return None if nearestIndex is None else self._elements[nearestIndex]
 
 
 class Fitter:
@@ -35,10 +429,12 @@ class Fitter:
     def __init__(self, zincModelFileName: str, zincDataFileName: str):
         """
         :param zincModelFileName: Name of zinc file supplying model to fit.
-        :param zincDataFileName: Name of zinc filed supplying data to fit to.
+        :param zincDataFileName: Name of zinc filed supplying data to fit to, or None if data is supplied by
+        setDataArrays.
         """
         self._zincModelFileName = zincModelFileName
         self._zincDataFileName = zincDataFileName
+        self._dataArrays = None  # optional dict of arrays supplying data instead of data file, see setDataArrays
         self._context = Context("Scaffoldfitter")
         self._zincVersion = self._context.getVersion()[1]
         self._logger = self._context.getLogger()
@@ -70,6 +466,8 @@ class Fitter:
         self._dataProjectionGroupNames = []  # list of group names with data point projections defined
         self._dataProjectionNodeGroupFields = []  # [dimension - 1]
         self._dataProjectionNodesetGroups = []  # [dimension - 1]
+        # stored mesh locations of data projections on lines and faces of higher dimension meshes, [dimension - 1]
+        self._dataProjectionLocationFields = []
         # field storing precalculated surface/line tangent and normal basis matrix
         # for transforming data delta vector to apply different sliding weights
         # Marker points use identity matrix
@@ -98,7 +496,62 @@ class Fitter:
         self._curvaturePenaltyField = None  # field storing curvature penalty as per-element constant
         self._dataCentre = [0.0, 0.0, 0.0]
         self._dataScale = 1.0
+        self._dataDecimationReport = {}  # map group name -> (number of points loaded, number kept)
         self._diagnosticLevel = 0
+        # optional directory for caching model and transferred data region state, keyed by input file contents
+        self._cacheDirectory = None
+        # if True, copy data values and groups into model region directly instead of via text buffers: opt-in as
+        # it saves memory but is slower; see setDirectDataTransfer
+        self._directDataTransfer = False
+        # if True, limit data projection searches to candidate elements from a grid of element bounding boxes
+        self._dataProjectionSpatialIndex = False
+        # map highest dimension element identifier -> identifiers of elements sharing nodes with it, built on demand
+        self._elementAdjacency = None
+        # map highest dimension element identifier -> zero-based indexes of its model coordinates parameters
+        self._elementParameterIndexes = None
+        # model coordinates parameters when data were last projected, for tracking element displacements
+        self._dataProjectionModelParameters = None
+        # map highest dimension element identifier -> accumulated maximum change in its model coordinates
+        # parameters since data projected near it were last recalculated
+        self._elementDisplacements = {}
+        self._dataProjectionCounts = [0, 0]  # data points keeping, recalculating projections in last projection
+        # map group name -> (number of points sampled, RMS, maximum increase in projection distance) over exact
+        # projections, for groups projected approximately in last projection
+        self._approximateDataProjectionErrors = {}
+        # map (group name, number of integration points) -> (group, cached group geometry summary); see
+        # getGroupGeometrySummary. Invalidated when model parameters last summarised change by more than the
+        # geometry summary tolerance, or group membership changes
+        self._groupGeometrySummaries = {}
+        self._groupGeometrySummaryModelParameters = None
+        # set by field module notifier when model coordinates change so parameters are only compared then
+        self._groupGeometrySummaryModelChanged = True
+        self._fieldmodulenotifier = None
+        self._groupGeometrySummaryTolerance = 0.0
+        # index of highest dimension elements by the groups containing them; see _getElementGroupIndex.
+        # Rebuilt when names or sizes of groups change
+        self._elementGroupIndex = None
+        # fingerprints of resolved settings and membership last applied by assignDataWeights and
+        # assignDeformationPenalties, so unchanged values are not reassigned; see getSkippedAssignmentCounts
+        self._dataWeightsFingerprints = {}  # map group name, or None for markers -> fingerprint
+        self._dataWeightsNodesetGroup = None
+        self._deformationPenaltiesFingerprint = None
+        self._skippedAssignmentCounts = {"dataWeights": 0, "deformationPenalties": 0}
+        # in-memory snapshots of fit state after steps have run, so can backtrack without reloading.
+        # Map FitterStep -> checkpoint dict, in least to most recently used order
+        self._checkpoints = OrderedDict()
+        self._checkpointMemoryLimit = 256 * 1024 * 1024  # approximate limit on bytes used by all checkpoints
+        # optional file written by writeDataProjections to read data projections from on load
+        self._dataProjectionsFileName = None
+        # incremented when group settings of any fitter step or the sequence of steps change
+        self._groupSettingsVersion = 0
+        # map FitterStep -> (index, previous step of same type, previous config, active config), built on demand
+        # and cleared when fitter steps are added, moved or removed; see _getFitterStepLinks
+        self._fitterStepLinks = None
+        # optional wall times and counts of load, data projection, assignment, optimisation and write phases,
+        # recorded while timing is enabled; see getTimingReport
+        self._timingEnabled = False
+        self._timingReport = None
+        self._timingPhases = None  # map phase name -> timing dict for load or step currently recording into
         # must always have an initial FitterStepConfig - which can never be removed
         self._fitterSteps = []
         fitterStep = FitterStepConfig()
@@ -113,6 +566,8 @@ class Fitter:
         # clear fitter steps and load from json. Later assert there is an initial config step
         oldFitterSteps = self._fitterSteps
         self._fitterSteps = []
+        self._fitterStepLinks = None
+        self.incrementGroupSettingsVersion()
         settings = json.loads(s, object_hook=lambda dct: decoder(self, dct))
         # self._fitterSteps will already be populated by decoder
         # ensure there is a first config step:
@@ -127,13 +582,17 @@ class Fitter:
             self._diagnosticLevel = settings["diagnosticLevel"]
         else:
             self._fitterSteps = oldFitterSteps
+            self._fitterStepLinks = None
+            self.incrementGroupSettingsVersion()
             raise AssertionError("Missing initial config step")
 
-    def encodeSettingsJSON(self) -> str:
+    def _encodeSettingsDict(self, endIndex=None) -> dict:
         """
-        :return: String JSON encoding of Fitter settings.
+        :param endIndex: Index of last fitter step to encode, or None for all.
+        :return: Dict encoding of Fitter settings ready for passing to json.dump.
         """
-        dct = {
+        fitterSteps = self._fitterSteps if (endIndex is None) else self._fitterSteps[:endIndex + 1]
+        return {
             "modelCoordinatesField": self._modelCoordinatesFieldName,
             "modelFitGroup": self._modelFitGroupName,
             "fibreField": self._fibreFieldName,
@@ -141,9 +600,14 @@ class Fitter:
             "dataCoordinatesField": self._dataCoordinatesFieldName,
             "markerGroup": self._markerGroupName,
             "diagnosticLevel": self._diagnosticLevel,
-            "fitterSteps": [fitterStep.encodeSettingsJSONDict() for fitterStep in self._fitterSteps]
+            "fitterSteps": [fitterStep.encodeSettingsJSONDict() for fitterStep in fitterSteps]
         }
-        return json.dumps(dct, sort_keys=False, indent=4)
+
+    def encodeSettingsJSON(self) -> str:
+        """
+        :return: String JSON encoding of Fitter settings.
+        """
+        return json.dumps(self._encodeSettingsDict(), sort_keys=False, indent=4)
 
     def getInitialFitterStepConfig(self):
         """
@@ -154,8 +618,9 @@ class Fitter:
     def moveFitterStep(self, prevIndex, newIndex, modelFileNameStem):
         """
         Move fitter step from its previous index to a new index in the sequence, to change the order of steps.
-        If a fitter step that has been run is affected by the change, the model is reloaded and no fitter steps
-        after initial config are run. Can't move to/from index 0 which is initial config step.
+        If a fitter step that has been run is affected by the change, the state after the initial config is
+        restored from its checkpoint or the model is reloaded, and no fitter steps after initial config are run.
+        Can't move to/from index 0 which is initial config step.
         :param prevIndex: Previous index of step to be moved, 1 <= index < number of fitter steps.
         :param newIndex: New index for that step, 1 <= index < number of fitter steps.
         :param modelFileNameStem: File name stem for writing intermediate model files.
@@ -170,46 +635,83 @@ class Fitter:
         fitterStep = self._fitterSteps[prevIndex]
         # Switch position
         self._fitterSteps.insert(newIndex, self._fitterSteps.pop(prevIndex))
+        self._fitterStepLinks = None
+        self.incrementGroupSettingsVersion()
         beforeFitterStep = self._fitterSteps[newIndex - 1]
         afterFitterStep = self._fitterSteps[newIndex + 1] if newIndex < len(self._fitterSteps) - 1 else None
         isMovingStepRun = fitterStep.hasRun()
         isAfterStepRun = afterFitterStep.hasRun() if afterFitterStep else False
         isBeforeStepRun = beforeFitterStep.hasRun()
         if not isMovingStepRun and not isAfterStepRun:
-            return False, self._fitterSteps.index(endStep)
+            return False, self.getFitterStepIndex(endStep)
         endStep = self._fitterSteps[0]
-        return self.run(endStep, modelFileNameStem, True), self._fitterSteps.index(endStep)
+        return self.run(endStep, modelFileNameStem, True), self.getFitterStepIndex(endStep)
+
+    def getGroupSettingsVersion(self):
+        """
+        :return: Counter incremented whenever group settings of any fitter step or the sequence of fitter steps
+        change, so fitter steps can cache resolved group settings.
+        """
+        return self._groupSettingsVersion
+
+    def incrementGroupSettingsVersion(self):
+        """
+        Should only be called by FitterStep when its group settings change, or when fitter steps are added,
+        moved or removed.
+        """
+        self._groupSettingsVersion += 1
+
+    def _getFitterStepLinks(self, fitterStep: FitterStep):
+        """
+        Get position and inheritance links of fitter step, building the index for all steps if needed.
+        :return: index, last step of same type before it or None, last FitterStepConfig before it or None,
+        active FitterStepConfig which is itself if a config.
+        """
+        if self._fitterStepLinks is None:
+            self._fitterStepLinks = {}
+            lastFitterSteps = {}  # map step type -> last step of that type
+            lastConfig = None
+            for index, step in enumerate(self._fitterSteps):
+                stepType = type(step)
+                previousConfig = lastConfig
+                if isinstance(step, FitterStepConfig):
+                    lastConfig = step
+                self._fitterStepLinks[step] = (index, lastFitterSteps.get(stepType), previousConfig, lastConfig)
+                lastFitterSteps[stepType] = step
+        links = self._fitterStepLinks.get(fitterStep)
+        if links is None:
+            raise ValueError("Fitter step is not in fitter")
+        return links
+
+    def getFitterStepIndex(self, fitterStep: FitterStep):
+        """
+        :return: Index of fitterStep in the sequence of fitter steps.
+        """
+        return self._getFitterStepLinks(fitterStep)[0]
 
     def getInheritFitterStep(self, refFitterStep: FitterStep):
         """
         Get last FitterStep of same type as refFitterStep or None if
         refFitterStep is the first.
         """
-        refType = type(refFitterStep)
-        for index in range(self._fitterSteps.index(refFitterStep) - 1, -1, -1):
-            if type(self._fitterSteps[index]) is refType:
-                return self._fitterSteps[index]
-        return None
+        return self._getFitterStepLinks(refFitterStep)[1]
 
     def getInheritFitterStepConfig(self, refFitterStep: FitterStep):
         """
         Get last FitterStepConfig applicable to refFitterStep or None if
         refFitterStep is the first.
         """
-        for index in range(self._fitterSteps.index(refFitterStep) - 1, -1, -1):
-            if isinstance(self._fitterSteps[index], FitterStepConfig):
-                return self._fitterSteps[index]
-        return None
+        return self._getFitterStepLinks(refFitterStep)[2]
 
     def getActiveFitterStepConfig(self, refFitterStep: FitterStep):
         """
         Get latest FitterStepConfig applicable to refFitterStep.
         Can be itself.
         """
-        for index in range(self._fitterSteps.index(refFitterStep), -1, -1):
-            if isinstance(self._fitterSteps[index], FitterStepConfig):
-                return self._fitterSteps[index]
-        raise AssertionError("getActiveFitterStepConfig.  Could not find config.")
+        activeConfig = self._getFitterStepLinks(refFitterStep)[3]
+        if not activeConfig:
+            raise AssertionError("getActiveFitterStepConfig.  Could not find config.")
+        return activeConfig
 
     def addFitterStep(self, fitterStep: FitterStep, refFitterStep=None):
         """
@@ -218,10 +720,12 @@ class Fitter:
         """
         assert fitterStep.getFitter() is None
         if refFitterStep:
-            self._fitterSteps.insert(self._fitterSteps.index(refFitterStep) + 1, fitterStep)
+            self._fitterSteps.insert(self.getFitterStepIndex(refFitterStep) + 1, fitterStep)
         else:
             self._fitterSteps.append(fitterStep)
+        self._fitterStepLinks = None
         fitterStep.setFitter(self)
+        self.incrementGroupSettingsVersion()
 
     def removeFitterStep(self, fitterStep: FitterStep):
         """
@@ -230,9 +734,12 @@ class Fitter:
         :return: Next FitterStep after fitterStep, or previous if None.
         """
         assert fitterStep is not self.getInitialFitterStepConfig()
-        index = self._fitterSteps.index(fitterStep)
-        self._fitterSteps.remove(fitterStep)
+        index = self.getFitterStepIndex(fitterStep)
+        self._fitterSteps.pop(index)
+        self._fitterStepLinks = None
+        self._checkpoints.pop(fitterStep, None)
         fitterStep.setFitter(None)
+        self.incrementGroupSettingsVersion()
         if index >= len(self._fitterSteps):
             index = -1
         return self._fitterSteps[index]
@@ -257,6 +764,7 @@ class Fitter:
         self._dataProjectionGroupNames = []
         self._dataProjectionNodeGroupFields = []
         self._dataProjectionNodesetGroups = []
+        self._dataProjectionLocationFields = []
         self._dataProjectionOrientationField = None
         self._markerGroup = None
         self._markerNodeGroup = None
@@ -276,19 +784,63 @@ class Fitter:
         self._curvatureActiveMeshGroup = None
         self._strainPenaltyField = None
         self._curvaturePenaltyField = None
+        self._elementAdjacency = None
+        self._elementParameterIndexes = None
+        self._dataProjectionModelParameters = None
+        self._elementDisplacements = {}
+        if self._fieldmodulenotifier:
+            self._fieldmodulenotifier.clearCallback()
+            self._fieldmodulenotifier = None
+        self._groupGeometrySummaries = {}
+        self._groupGeometrySummaryModelParameters = None
+        self._groupGeometrySummaryModelChanged = True
+        self._elementGroupIndex = None
+        self._dataWeightsFingerprints = {}
+        self._dataWeightsNodesetGroup = None
+        self._deformationPenaltiesFingerprint = None
+        self._skippedAssignmentCounts = {"dataWeights": 0, "deformationPenalties": 0}
+
+    def cleanup(self):
+        """
+        Release model and data regions and checkpoints.
+        Call when finished with the fitter; load() must be called again before further use.
+        """
+        self._checkpoints.clear()
+        self._clearFields()
+        self._region = None
+        self._rawDataRegion = None
+        self._fieldmodule = None
 
     def load(self):
         """
         Read model and data and define fit fields and data.
         Can call again to reset fit, after parameters have changed.
         """
+        self._checkpoints.clear()
         self._clearFields()
         self._region = self._context.createRegion()
         self._region.setName("model_region")
         self._fieldmodule = self._region.getFieldmodule()
         self._rawDataRegion = self._region.createChild("raw_data")
-        self._loadModel()
-        self._loadData()
+        if self._timingEnabled:
+            self._timingPhases = self._timingReport["load"]
+        cacheFileName = self._getCacheFileName()
+        if not (cacheFileName and self._readCache(cacheFileName)):
+            startTime = self.startPhaseTiming()
+            self._loadModel()
+            self.endPhaseTiming("loadModel", startTime)
+            startTime = self.startPhaseTiming()
+            if self._dataArrays:
+                self._loadDataArrays()
+            else:
+                self._loadData()
+            self.endPhaseTiming("loadData", startTime)
+            if cacheFileName:
+                self._writeCache(cacheFileName)
+        self._fieldmodulenotifier = self._fieldmodule.createFieldmodulenotifier()
+        self._fieldmodulenotifier.setCallback(self._fieldmoduleChanged)
+        self._discoverModel()
+        self._discoverData()
         self._defineDataProjectionFields()
         # Get centre and scale of data coordinates to manage fitting tolerances and steps.
         datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
@@ -298,9 +850,202 @@ class Fitter:
         if self._diagnosticLevel > 0:
             print("Load data: data coordinates centre ", self._dataCentre)
             print("Load data: data coordinates scale ", self._dataScale)
+        self._decimateData()
         for step in self._fitterSteps:
             step.setHasRun(False)
-        self._fitterSteps[0].run()  # initial config step will calculate data projections
+        if self._dataProjectionsFileName and self.readDataProjections(self._dataProjectionsFileName):
+            # resume from projections in file instead of running initial config step to calculate them
+            self._fitterSteps[0].setHasRun(True)
+            self._storeCheckpoint(self._fitterSteps[0])
+        else:
+            self._runFitterStep(0)  # initial config step will calculate data projections
+
+    def getDataDecimationReport(self):
+        """
+        :return: dict group name -> (number of data points loaded, number kept) for groups decimated on last load,
+        as set by FitterStepConfig.setGroupDataDecimation on the initial config step.
+        """
+        return self._dataDecimationReport
+
+    def _decimateData(self):
+        """
+        Destroy data points not kept by decimation settings of groups in the initial config step.
+        A point in several groups is kept if any group keeps it. Marker points are always kept.
+        """
+        self._dataDecimationReport = {}
+        config = self.getInitialFitterStepConfig()
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        decimateGroups = []
+        keepGroups = []
+        for group in getGroupList(self._fieldmodule):
+            if not group.isManaged():
+                continue  # skip fitter-defined groups
+            nodesetGroup = group.getNodesetGroup(datapoints)
+            if not (nodesetGroup.isValid() and (nodesetGroup.getSize() > 0)):
+                continue
+            mode, spacing = config.getGroupDataDecimation(group.getName())[0]
+            if (mode == "none") or (group.getName() == self._markerGroupName):
+                keepGroups.append(group)
+            else:
+                if spacing < 0.0:
+                    spacing *= -self._dataScale
+                decimateGroups.append((group.getName(), nodesetGroup, mode, spacing))
+        if not decimateGroups:
+            return
+        with ChangeManager(self._fieldmodule):
+            keepGroup = self._fieldmodule.createFieldGroup()
+            keepNodesetGroup = keepGroup.createNodesetGroup(datapoints)
+            for group in keepGroups:
+                keepNodesetGroup.addNodesConditional(group)
+            fieldcache = self._fieldmodule.createFieldcache()
+            for groupName, nodesetGroup, mode, spacing in decimateGroups:
+                pointsCount = nodesetGroup.getSize()
+                keepNodes = _decimate_points(self._dataCoordinatesField, fieldcache, nodesetGroup, mode, spacing)
+                for node in keepNodes:
+                    keepNodesetGroup.addNode(node)
+                self._dataDecimationReport[groupName] = (pointsCount, len(keepNodes))
+                if self._diagnosticLevel > 0:
+                    print("Load data: Decimate group '" + groupName + "' mode", mode, "spacing", spacing,
+                          "kept", len(keepNodes), "of", pointsCount, "points")
+            # destroy points in decimated groups not kept
+            decimateGroup = self._fieldmodule.createFieldGroup()
+            decimateNodesetGroup = decimateGroup.createNodesetGroup(datapoints)
+            for groupName, nodesetGroup, mode, spacing in decimateGroups:
+                decimateNodesetGroup.addNodesConditional(self._fieldmodule.findFieldByName(groupName))
+            decimateNodesetGroup.removeNodesConditional(keepGroup)
+            datapoints.destroyNodesConditional(decimateGroup)
+            del decimateNodesetGroup
+            del decimateGroup
+            del keepNodesetGroup
+            del keepGroup
+
+    def isDataProjectionSpatialIndex(self):
+        """
+        :return: True if data projections use a spatial index to limit elements searched, otherwise False.
+        """
+        return self._dataProjectionSpatialIndex
+
+    def setDataProjectionSpatialIndex(self, dataProjectionSpatialIndex):
+        """
+        Set whether data projections limit the nearest location search for each data point to candidate
+        elements found from a grid of element bounding boxes, rebuilt from the current model coordinates
+        for each group on each projection pass. This is faster for projecting onto large meshes, but can
+        rarely give a different nearest element where curved elements exceed their padded sampled bounds.
+        :param dataProjectionSpatialIndex: True to use spatial index, False to search all elements (default).
+        """
+        self._dataProjectionSpatialIndex = dataProjectionSpatialIndex
+
+    def getGroupGeometrySummaryTolerance(self):
+        """
+        :return: Tolerance on model coordinates parameter changes below which cached group geometry summaries
+        are reused. See setGroupGeometrySummaryTolerance.
+        """
+        return self._groupGeometrySummaryTolerance
+
+    def setGroupGeometrySummaryTolerance(self, groupGeometrySummaryTolerance):
+        """
+        Set tolerance on the maximum change in any model coordinates parameter since group geometry summaries
+        were calculated, below which cached summaries are reused. Central projection and auto align use the
+        summaries. Note the mesh centre is then only approximate for the current model geometry.
+        :param groupGeometrySummaryTolerance: Absolute tolerance >= 0.0. Default 0.0 recalculates summaries
+        after any change to model coordinates.
+        """
+        assert groupGeometrySummaryTolerance >= 0.0, "Fitter: Group geometry summary tolerance must be non-negative"
+        self._groupGeometrySummaryTolerance = groupGeometrySummaryTolerance
+
+    def _fieldmoduleChanged(self, event):
+        """
+        Field module notifier callback invalidating cached group geometry summaries.
+        Notes model coordinates changes for comparing parameters on next use, clears all summaries if data
+        coordinates change, and clears summaries for any group whose membership changes.
+        :param event: Zinc Fieldmoduleevent.
+        """
+        changeFlags = Field.CHANGE_FLAG_RESULT | Field.CHANGE_FLAG_DEFINITION | Field.CHANGE_FLAG_REMOVE
+        if (event.getSummaryFieldChangeFlags() & changeFlags) == 0:
+            return
+        if self._modelCoordinatesField and (event.getFieldChangeFlags(self._modelCoordinatesField) & changeFlags):
+            self._groupGeometrySummaryModelChanged = True
+        if not self._groupGeometrySummaries:
+            return
+        if self._dataCoordinatesField and (event.getFieldChangeFlags(self._dataCoordinatesField) & changeFlags):
+            self._groupGeometrySummaries = {}
+            return
+        changedKeys = [key for key, (group, summary) in self._groupGeometrySummaries.items()
+                       if event.getFieldChangeFlags(group) & changeFlags]
+        for key in changedKeys:
+            del self._groupGeometrySummaries[key]
+
+    def _checkGroupGeometrySummaryModelParameters(self):
+        """
+        Clear cached group geometry summaries if any model coordinates parameter has changed by more than
+        the tolerance since they were calculated. Parameters are only compared after model coordinates
+        have changed.
+        """
+        lastParameters = self._groupGeometrySummaryModelParameters
+        if (not self._groupGeometrySummaryModelChanged) and (lastParameters is not None):
+            return
+        self._groupGeometrySummaryModelChanged = False
+        modelParameters = self._modelCoordinatesField.getFieldparameters()
+        # number of parameters must be queried before getting them
+        parametersCount = modelParameters.getNumberOfParameters()
+        result, parameters = modelParameters.getParameters(parametersCount)
+        assert result == RESULT_OK, "Group geometry summary: Failed to get model coordinates parameters"
+        if (lastParameters is not None) and (len(lastParameters) == parametersCount):
+            tolerance = self._groupGeometrySummaryTolerance
+            if all((abs(parameter - lastParameter) <= tolerance)
+                   for parameter, lastParameter in zip(parameters, lastParameters)):
+                return
+        self._groupGeometrySummaries = {}
+        self._groupGeometrySummaryModelParameters = parameters
+
+    def getGroupGeometrySummary(self, group: FieldGroup, numberOfPoints=3):
+        """
+        Get summary of the geometry of the group's data projection mesh group and data, for central projection
+        and auto align. Summaries are cached until model coordinates change by more than the group geometry
+        summary tolerance, or the membership of the group changes.
+        :param group: Zinc FieldGroup to summarise.
+        :param numberOfPoints: Number of Gauss points in each element direction for integrating over mesh.
+        :return: dict with "meshCentre" (centroid of mesh group), "meshSize" (length/area of mesh group),
+        "dataMinimums" and "dataMaximums" (data coordinates range), or None if group has no data or mesh to
+        project onto, or the summary could not be evaluated.
+        """
+        dataGroup = self.getGroupDataProjectionNodesetGroup(group)
+        if not dataGroup:
+            return None
+        meshGroup = self.getGroupDataProjectionMeshGroup(group)
+        if not meshGroup:
+            return None
+        self._checkGroupGeometrySummaryModelParameters()
+        key = (group.getName(), numberOfPoints)
+        cached = self._groupGeometrySummaries.get(key)
+        if cached and (cached[0] == group):
+            return cached[1]
+        summary = None
+        minDataCoordinates, maxDataCoordinates = evaluate_field_nodeset_range(self._dataCoordinatesField, dataGroup)
+        if (minDataCoordinates is not None) and (maxDataCoordinates is not None):
+            with ChangeManager(self._fieldmodule):
+                meshGroupCoordinatesIntegral = self._fieldmodule.createFieldMeshIntegral(
+                    self._modelCoordinatesField, self._modelCoordinatesField, meshGroup)
+                meshGroupCoordinatesIntegral.setNumbersOfPoints([numberOfPoints])
+                meshGroupSize = self._fieldmodule.createFieldMeshIntegral(
+                    self._fieldmodule.createFieldConstant([1.0]), self._modelCoordinatesField, meshGroup)
+                meshGroupSize.setNumbersOfPoints([numberOfPoints])
+                fieldcache = self._fieldmodule.createFieldcache()
+                result1, coordinatesIntegral = meshGroupCoordinatesIntegral.evaluateReal(
+                    fieldcache, self._modelCoordinatesField.getNumberOfComponents())
+                result2, size = meshGroupSize.evaluateReal(fieldcache, 1)
+                del fieldcache
+                del meshGroupCoordinatesIntegral
+                del meshGroupSize
+            if (result1 == RESULT_OK) and (result2 == RESULT_OK) and (size > 0.0):
+                summary = {
+                    "meshCentre": [s / size for s in coordinatesIntegral],
+                    "meshSize": size,
+                    "dataMinimums": minDataCoordinates,
+                    "dataMaximums": maxDataCoordinates
+                }
+        self._groupGeometrySummaries[key] = (group, summary)
+        return summary
 
     def getDataCentre(self):
         """
@@ -342,7 +1087,8 @@ class Fitter:
             self._deformActiveGroupField, self._strainActiveGroupField, self._curvatureActiveGroupField = \
                 activeGroupFields
             self._deformActiveMeshGroup, self._strainActiveMeshGroup, self._curvatureActiveMeshGroup = activeMeshGroups
-            # define storage for penalty fields on all elements of mesh
+            # define storage for penalty fields on all elements of mesh. Values are not initialised here as
+            # the first assignDeformationPenalties assigns every element
             elementtemplate = mesh.createElementtemplate()
             constantBasis = self._fieldmodule.createElementbasis(meshDimension, Elementbasis.FUNCTION_TYPE_CONSTANT)
             eft = mesh.createElementfieldtemplate(constantBasis)
@@ -350,25 +1096,228 @@ class Fitter:
             elementtemplate.defineField(self._strainPenaltyField, -1, eft)
             elementtemplate.defineField(self._curvaturePenaltyField, -1, eft)
             elemIter = mesh.createElementiterator()
-            fieldcache = self._fieldmodule.createFieldcache()
             element = elemIter.next()
-            zeroValues = [0.0] * 27
             while element.isValid():
                 element.merge(elementtemplate)
-                fieldcache.setElement(element)
-                self._strainPenaltyField.assignReal(fieldcache, zeroValues)
-                self._curvaturePenaltyField.assignReal(fieldcache, zeroValues)
                 element = elemIter.next()
+        # penalties must be assigned to all elements on next assignment
+        self._deformationPenaltiesFingerprint = None
 
     def getStrainPenaltyField(self):
+        """
+        :return: Per-element strain penalty field. Values are undefined until assigned by
+        assignDeformationPenalties.
+        """
         return self._strainPenaltyField
 
     def getCurvaturePenaltyField(self):
+        """
+        :return: Per-element curvature penalty field. Values are undefined until assigned by
+        assignDeformationPenalties.
+        """
         return self._curvaturePenaltyField
 
+    def getCacheDirectory(self):
+        """
+        :return: Directory in which loaded model and data region state is cached, or None if not caching.
+        """
+        return self._cacheDirectory
+
+    def setCacheDirectory(self, cacheDirectory):
+        """
+        Set directory in which to cache the model region state with data transferred into it, so subsequent
+        loads of the same model and data files read a single file without repeating the data transfer.
+        Cache files are named by a hash of the model and data file contents and Zinc version.
+        Note that the raw_data child region is empty when loaded from the cache.
+        Data supplied by setDataArrays is not cached.
+        Call before load().
+        :param cacheDirectory: Name of existing directory to cache in, or None to not cache.
+        """
+        assert (cacheDirectory is None) or os.path.isdir(cacheDirectory), \
+            "Fitter.setCacheDirectory: Directory " + str(cacheDirectory) + " does not exist"
+        self._cacheDirectory = cacheDirectory
+
+    def _getCacheFileName(self):
+        """
+        :return: Path of cache file for current model and data file contents, or None if not caching.
+        """
+        if not (self._cacheDirectory and self._zincDataFileName) or self._dataArrays:
+            return None
+        hasher = hashlib.sha256()
+        # increment cache format version if transferred state written to cache changes
+        hasher.update(bytes("scaffoldfitter cache 1\nzinc " + str(self._zincVersion) + "\n", "utf-8"))
+        for fileName in (self._zincModelFileName, self._zincDataFileName):
+            with open(fileName, "rb") as f:
+                fileHasher = hashlib.sha256()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    fileHasher.update(chunk)
+            hasher.update(fileHasher.digest())
+        return os.path.join(self._cacheDirectory, hasher.hexdigest() + ".exf")
+
+    def _readCache(self, cacheFileName):
+        """
+        Read model and transferred data into self._region from cache file, if it exists.
+        :param cacheFileName: Path of cache file.
+        :return: True if read from cache, False if not found or failed to read.
+        """
+        if not os.path.isfile(cacheFileName):
+            if self._diagnosticLevel > 0:
+                print("Load: Cache miss", cacheFileName)
+            return False
+        result = self._region.readFile(cacheFileName)
+        if result != RESULT_OK:
+            print("Error: Load: Failed to read cache file " + cacheFileName + ". Loading from model and data files.")
+            self._region = self._context.createRegion()
+            self._region.setName("model_region")
+            self._fieldmodule = self._region.getFieldmodule()
+            self._rawDataRegion = self._region.createChild("raw_data")
+            return False
+        if self._diagnosticLevel > 0:
+            print("Load: Read cache file", cacheFileName)
+        return True
+
+    def _writeCache(self, cacheFileName):
+        """
+        Write model and transferred data in self._region to cache file, excluding raw_data region.
+        Must be called before fitter fields and groups are defined.
+        Writes to a temporary file then renames so concurrent loads never read a partial file.
+        :param cacheFileName: Path of cache file.
+        """
+        self._region.removeChild(self._rawDataRegion)
+        try:
+            fileDescriptor, tmpFileName = tempfile.mkstemp(suffix=".exf", dir=os.path.dirname(cacheFileName))
+            os.close(fileDescriptor)
+            result = self._region.writeFile(tmpFileName)
+            if result == RESULT_OK:
+                os.replace(tmpFileName, cacheFileName)
+                if self._diagnosticLevel > 0:
+                    print("Load: Wrote cache file", cacheFileName)
+            else:
+                os.remove(tmpFileName)
+                print("Error: Load: Failed to write cache file " + cacheFileName)
+        except OSError as e:
+            print("Error: Load: Failed to write cache file " + cacheFileName + ": " + str(e))
+        finally:
+            self._region.appendChild(self._rawDataRegion)
+
+    def isDirectDataTransfer(self):
+        """
+        :return: True if data is transferred directly into model region, False if via text buffers.
+        """
+        return self._directDataTransfer
+
+    def setDirectDataTransfer(self, directDataTransfer):
+        """
+        Set whether to transfer data nodes and datapoints into the model region by directly copying field
+        values and group membership, or by serialising to text buffers and reading them back.
+        Direct transfer is only worthwhile where memory is limited: it avoids holding the text of all data in
+        memory, reducing peak memory use by about 10%, but values are copied point by point through the Python
+        bindings so load is 10-40% slower, e.g. 41.6 s vs 29.2 s and 351 MB vs 393 MB for 1e6 data points.
+        It supports real finite element fields with a single value per component and stored string fields
+        only, with an error raised for other fields. Call before load().
+        :param directDataTransfer: True to transfer directly, False to transfer via text buffers (default).
+        """
+        self._directDataTransfer = directDataTransfer
+
+    def _transferDataDirect(self, sourceNodeset):
+        """
+        Copy nodes or datapoints from the raw data region to datapoints in self._region with the same
+        identifiers, copying values of real finite element and stored string fields and group membership.
+        Assumes all source nodes with the same fields defined have the same parameter structure.
+        :param sourceNodeset: Nodes or datapoints nodeset in self._rawDataRegion.
+        """
+        sourceFieldmodule = sourceNodeset.getFieldmodule()
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        # get source fields and matching fields in self._region, creating if needed
+        sourceFields = []
+        targetFields = []
+        isReals = []
+        fielditerator = sourceFieldmodule.createFielditerator()
+        sourceField = fielditerator.next()
+        while sourceField.isValid():
+            isReal = sourceField.castFiniteElement().isValid() and (sourceField.getValueType() == Field.VALUE_TYPE_REAL)
+            if isReal or sourceField.castStoredString().isValid():
+                name = sourceField.getName()
+                componentsCount = sourceField.getNumberOfComponents()
+                targetField = self._fieldmodule.findFieldByName(name)
+                if targetField.isValid():
+                    assert (targetField.castFiniteElement().isValid() if isReal else
+                            targetField.castStoredString().isValid()) and \
+                        (targetField.getNumberOfComponents() == componentsCount), \
+                        "Failed to transfer data field '" + name + "' as model has incompatible field of that name"
+                elif isReal:
+                    targetField = self._fieldmodule.createFieldFiniteElement(componentsCount)
+                    targetField.setName(name)
+                    targetField.setCoordinateSystemType(sourceField.getCoordinateSystemType())
+                    targetField.setTypeCoordinate(sourceField.isTypeCoordinate())
+                    for c in range(1, componentsCount + 1):
+                        targetField.setComponentName(c, sourceField.getComponentName(c))
+                else:
+                    targetField = self._fieldmodule.createFieldStoredString()
+                    targetField.setName(name)
+                targetField.setManaged(True)
+                sourceFields.append(sourceField)
+                targetFields.append(targetField)
+                isReals.append(isReal)
+            sourceField = fielditerator.next()
+        sourceFieldcache = sourceFieldmodule.createFieldcache()
+        targetFieldcache = self._fieldmodule.createFieldcache()
+        sourceNodetemplate = sourceNodeset.createNodetemplate()
+        derivativeValueLabels = [Node.VALUE_LABEL_D_DS1, Node.VALUE_LABEL_D_DS2, Node.VALUE_LABEL_D_DS3]
+        # map from tuple of whether each field is defined to target nodetemplate
+        nodetemplates = {}
+        nodeiterator = sourceNodeset.createNodeiterator()
+        node = nodeiterator.next()
+        while node.isValid():
+            sourceFieldcache.setNode(node)
+            definedFields = tuple(sourceField.isDefinedAtLocation(sourceFieldcache) for sourceField in sourceFields)
+            nodetemplate = nodetemplates.get(definedFields)
+            if not nodetemplate:
+                nodetemplate = datapoints.createNodetemplate()
+                for sourceField, targetField, isReal, defined in \
+                        zip(sourceFields, targetFields, isReals, definedFields):
+                    if defined:
+                        if isReal:
+                            sourceNodetemplate.defineFieldFromNode(sourceField, node)
+                            assert (sourceNodetemplate.getValueNumberOfVersions(sourceField, -1, Node.VALUE_LABEL_VALUE)
+                                    == 1) and not any(sourceNodetemplate.getValueNumberOfVersions(
+                                        sourceField, -1, valueLabel) for valueLabel in derivativeValueLabels) and \
+                                (not sourceNodetemplate.getTimesequence(sourceField).isValid()), \
+                                "Direct data transfer does not support field '" + sourceField.getName() + \
+                                "' with multiple versions, derivatives or time. Use transfer via text buffers."
+                        nodetemplate.defineField(targetField)
+                nodetemplates[definedFields] = nodetemplate
+            datapoint = datapoints.createNode(node.getIdentifier(), nodetemplate)
+            assert datapoint.isValid(), "Failed to create datapoint " + str(node.getIdentifier())
+            targetFieldcache.setNode(datapoint)
+            for sourceField, targetField, isReal, defined in zip(sourceFields, targetFields, isReals, definedFields):
+                if defined:
+                    if isReal:
+                        result, values = sourceField.evaluateReal(sourceFieldcache, sourceField.getNumberOfComponents())
+                        targetField.assignReal(targetFieldcache, values)
+                    else:
+                        targetField.assignString(targetFieldcache, sourceField.evaluateString(sourceFieldcache))
+            node = nodeiterator.next()
+        # transfer group membership by identifier ranges
+        for sourceGroup in getGroupList(sourceFieldmodule):
+            sourceNodesetGroup = sourceGroup.getNodesetGroup(sourceNodeset)
+            if not (sourceNodesetGroup.isValid() and (sourceNodesetGroup.getSize() > 0)):
+                continue
+            targetGroup = findOrCreateFieldGroup(self._fieldmodule, sourceGroup.getName())
+            nodeset_group_add_identifier_ranges(targetGroup.getOrCreateNodesetGroup(datapoints),
+                                                nodeset_group_to_identifier_ranges(sourceNodesetGroup))
+
     def _loadModel(self):
+        """
+        Read zinc model file into self._region.
+        """
         result = self._region.readFile(self._zincModelFileName)
         assert result == RESULT_OK, "Failed to load model file" + str(self._zincModelFileName)
+
+    def _discoverModel(self):
+        """
+        Discover model meshes, fields and groups, and define common mesh fields.
+        """
         self._mesh = [self._fieldmodule.findMeshByDimension(d + 1) for d in range(3)]
         self._discoverModelCoordinatesField()
         self._discoverModelFitGroup()
@@ -408,6 +1357,7 @@ class Fitter:
                 self._activeDataGroupField = self._fieldmodule.createFieldGroup()
                 self._activeDataGroupField.setName(activeDataName)
             self._activeDataNodesetGroup = self._activeDataGroupField.getOrCreateNodesetGroup(datapoints)
+            self._dataWeightsFingerprints = {}
             self._activeDataProjectionGroupFields = []
             self._activeDataProjectionMeshGroups = []
             for d in range(2):
@@ -421,6 +1371,136 @@ class Fitter:
                 self._activeDataProjectionGroupFields.append(activeDataProjectionGroupField)
                 self._activeDataProjectionMeshGroups.append(activeDataProjectionGroupField.getOrCreateMeshGroup(mesh))
 
+    def _matchModelGroupName(self, dataGroupName, modelGroupNames):
+        """
+        Get name of model group matching data group name exactly or differing by case and whitespace only.
+        Writes diagnostics about the match.
+        :param dataGroupName: Name of data group.
+        :param modelGroupNames: List of model group names.
+        :return: Matching model group name or None if not found.
+        """
+        writeDiagnostics = self.getDiagnosticLevel() > 0
+        compareName = dataGroupName.strip().casefold()
+        for modelGroupName in modelGroupNames:
+            if modelGroupName == dataGroupName:
+                if writeDiagnostics:
+                    print("Load data: Data group '" + dataGroupName + "' found in model")
+                return modelGroupName
+            elif modelGroupName.strip().casefold() == compareName:
+                if writeDiagnostics:
+                    print("Load data: Data group '" + dataGroupName + "' found in model as '" +
+                          modelGroupName + "'. Renaming to match.")
+                return modelGroupName
+        if writeDiagnostics:
+            print("Load data: Data group '" + dataGroupName + "' not found in model")
+        return None
+
+    def getDataArrays(self):
+        """
+        :return: Dict of arrays supplying data set by setDataArrays, or None if reading data file.
+        """
+        return self._dataArrays
+
+    def setDataArrays(self, coordinates, groupLabels=None, groupNames=None, markerCoordinates=None,
+                      markerNames=None):
+        """
+        Supply data to fit to as arrays instead of reading the zinc data file, on subsequent load().
+        Builds datapoints in the model region with field "data_coordinates", groups by name and a "marker"
+        group of marker datapoints with string field "marker_name". Data group names are matched to model
+        group names as for data files. Arrays are read one row at a time, so may be memory-mapped.
+        :param coordinates: Sequence of N data point coordinates, each with 3 components e.g. list of [x, y, z]
+        or N x 3 numpy array.
+        :param groupLabels: Optional sequence of N group labels, one per data point. Label None or not in
+        groupNames puts the point in no group.
+        :param groupNames: Optional sequence or dict mapping group label to group name. If None, the group
+        name is the label as a string.
+        :param markerCoordinates: Optional sequence of M marker point coordinates, each with 3 components.
+        :param markerNames: Sequence of M marker names, required with markerCoordinates.
+        """
+        assert (groupLabels is None) or (len(groupLabels) == len(coordinates)), \
+            "Fitter.setDataArrays: Number of group labels must equal number of coordinates"
+        assert (markerCoordinates is None) == (markerNames is None), \
+            "Fitter.setDataArrays: Must supply both or neither of marker coordinates and names"
+        assert (markerCoordinates is None) or (len(markerNames) == len(markerCoordinates)), \
+            "Fitter.setDataArrays: Number of marker names must equal number of marker coordinates"
+        self._dataArrays = {
+            "coordinates": coordinates,
+            "groupLabels": groupLabels,
+            "groupNames": groupNames,
+            "markerCoordinates": markerCoordinates,
+            "markerNames": markerNames
+        }
+
+    def _loadDataArrays(self):
+        """
+        Create datapoints, data coordinates field, groups and marker group in self._region from arrays
+        supplied by setDataArrays.
+        """
+        coordinates = self._dataArrays["coordinates"]
+        groupLabels = self._dataArrays["groupLabels"]
+        groupNames = self._dataArrays["groupNames"]
+        markerCoordinates = self._dataArrays["markerCoordinates"]
+        markerNames = self._dataArrays["markerNames"]
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        with ChangeManager(self._fieldmodule):
+            dataCoordinates = findOrCreateFieldCoordinates(self._fieldmodule, "data_coordinates")
+            assert dataCoordinates.getNumberOfComponents() == 3, \
+                "Failed to load data arrays as model has incompatible field data_coordinates"
+            nodetemplate = datapoints.createNodetemplate()
+            nodetemplate.defineField(dataCoordinates)
+            fieldcache = self._fieldmodule.createFieldcache()
+            # map group name -> list of datapoint identifiers
+            groupIdentifiers = {}
+            labelGroupNames = {}
+            identifier = 1
+            for index, x in enumerate(coordinates):
+                datapoint = datapoints.createNode(identifier, nodetemplate)
+                fieldcache.setNode(datapoint)
+                result = dataCoordinates.assignReal(fieldcache, [float(value) for value in x])
+                assert result == RESULT_OK, "Failed to load data arrays: coordinates " + str(index) + \
+                    " must have 3 components"
+                if groupLabels is not None:
+                    label = groupLabels[index]
+                    groupName = labelGroupNames.get(label)
+                    if groupName is None:
+                        if label is None:
+                            groupName = ""
+                        elif groupNames is None:
+                            groupName = str(label)
+                        elif isinstance(groupNames, dict):
+                            groupName = str(groupNames.get(label, ""))
+                        else:
+                            groupName = str(groupNames[label]) if (0 <= label < len(groupNames)) else ""
+                        labelGroupNames[label] = groupName
+                    if groupName:
+                        groupIdentifiers.setdefault(groupName, []).append(identifier)
+                identifier += 1
+            if markerCoordinates is not None:
+                markerName = findOrCreateFieldStoredString(self._fieldmodule, "marker_name")
+                markerIdentifiers = []
+                nodetemplate.defineField(markerName)
+                for index, x in enumerate(markerCoordinates):
+                    datapoint = datapoints.createNode(identifier, nodetemplate)
+                    fieldcache.setNode(datapoint)
+                    result = dataCoordinates.assignReal(fieldcache, [float(value) for value in x])
+                    assert result == RESULT_OK, "Failed to load data arrays: marker coordinates " + str(index) + \
+                        " must have 3 components"
+                    markerName.assignString(fieldcache, str(markerNames[index]))
+                    markerIdentifiers.append(identifier)
+                    identifier += 1
+                groupIdentifiers[self._markerGroupName if self._markerGroupName else "marker"] = markerIdentifiers
+            modelGroupNames = [group.getName() for group in getGroupList(self._fieldmodule)]
+            for dataGroupName, identifiers in groupIdentifiers.items():
+                modelGroupName = self._matchModelGroupName(dataGroupName, modelGroupNames)
+                group = findOrCreateFieldGroup(self._fieldmodule, modelGroupName if modelGroupName else dataGroupName)
+                identifierRanges = []
+                for identifier in identifiers:
+                    if identifierRanges and (identifierRanges[-1][1] == (identifier - 1)):
+                        identifierRanges[-1][1] = identifier
+                    else:
+                        identifierRanges.append([identifier, identifier])
+                nodeset_group_add_identifier_ranges(group.getOrCreateNodesetGroup(datapoints), identifierRanges)
+
     def _loadData(self):
         """
         Load zinc data file into self._rawDataRegion.
@@ -434,95 +1514,451 @@ class Fitter:
             # rename data groups to match model
             # future: match with annotation terms
             modelGroupNames = [group.getName() for group in getGroupList(self._fieldmodule)]
-            writeDiagnostics = self.getDiagnosticLevel() > 0
             for dataGroup in getGroupList(fieldmodule):
                 dataGroupName = dataGroup.getName()
-                compareName = dataGroupName.strip().casefold()
-                for modelGroupName in modelGroupNames:
-                    if modelGroupName == dataGroupName:
-                        if writeDiagnostics:
-                            print("Load data: Data group '" + dataGroupName + "' found in model")
-                        break
-                    elif modelGroupName.strip().casefold() == compareName:
-                        result = dataGroup.setName(modelGroupName)
-                        if result == RESULT_OK:
-                            if writeDiagnostics:
-                                print("Load data: Data group '" + dataGroupName + "' found in model as '" +
-                                      modelGroupName + "'. Renaming to match.")
-                        else:
-                            print("Error: Load data: Data group '" + dataGroupName + "' found in model as '" +
-                                  modelGroupName + "'. Renaming to match FAILED.")
-                            if fieldmodule.findFieldByName(modelGroupName).isValid():
-                                print("    Reason: field of that name already exists.")
-                        break
-                else:
-                    if writeDiagnostics:
-                        print("Load data: Data group '" + dataGroupName + "' not found in model")
+                modelGroupName = self._matchModelGroupName(dataGroupName, modelGroupNames)
+                if modelGroupName and (modelGroupName != dataGroupName):
+                    result = dataGroup.setName(modelGroupName)
+                    if result != RESULT_OK:
+                        print("Error: Load data: Data group '" + dataGroupName + "' found in model as '" +
+                              modelGroupName + "'. Renaming to match FAILED.")
+                        if fieldmodule.findFieldByName(modelGroupName).isValid():
+                            print("    Reason: field of that name already exists.")
             # if there are both nodes and datapoints, offset datapoint identifiers to ensure different
             nodes = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
             if nodes.getSize() > 0:
                 datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
                 if datapoints.getSize() > 0:
-                    datapoint_iterator = datapoints.createNodeiterator()
-                    datapoint = datapoint_iterator.next()
-                    latest = 1
-                    datapoint_new_identifier_map = {}
-                    while datapoint.isValid():
-                        identifier = _next_available_identifier(nodes, latest)
-                        datapoint_new_identifier_map[identifier] = datapoint
-                        latest = identifier + 1
-                        datapoint = datapoint_iterator.next()
-
-                    for new_identifier, datapoint in datapoint_new_identifier_map.items():
-                        datapoint.setIdentifier(new_identifier)
+                    # give datapoints the lowest identifiers not used by nodes, in order
+                    datapointNodes, datapointIdentifiers = _get_nodes_and_identifiers(datapoints)
+                    nodeIdentifierRanges = domain_iterator_to_identifier_ranges(nodes.createNodeiterator())
+                    newDatapointIdentifiers = _get_free_identifiers(nodeIdentifierRanges, len(datapointIdentifiers))
+                    _set_node_identifiers(datapointNodes, datapointIdentifiers, newDatapointIdentifiers)
 
                 # transfer nodes as datapoints to self._region
-                buffer = write_to_buffer(self._rawDataRegion, resource_domain_type=Field.DOMAIN_TYPE_NODES)
-                assert buffer is not None, "Failed to write nodes"
-                buffer = buffer.replace(bytes("!#nodeset nodes", "utf-8"), bytes("!#nodeset datapoints", "utf-8"))
-                result = read_from_buffer(self._region, buffer)
-                if result != RESULT_OK:
-                    print("Node to datapoints log:")
-                    self.print_log()
-                    raise AssertionError("Failed to load nodes as datapoints")
+                if self._directDataTransfer:
+                    with ChangeManager(self._fieldmodule):
+                        self._transferDataDirect(nodes)
+                else:
+                    buffer = write_to_buffer(self._rawDataRegion, resource_domain_type=Field.DOMAIN_TYPE_NODES)
+                    assert buffer is not None, "Failed to write nodes"
+                    buffer = buffer.replace(bytes("!#nodeset nodes", "utf-8"), bytes("!#nodeset datapoints", "utf-8"))
+                    result = read_from_buffer(self._region, buffer)
+                    if result != RESULT_OK:
+                        print("Node to datapoints log:")
+                        self.print_log()
+                        raise AssertionError("Failed to load nodes as datapoints")
         # transfer datapoints to self._region
-        buffer = write_to_buffer(self._rawDataRegion, resource_domain_type=Field.DOMAIN_TYPE_DATAPOINTS)
-        assert buffer is not None, "Failed to write datapoints"
-        result = read_from_buffer(self._region, buffer)
-        if result != RESULT_OK:
-            self.print_log()
-            raise AssertionError("Failed to load datapoints, result " + str(result))
+        if self._directDataTransfer:
+            with ChangeManager(self._fieldmodule):
+                self._transferDataDirect(fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS))
+        else:
+            buffer = write_to_buffer(self._rawDataRegion, resource_domain_type=Field.DOMAIN_TYPE_DATAPOINTS)
+            assert buffer is not None, "Failed to write datapoints"
+            result = read_from_buffer(self._region, buffer)
+            if result != RESULT_OK:
+                self.print_log()
+                raise AssertionError("Failed to load datapoints, result " + str(result))
+
+    def _discoverData(self):
+        """
+        Discover data coordinates field and marker group.
+        """
         self._discoverDataCoordinatesField()
         self._discoverMarkerGroup()
 
     def run(self, endStep=None, modelFileNameStem=None, reorder=False):
         """
         Run either all remaining fitter steps or up to specified end step.
+        If a later step has run, restores the latest valid checkpoint at or before
+        the end step and runs the steps after it, or reloads if there is none.
         :param endStep: Last fitter step to run, or None to run all.
         :param modelFileNameStem: File name stem for writing intermediate model files.
         :param reorder: Reload if reordering.
-        :return: True if reloaded (so scene changed), False if not.
+        :return: True if reloaded or restored (so scene changed), False if not.
         """
         if not endStep:
             endStep = self._fitterSteps[-1]
-        endIndex = self._fitterSteps.index(endStep)
+        endIndex = self.getFitterStepIndex(endStep)
         # reload only if necessary
         if (endStep.hasRun() and (endIndex < (len(self._fitterSteps) - 1)) and self._fitterSteps[endIndex + 1].hasRun()
                 or reorder):
-            # re-load to get back to current state
-            self.load()
-            for index in range(1, endIndex + 1):
-                self._fitterSteps[index].run(modelFileNameStem + str(index) if modelFileNameStem else None)
+            # restore checkpoint or re-load to get back to current state
+            startIndex = self._restoreCheckpoint(endIndex)
+            if startIndex is None:
+                self.load()
+                startIndex = 0
+            for index in range(startIndex + 1, endIndex + 1):
+                self._runFitterStep(index, modelFileNameStem)
             return True
         if endIndex == 0:
-            endStep.run()  # force re-run initial config
+            self._runFitterStep(0)  # force re-run initial config
         else:
             # run from current point up to step
             for index in range(1, endIndex + 1):
                 if not self._fitterSteps[index].hasRun():
-                    self._fitterSteps[index].run(modelFileNameStem + str(index) if modelFileNameStem else None)
+                    self._runFitterStep(index, modelFileNameStem)
         return False
 
+    def _runFitterStep(self, index, modelFileNameStem=None):
+        """
+        Run fitter step at index and store a checkpoint of the resulting state.
+        :param index: Index of fitter step to run.
+        :param modelFileNameStem: File name stem for writing intermediate model files.
+        """
+        fitterStep = self._fitterSteps[index]
+        if self._timingEnabled:
+            self._timingPhases = {}
+            self._timingReport["steps"].append(
+                {"index": index, "type": fitterStep.getJsonTypeId(), "phases": self._timingPhases})
+        startTime = self.startPhaseTiming()
+        if index == 0:
+            fitterStep.run()
+        else:
+            fitterStep.run(modelFileNameStem + str(index) if modelFileNameStem else None)
+        self.endPhaseTiming("run", startTime)
+        self._storeCheckpoint(fitterStep)
+        if self._timingEnabled:
+            self._timingPhases = self._timingReport["other"]
+
+    def getCheckpointMemoryLimit(self):
+        """
+        :return: Approximate limit on memory in bytes used for checkpoints of the fit state after each step.
+        """
+        return self._checkpointMemoryLimit
+
+    def setCheckpointMemoryLimit(self, checkpointMemoryLimit):
+        """
+        Set approximate limit on memory used by in-memory checkpoints of the fit state after each step,
+        which allow running back to an earlier step without reloading and re-running all steps before it.
+        Least recently used checkpoints are discarded to keep within the limit.
+        :param checkpointMemoryLimit: Limit in bytes >= 0. Value 0 disables checkpoints.
+        """
+        assert checkpointMemoryLimit >= 0
+        self._checkpointMemoryLimit = checkpointMemoryLimit
+        self._trimCheckpoints()
+
+    def clearCheckpoints(self):
+        """
+        Discard all checkpoints of the fit state.
+        """
+        self._checkpoints.clear()
+
+    def hasCheckpoint(self, fitterStep: FitterStep):
+        """
+        :return: True if there is a checkpoint of the fit state after fitterStep which can be restored.
+        """
+        checkpoint = self._checkpoints.get(fitterStep)
+        return (checkpoint is not None) and \
+            (checkpoint["fingerprint"] == self._getCheckpointFingerprint(self.getFitterStepIndex(fitterStep)))
+
+    def _getCheckpointFingerprint(self, endIndex):
+        """
+        :param endIndex: Index of last fitter step run.
+        :return: String encoding all settings affecting the fit state after running steps up to endIndex.
+        """
+        dct = self._encodeSettingsDict(endIndex)
+        dct.pop("diagnosticLevel")
+        return json.dumps(dct, sort_keys=True)
+
+    def _trimCheckpoints(self):
+        """
+        Discard least recently used checkpoints until within memory limit.
+        """
+        totalSize = sum(checkpoint["size"] for checkpoint in self._checkpoints.values())
+        while self._checkpoints and (totalSize > self._checkpointMemoryLimit):
+            totalSize -= self._checkpoints.popitem(last=False)[1]["size"]
+
+    def _storeCheckpoint(self, fitterStep: FitterStep):
+        """
+        Store snapshot of model coordinates, reference coordinates, data host locations and orientations
+        and active groups after fitterStep has run, if within memory limit.
+        :param fitterStep: The FitterStep which has just been run.
+        """
+        self._checkpoints.pop(fitterStep, None)
+        if not (self._checkpointMemoryLimit and self._modelCoordinatesField and self._activeDataNodesetGroup):
+            return
+        coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+        orientationCount = coordinatesCount * coordinatesCount
+        meshDimension = self.getHighestDimensionMesh().getDimension()
+        modelParameters = self._modelCoordinatesField.getFieldparameters()
+        referenceParameters = self._modelReferenceCoordinatesField.getFieldparameters()
+        parametersCount = modelParameters.getNumberOfParameters()
+        activeDataSize = self._activeDataNodesetGroup.getSize()
+        # estimate size before storing: parameters, data locations and orientations, group members
+        size = 8 * (2 * parametersCount + activeDataSize * (2 + meshDimension + orientationCount) +
+                    activeDataSize + sum(nodesetGroup.getSize() for nodesetGroup in self._dataProjectionNodesetGroups) +
+                    sum(meshGroup.getSize() for meshGroup in self._activeDataProjectionMeshGroups))
+        if size > self._checkpointMemoryLimit:
+            if self._diagnosticLevel > 0:
+                print("Checkpoint: size", size, "exceeds memory limit; not stored")
+            return
+        checkpoint = {
+            "fingerprint": self._getCheckpointFingerprint(self.getFitterStepIndex(fitterStep)),
+            "size": size,
+            "dataProjectionGroupNames": self._dataProjectionGroupNames[:]
+        }
+        result, values = modelParameters.getParameters(parametersCount)
+        assert result == RESULT_OK, "Checkpoint: Failed to get model coordinates parameters"
+        checkpoint["modelCoordinates"] = array.array("d", values)
+        result, values = referenceParameters.getParameters(referenceParameters.getNumberOfParameters())
+        assert result == RESULT_OK, "Checkpoint: Failed to get model reference coordinates parameters"
+        checkpoint["modelReferenceCoordinates"] = array.array("d", values)
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        with ChangeManager(self._fieldmodule):
+            # copy groups to unmanaged groups which are restored with conditional add
+            nodesetGroupCopies = []
+            for nodesetGroup, groupField in ([(self._activeDataNodesetGroup, self._activeDataGroupField)] +
+                                             list(zip(self._dataProjectionNodesetGroups,
+                                                      self._dataProjectionNodeGroupFields))):
+                groupCopy = self._fieldmodule.createFieldGroup()
+                groupCopy.createNodesetGroup(datapoints).addNodesConditional(groupField)
+                nodesetGroupCopies.append((nodesetGroup, groupCopy))
+            meshGroupCopies = []
+            for meshGroup, groupField in zip(self._activeDataProjectionMeshGroups,
+                                             self._activeDataProjectionGroupFields):
+                groupCopy = self._fieldmodule.createFieldGroup()
+                groupCopy.createMeshGroup(meshGroup.getMasterMesh()).addElementsConditional(groupField)
+                meshGroupCopies.append((meshGroup, groupCopy))
+            checkpoint["nodesetGroups"] = nodesetGroupCopies
+            checkpoint["meshGroups"] = meshGroupCopies
+        checkpoint["dataIdentifiers"], checkpoint["dataElementIdentifiers"], checkpoint["dataValues"] = \
+            self._getActiveDataProjectionArrays()
+        self._checkpoints[fitterStep] = checkpoint
+        self._trimCheckpoints()
+
+    def _restoreCheckpoint(self, endIndex):
+        """
+        Restore fit state from latest valid checkpoint for steps up to endIndex.
+        Steps up to the restored step are marked as run, and later steps as not run.
+        :param endIndex: Index of last fitter step to consider.
+        :return: Index of fitter step restored, or None if no valid checkpoint.
+        """
+        for index in range(endIndex, -1, -1):
+            fitterStep = self._fitterSteps[index]
+            checkpoint = self._checkpoints.get(fitterStep)
+            if checkpoint and (checkpoint["fingerprint"] == self._getCheckpointFingerprint(index)):
+                break
+        else:
+            return None
+        self._checkpoints.move_to_end(fitterStep)
+        with ChangeManager(self._fieldmodule):
+            for field, key in ((self._modelCoordinatesField, "modelCoordinates"),
+                               (self._modelReferenceCoordinatesField, "modelReferenceCoordinates")):
+                fieldparameters = field.getFieldparameters()
+                # number of parameters must be queried before setting them
+                assert fieldparameters.getNumberOfParameters() == len(checkpoint[key]), \
+                    "Checkpoint: Number of " + field.getName() + " parameters has changed"
+                result = fieldparameters.setParameters(checkpoint[key].tolist())
+                assert result == RESULT_OK, "Checkpoint: Failed to restore " + field.getName() + " parameters"
+            for nodesetGroup, groupCopy in checkpoint["nodesetGroups"]:
+                nodesetGroup.removeAllNodes()
+                nodesetGroup.addNodesConditional(groupCopy)
+            for meshGroup, groupCopy in checkpoint["meshGroups"]:
+                meshGroup.removeAllElements()
+                meshGroup.addElementsConditional(groupCopy)
+            self._dataProjectionGroupNames = checkpoint["dataProjectionGroupNames"][:]
+            self._setDataProjectionArrays(
+                checkpoint["dataIdentifiers"], checkpoint["dataElementIdentifiers"], checkpoint["dataValues"])
+        self._dataProjectionModelParameters = None  # so all data are reprojected next time
+        for stepIndex, step in enumerate(self._fitterSteps):
+            step.setHasRun(stepIndex <= index)
+        if self._diagnosticLevel > 0:
+            print("Checkpoint: Restored state after step", index)
+        return index
+
+    def _getActiveDataProjectionArrays(self):
+        """
+        Get host locations and projection orientations of active data points which have them.
+        :return: array of data point identifiers, array of host element identifiers, array of host xi followed
+        by orientation values for each data point.
+        """
+        coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+        orientationCount = coordinatesCount * coordinatesCount
+        meshDimension = self.getHighestDimensionMesh().getDimension()
+        identifiers = array.array("q")
+        elementIdentifiers = array.array("q")
+        values = array.array("d")
+        fieldcache = self._fieldmodule.createFieldcache()
+        nodeIter = self._activeDataNodesetGroup.createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            fieldcache.setNode(node)
+            element, xi = self._dataHostLocationField.evaluateMeshLocation(fieldcache, meshDimension)
+            result, orientation = self._dataProjectionOrientationField.evaluateReal(fieldcache, orientationCount)
+            if element.isValid() and (result == RESULT_OK):
+                identifiers.append(node.getIdentifier())
+                elementIdentifiers.append(element.getIdentifier())
+                values.extend(xi if (meshDimension > 1) else [xi])
+                values.extend(orientation if (orientationCount > 1) else [orientation])
+            node = nodeIter.next()
+        return identifiers, elementIdentifiers, values
+
+    def _setDataProjectionArrays(self, identifiers, elementIdentifiers, values):
+        """
+        Assign host locations and projection orientations of data points.
+        Assumes called while ChangeManager is active for fieldmodule.
+        :param identifiers: Data point identifiers, as returned by _getActiveDataProjectionArrays.
+        :param elementIdentifiers: Host element identifiers, as returned by _getActiveDataProjectionArrays.
+        :param values: Host xi and orientation values, as returned by _getActiveDataProjectionArrays.
+        """
+        coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+        orientationCount = coordinatesCount * coordinatesCount
+        mesh = self.getHighestDimensionMesh()
+        meshDimension = mesh.getDimension()
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        fieldcache = self._fieldmodule.createFieldcache()
+        stride = meshDimension + orientationCount
+        for i, (identifier, elementIdentifier) in enumerate(zip(identifiers, elementIdentifiers)):
+            fieldcache.setNode(datapoints.findNodeByIdentifier(identifier))
+            start = i * stride
+            self._dataHostLocationField.assignMeshLocation(
+                fieldcache, mesh.findElementByIdentifier(elementIdentifier),
+                values[start:start + meshDimension].tolist())
+            self._dataProjectionOrientationField.assignReal(
+                fieldcache, values[start + meshDimension:start + stride].tolist())
+        del fieldcache
+
+    def _getDataProjectionsFingerprint(self):
+        """
+        :return: Hex digest of the model mesh sizes, current model coordinates parameters, identifiers and
+        coordinates of data points, and fitter and initial config step settings including central projection,
+        projection subgroups, outlier thresholds and face projection, which data projections are calculated from.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(bytes("scaffoldfitter data projections 1\n" + json.dumps(
+            [self._getCheckpointFingerprint(0), [mesh.getSize() for mesh in self._mesh]]), "utf-8"))
+        modelParameters = self._modelCoordinatesField.getFieldparameters()
+        # number of parameters must be queried before getting them
+        result, parameters = modelParameters.getParameters(modelParameters.getNumberOfParameters())
+        assert result == RESULT_OK, "Data projections: Failed to get model coordinates parameters"
+        hasher.update(_array_to_little_endian_bytes(array.array("d", parameters)))
+        identifiers = array.array("q")
+        coordinates = array.array("d")
+        datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        fieldcache = self._fieldmodule.createFieldcache()
+        nodeIter = datapoints.createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            fieldcache.setNode(node)
+            result, x = self._dataCoordinatesField.evaluateReal(fieldcache, 3)
+            if result == RESULT_OK:
+                identifiers.append(node.getIdentifier())
+                coordinates.extend(x)
+            node = nodeIter.next()
+        del fieldcache
+        hasher.update(_array_to_little_endian_bytes(identifiers))
+        hasher.update(_array_to_little_endian_bytes(coordinates))
+        return hasher.hexdigest()
+
+    def writeDataProjections(self, fileName):
+        """
+        Write current data projections to a compact binary file: the host element identifier, xi and projection
+        orientation of each active data point, the members of the active data and data projection groups, and
+        a fingerprint of the model coordinates, data and initial config settings they were calculated for.
+        Read with readDataProjections, or on load with setDataProjectionsFileName, to resume from this
+        projection state without recalculating it.
+        :param fileName: Path of file to write.
+        """
+        identifiers, elementIdentifiers, values = self._getActiveDataProjectionArrays()
+        coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+        header = {
+            "fingerprint": self._getDataProjectionsFingerprint(),
+            "meshDimension": self.getHighestDimensionMesh().getDimension(),
+            "orientationCount": coordinatesCount * coordinatesCount,
+            "dataCount": len(identifiers),
+            "dataProjectionGroupNames": self._dataProjectionGroupNames,
+            "activeDataIdentifierRanges": nodeset_group_to_identifier_ranges(self._activeDataNodesetGroup),
+            "dataProjectionIdentifierRanges": [
+                nodeset_group_to_identifier_ranges(nodesetGroup) for nodesetGroup in self._dataProjectionNodesetGroups],
+            "dataProjectionElementIdentifierRanges": [
+                mesh_group_to_identifier_ranges(meshGroup) for meshGroup in self._activeDataProjectionMeshGroups]
+        }
+        headerBytes = bytes(json.dumps(header), "utf-8")
+        with open(fileName, "wb") as f:
+            f.write(bytes("scaffoldfitter data projections 1\n", "utf-8"))
+            f.write(len(headerBytes).to_bytes(8, "little"))
+            f.write(headerBytes)
+            for valuesArray in (identifiers, elementIdentifiers, values):
+                f.write(_array_to_little_endian_bytes(valuesArray))
+        if self._diagnosticLevel > 0:
+            print("Data projections: Wrote", len(identifiers), "projections to", fileName)
+
+    def readDataProjections(self, fileName):
+        """
+        Read data projections written by writeDataProjections, replacing the current data projections.
+        Only reads if the file's fingerprint matches the current model mesh, model coordinates, data and fitter
+        and initial config step settings.
+        Data points in the file's active data and data projection groups are restored, however projections
+        are not recalculated, so current projection settings are only applied from the next projection.
+        :param fileName: Path of file to read.
+        :return: True if read, False if file is missing, invalid or for a different model or data state.
+        """
+        try:
+            with open(fileName, "rb") as f:
+                if f.readline() != bytes("scaffoldfitter data projections 1\n", "utf-8"):
+                    print("Error: Data projections: " + fileName + " is not a data projections file")
+                    return False
+                header = json.loads(f.read(int.from_bytes(f.read(8), "little")).decode("utf-8"))
+                coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+                if (header["fingerprint"] != self._getDataProjectionsFingerprint()) or \
+                        (header["meshDimension"] != self.getHighestDimensionMesh().getDimension()) or \
+                        (header["orientationCount"] != coordinatesCount * coordinatesCount):
+                    if self._diagnosticLevel > 0:
+                        print("Data projections: " + fileName +
+                              " is for a different model, data or settings. Not read.")
+                    return False
+                dataCount = header["dataCount"]
+                identifiers = _array_from_little_endian_bytes("q", f.read(8 * dataCount))
+                elementIdentifiers = _array_from_little_endian_bytes("q", f.read(8 * dataCount))
+                values = _array_from_little_endian_bytes(
+                    "d", f.read(8 * dataCount * (header["meshDimension"] + header["orientationCount"])))
+        except (OSError, ValueError, KeyError) as e:
+            print("Error: Data projections: Failed to read " + fileName + ": " + str(e))
+            return False
+        if (len(identifiers) != dataCount) or (len(elementIdentifiers) != dataCount) or \
+                (len(values) != dataCount * (header["meshDimension"] + header["orientationCount"])):
+            print("Error: Data projections: " + fileName + " is truncated")
+            return False
+        with ChangeManager(self._fieldmodule):
+            for groupName in header["dataProjectionGroupNames"]:
+                group = self._fieldmodule.findFieldByName(groupName).castGroup()
+                meshGroup = self.getGroupDataProjectionMeshGroup(group) if group.isValid() else None
+                if meshGroup:
+                    self._defineDataProjectionFieldsOnGroup(group, meshGroup.getDimension())
+            self._dataProjectionGroupNames = header["dataProjectionGroupNames"]
+            self._activeDataNodesetGroup.removeAllNodes()
+            nodeset_group_add_identifier_ranges(self._activeDataNodesetGroup, header["activeDataIdentifierRanges"])
+            for d in range(2):
+                self._dataProjectionNodesetGroups[d].removeAllNodes()
+                nodeset_group_add_identifier_ranges(
+                    self._dataProjectionNodesetGroups[d], header["dataProjectionIdentifierRanges"][d])
+                self._activeDataProjectionMeshGroups[d].removeAllElements()
+                mesh_group_add_identifier_ranges(
+                    self._activeDataProjectionMeshGroups[d], header["dataProjectionElementIdentifierRanges"][d])
+            self._setDataProjectionArrays(identifiers, elementIdentifiers, values)
+        self._dataProjectionModelParameters = None  # so all data are reprojected next time
+        if self._diagnosticLevel > 0:
+            print("Data projections: Read", dataCount, "projections from", fileName)
+        return True
+
+    def getDataProjectionsFileName(self):
+        """
+        :return: Path of data projections file read on load, or None if projections are calculated.
+        """
+        return self._dataProjectionsFileName
+
+    def setDataProjectionsFileName(self, dataProjectionsFileName):
+        """
+        Set file written by writeDataProjections to read data projections from on load, instead of calculating
+        them by running the initial config step. Falls back to calculating them if the file cannot be read or
+        its fingerprint does not match the loaded model, data and initial config settings, e.g. if the model has
+        been fitted or projection settings changed since.
+        Call before load().
+        :param dataProjectionsFileName: Path of data projections file, or None to always calculate projections.
+        """
+        self._dataProjectionsFileName = dataProjectionsFileName
+
     def getDataCoordinatesField(self):
         return self._dataCoordinatesField
 
@@ -533,6 +1969,7 @@ class Fitter:
         assert finiteElementField.isValid() and (finiteElementField.getNumberOfComponents() == 3)
         self._dataCoordinatesFieldName = dataCoordinatesField.getName()
         self._dataCoordinatesField = finiteElementField
+        self._groupGeometrySummaries = {}
         self._defineCommonDataFields()
         self._calculateMarkerDataLocations()  # needed to assign to self._dataCoordinatesField
 
@@ -627,14 +2064,71 @@ class Fitter:
             self._markerDataGroup = None
         self._calculateMarkerDataLocations()
 
+    def getSkippedAssignmentCounts(self):
+        """
+        Get diagnostic counts of assignments skipped since load because the resolved settings and group
+        membership matched those last assigned: data weights are counted per data group and markers, deformation
+        penalties per call.
+        :return: dict {"dataWeights": count, "deformationPenalties": count}
+        """
+        return dict(self._skippedAssignmentCounts)
+
+    def _isDataWeightsUnassigned(self):
+        """
+        :return: True if any active data or marker points were not in the active data or marker groups when data
+        weights were last assigned.
+        """
+        if not self._dataWeightsNodesetGroup:
+            return True
+        with ChangeManager(self._fieldmodule):
+            dataField = self._activeDataGroupField
+            if self._markerDataLocationGroupField:
+                dataField = self._fieldmodule.createFieldOr(dataField, self._markerDataLocationGroupField)
+            unassignedNodesetGroup = self._fieldmodule.createFieldGroup().createNodesetGroup(
+                self._activeDataNodesetGroup.getMasterNodeset())
+            unassignedNodesetGroup.addNodesConditional(self._fieldmodule.createFieldAnd(
+                dataField, self._fieldmodule.createFieldNot(self._dataWeightsNodesetGroup.getFieldGroup())))
+            unassignedCount = unassignedNodesetGroup.getSize()
+            del unassignedNodesetGroup
+            del dataField
+        return unassignedCount > 0
+
+    def _isNodesetGroupOverlapping(self, nodesetGroup, otherNodesetGroup):
+        """
+        :param nodesetGroup: Zinc NodesetGroup.
+        :param otherNodesetGroup: Zinc NodesetGroup in the same nodeset.
+        :return: True if any node is in both nodeset groups, otherwise False.
+        """
+        if (nodesetGroup.getSize() == 0) or (otherNodesetGroup.getSize() == 0):
+            return False
+        with ChangeManager(self._fieldmodule):
+            overlapNodesetGroup = self._fieldmodule.createFieldGroup().createNodesetGroup(
+                nodesetGroup.getMasterNodeset())
+            overlapNodesetGroup.addNodesConditional(self._fieldmodule.createFieldAnd(
+                nodesetGroup.getFieldGroup(), otherNodesetGroup.getFieldGroup()))
+            overlapCount = overlapNodesetGroup.getSize()
+            del overlapNodesetGroup
+        return overlapCount > 0
+
     def assignDataWeights(self, fitterStepFit: FitterStepFit):
         """
         Assign values of the weight field for all data and marker points.
+        Assignment is skipped for groups and markers whose resolved weight, sliding factor and projected data
+        membership are unchanged since last assigned, provided all active data points were assigned then, and
+        no points in them were assigned from an earlier group in this call. Groups with data stretch and sliding
+        factor other than 1.0 are always assigned as their weights depend on current projections.
         """
+        startTime = self.startPhaseTiming()
         # Future: divide by linear data scale?
         # Future: divide by number of data points?
         coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
+        lastFingerprints = {} if self._isDataWeightsUnassigned() else self._dataWeightsFingerprints
+        self._dataWeightsFingerprints = {}
         with ChangeManager(self._fieldmodule):
+            fieldassignment = None
+            # points assigned in this call: overlapping groups assigned later must also be assigned
+            assignedNodesetGroup = self._fieldmodule.createFieldGroup().createNodesetGroup(
+                self._activeDataNodesetGroup.getMasterNodeset())
             for groupName in self._dataProjectionGroupNames:
                 group = self._fieldmodule.findFieldByName(groupName).castGroup()
                 if not group.isValid():
@@ -648,6 +2142,18 @@ class Fitter:
                     continue
                 dataWeight = fitterStepFit.getGroupDataWeight(groupName)[0]
                 dataSlidingFactor = fitterStepFit.getGroupDataSlidingFactor(groupName)[0]
+                dataStretch = fitterStepFit.getGroupDataStretch(groupName)[0]
+                if not (dataStretch and (dataSlidingFactor != 1.0)):
+                    fingerprint = (coordinatesCount, meshDimension, _get_nodeset_group_fingerprint(dataGroup),
+                                   dataWeight, dataSlidingFactor)
+                    self._dataWeightsFingerprints[groupName] = fingerprint
+                    if (lastFingerprints.get(groupName) == fingerprint) and \
+                            not self._isNodesetGroupOverlapping(dataGroup, assignedNodesetGroup):
+                        self._skippedAssignmentCounts["dataWeights"] += 1
+                        if self._diagnosticLevel > 0:
+                            print("group", groupName, "data weight", dataWeight, "sliding factor", dataSlidingFactor,
+                                  "unchanged: skipping assignment")
+                        continue
                 slidingWeight = dataWeight * dataSlidingFactor
                 if meshDimension == 1:
                     if coordinatesCount == 3:
@@ -663,7 +2169,6 @@ class Fitter:
                         orientedDataWeight = [slidingWeight, slidingWeight]  # not expected
                 stretchOrientedDataWeight = [dataWeight] + orientedDataWeight[1:]
                 weightField = self._fieldmodule.createFieldConstant(orientedDataWeight)
-                dataStretch = fitterStepFit.getGroupDataStretch(groupName)[0]
                 if dataStretch:
                     tangent1 = self._fieldmodule.createFieldComponent(
                         self._dataProjectionOrientationField,
@@ -685,17 +2190,90 @@ class Fitter:
                 if result != RESULT_OK:
                     print("Incomplete assignment of data weight for group", groupName, "Result", result)
                 del weightField
+                assignedNodesetGroup.addNodesConditional(group)
             if self._markerDataLocationGroup:
                 markerWeight = fitterStepFit.getGroupDataWeight(self._markerGroupName)[0]
-                orientedDataWeight = [markerWeight] * coordinatesCount
-                # print("marker weight", markerWeight)
-                fieldassignment = self._dataWeightField.createFieldassignment(
-                    self._fieldmodule.createFieldConstant(orientedDataWeight))
-                fieldassignment.setNodeset(self._markerDataLocationGroup)
-                result = fieldassignment.assign()
-                if result != RESULT_OK:
-                    print('Incomplete assignment of marker data weight', result)
+                fingerprint = (coordinatesCount, _get_nodeset_group_fingerprint(self._markerDataLocationGroup),
+                               markerWeight)
+                self._dataWeightsFingerprints[None] = fingerprint
+                if (lastFingerprints.get(None) == fingerprint) and \
+                        not self._isNodesetGroupOverlapping(self._markerDataLocationGroup, assignedNodesetGroup):
+                    self._skippedAssignmentCounts["dataWeights"] += 1
+                else:
+                    orientedDataWeight = [markerWeight] * coordinatesCount
+                    # print("marker weight", markerWeight)
+                    fieldassignment = self._dataWeightField.createFieldassignment(
+                        self._fieldmodule.createFieldConstant(orientedDataWeight))
+                    fieldassignment.setNodeset(self._markerDataLocationGroup)
+                    result = fieldassignment.assign()
+                    if result != RESULT_OK:
+                        print('Incomplete assignment of marker data weight', result)
             del fieldassignment
+            del assignedNodesetGroup
+            # record points assigned, to detect points needing assignment later
+            if not self._dataWeightsNodesetGroup:
+                self._dataWeightsNodesetGroup = self._fieldmodule.createFieldGroup().createNodesetGroup(
+                    self._activeDataNodesetGroup.getMasterNodeset())
+            self._dataWeightsNodesetGroup.removeAllNodes()
+            self._dataWeightsNodesetGroup.addNodesConditional(self._activeDataGroupField)
+            if self._markerDataLocationGroupField:
+                self._dataWeightsNodesetGroup.addNodesConditional(self._markerDataLocationGroupField)
+        self.endPhaseTiming("assignDataWeights", startTime)
+
+    def _getElementGroupIndex(self):
+        """
+        Get index of elements of highest dimension mesh by the set of groups containing them, so penalties can be
+        resolved once per distinct set of groups instead of testing every element against every group.
+        Built once and reused until the names or highest dimension mesh group sizes of groups change.
+        Groups used internally by the fitter and the index are excluded.
+        :return: List of (group name, meshGroup) for groups with elements of highest dimension in getGroupList
+        order, list of (tuple of indexes of groups containing elements, MeshGroup of those elements).
+        """
+        mesh = self.getHighestDimensionMesh()
+        excludeGroupNames = set(self._elementGroupIndex[2]) if self._elementGroupIndex else set()
+        for field in ([self._activeDataGroupField, self._deformActiveGroupField, self._strainActiveGroupField,
+                       self._curvatureActiveGroupField, self._markerDataLocationGroupField] +
+                      self._dataProjectionNodeGroupFields):
+            if field:
+                excludeGroupNames.add(field.getName())
+        groupMeshGroups = []
+        for group in getGroupList(self._fieldmodule):
+            if group.getName() in excludeGroupNames:
+                continue
+            meshGroup = group.getMeshGroup(mesh)
+            if meshGroup.isValid() and (meshGroup.getSize() > 0):
+                groupMeshGroups.append((group.getName(), meshGroup))
+        key = (mesh.getDimension(), mesh.getSize(),
+               tuple((groupName, meshGroup.getSize()) for groupName, meshGroup in groupMeshGroups))
+        if self._elementGroupIndex and (self._elementGroupIndex[0] == key):
+            return groupMeshGroups, self._elementGroupIndex[1]
+        elementGroupIndexes = {}  # map element identifier -> list of indexes of groups containing it
+        for groupIndex, (groupName, meshGroup) in enumerate(groupMeshGroups):
+            elementIter = meshGroup.createElementiterator()
+            element = elementIter.next()
+            while element.isValid():
+                elementGroupIndexes.setdefault(element.getIdentifier(), []).append(groupIndex)
+                element = elementIter.next()
+        membershipMeshGroups = {}  # map tuple of group indexes -> MeshGroup
+        with ChangeManager(self._fieldmodule):
+            elementIter = mesh.createElementiterator()
+            element = elementIter.next()
+            while element.isValid():
+                membership = tuple(elementGroupIndexes.get(element.getIdentifier(), ()))
+                membershipMeshGroup = membershipMeshGroups.get(membership)
+                if not membershipMeshGroup:
+                    membershipMeshGroup = self._fieldmodule.createFieldGroup().createMeshGroup(mesh)
+                    membershipMeshGroups[membership] = membershipMeshGroup
+                membershipMeshGroup.addElement(element)
+                element = elementIter.next()
+        index = list(membershipMeshGroups.items())
+        if self._diagnosticLevel > 0:
+            print("Element group index: " + str(len(index)) + " distinct sets of groups containing " +
+                  str(mesh.getSize()) + " elements")
+        indexGroupNames = [membershipMeshGroup.getFieldGroup().getName()
+                           for membershipMeshGroup in membershipMeshGroups.values()]
+        self._elementGroupIndex = (key, index, indexGroupNames)
+        return groupMeshGroups, index
 
     def assignDeformationPenalties(self, fitterStepFit: FitterStepFit):
         """
@@ -703,9 +2281,12 @@ class Fitter:
         groups of elements for which they are non-zero.
         If element is in multiple groups with values set, value for first group found is used.
         Currently applied only to elements of highest dimension.
+        Skipped if penalties resolved for each set of groups and group membership are unchanged since last
+        assigned. Otherwise every element is assigned, including zero penalties where not set.
         :return: deformActiveMeshGroup, strainActiveMeshGroup, curvatureActiveMeshGroup
         Zinc MeshGroups over which to apply penalties: combined, strain and curvature.
         """
+        startTime = self.startPhaseTiming()
         # Future: divide by linear data scale?
         # Future: divide by number of data points?
         # Get list of mesh groups of highest dimension with strain, curvature penalties
@@ -714,63 +2295,66 @@ class Fitter:
         coordinatesCount = self._modelCoordinatesField.getNumberOfComponents()
         strainComponents = meshDimension * meshDimension
         curvatureComponents = coordinatesCount * meshDimension * meshDimension
+        groupMeshGroups, elementGroupIndex = self._getElementGroupIndex()
         groups = []
-        # add None for default group
-        for group in (getGroupList(self._fieldmodule) + [None]):
-            if group:
-                meshGroup = group.getMeshGroup(mesh)
-                if (not meshGroup.isValid()) or (meshGroup.getSize() == 0):
-                    continue
-                groupName = group.getName()
-            else:
-                meshGroup = None
-                groupName = None
+        # add None for default group, last
+        for groupName in ([groupName for groupName, meshGroup in groupMeshGroups] + [None]):
             groupStrainPenalty, setLocally, inheritable = \
                 fitterStepFit.getGroupStrainPenalty(groupName, strainComponents)
-            groupStrainPenaltyNonZero = any((s > 0.0) for s in groupStrainPenalty)
             groupStrainSet = setLocally or ((setLocally is False) and inheritable)
             groupCurvaturePenalty, setLocally, inheritable = \
                 fitterStepFit.getGroupCurvaturePenalty(groupName, curvatureComponents)
-            groupCurvaturePenaltyNonZero = any((s > 0.0) for s in groupCurvaturePenalty)
             groupCurvatureSet = setLocally or ((setLocally is False) and inheritable)
-            groups.append((group, groupName, meshGroup, groupStrainPenalty, groupStrainPenaltyNonZero, groupStrainSet,
-                           groupCurvaturePenalty, groupCurvaturePenaltyNonZero, groupCurvatureSet))
+            groups.append((groupStrainPenalty, groupStrainSet or (groupName is None),
+                           groupCurvaturePenalty, groupCurvatureSet or (groupName is None)))
+        # resolve penalties for each distinct set of groups, and gather mesh groups with the same penalties
+        penaltyMeshGroups = {}  # map (strainPenalty, curvaturePenalty) -> list of MeshGroup
+        resolvedPenalties = []
+        for membership, membershipMeshGroup in elementGroupIndex:
+            groupIndexes = membership + (len(groups) - 1,)
+            strainPenalty = next(groups[i][0] for i in groupIndexes if groups[i][1])
+            curvaturePenalty = next(groups[i][2] for i in groupIndexes if groups[i][3])
+            penaltyMeshGroups.setdefault((tuple(strainPenalty), tuple(curvaturePenalty)), []).append(
+                membershipMeshGroup)
+            resolvedPenalties.append((membership, tuple(strainPenalty), tuple(curvaturePenalty)))
+        fingerprint = (self._elementGroupIndex[0], tuple(resolvedPenalties))
+        if fingerprint == self._deformationPenaltiesFingerprint:
+            self._skippedAssignmentCounts["deformationPenalties"] += 1
+            if self._diagnosticLevel > 0:
+                print("Deformation penalties unchanged: skipping assignment")
+            self.endPhaseTiming("assignDeformationPenalties", startTime)
+            return self._deformActiveMeshGroup, self._strainActiveMeshGroup, self._curvatureActiveMeshGroup
         with ChangeManager(self._fieldmodule):
             self._deformActiveMeshGroup.removeAllElements()
             self._strainActiveMeshGroup.removeAllElements()
             self._curvatureActiveMeshGroup.removeAllElements()
-            elementIter = mesh.createElementiterator()
-            element = elementIter.next()
             fieldcache = self._fieldmodule.createFieldcache()
-            while element.isValid():
-                fieldcache.setElement(element)
-                strainPenalty = None
-                strainPenaltyNonZero = False
-                curvaturePenalty = None
-                curvaturePenaltyNonZero = False
-                for (group, groupName, meshGroup, groupStrainPenalty, groupStrainPenaltyNonZero, groupStrainSet,
-                     groupCurvaturePenalty, groupCurvaturePenaltyNonZero, groupCurvatureSet) in groups:
-                    if (not group) or meshGroup.containsElement(element):
-                        if (not strainPenalty) and (groupStrainSet or (not group)):
-                            strainPenalty = groupStrainPenalty
-                            strainPenaltyNonZero = groupStrainPenaltyNonZero
-                        if (not curvaturePenalty) and (groupCurvatureSet or (not group)):
-                            curvaturePenalty = groupCurvaturePenalty
-                            curvaturePenaltyNonZero = groupCurvaturePenaltyNonZero
-                # always assign strain, curvature penalties to clear to zero where not used
-                self._strainPenaltyField.assignReal(fieldcache, strainPenalty)
-                self._curvaturePenaltyField.assignReal(fieldcache, curvaturePenalty)
-                if strainPenaltyNonZero:
-                    self._strainActiveMeshGroup.addElement(element)
-                    if self._diagnosticLevel > 1:
-                        print("Element", element.getIdentifier(), "apply strain penalty", strainPenalty)
-                if curvaturePenaltyNonZero:
-                    self._curvatureActiveMeshGroup.addElement(element)
-                    if self._diagnosticLevel > 1:
-                        print("Element", element.getIdentifier(), "apply curvature penalty", curvaturePenalty)
-                if strainPenaltyNonZero or curvaturePenaltyNonZero:
-                    self._deformActiveMeshGroup.addElement(element)
-                element = elementIter.next()
+            for (strainPenalty, curvaturePenalty), meshGroups in penaltyMeshGroups.items():
+                strainPenaltyNonZero = any((s > 0.0) for s in strainPenalty)
+                curvaturePenaltyNonZero = any((s > 0.0) for s in curvaturePenalty)
+                strainPenalty = list(strainPenalty)
+                curvaturePenalty = list(curvaturePenalty)
+                for meshGroup in meshGroups:
+                    # always assign strain, curvature penalties to clear to zero where not used
+                    elementIter = meshGroup.createElementiterator()
+                    element = elementIter.next()
+                    while element.isValid():
+                        fieldcache.setElement(element)
+                        self._strainPenaltyField.assignReal(fieldcache, strainPenalty)
+                        self._curvaturePenaltyField.assignReal(fieldcache, curvaturePenalty)
+                        element = elementIter.next()
+                    groupField = meshGroup.getFieldGroup()
+                    if strainPenaltyNonZero:
+                        self._strainActiveMeshGroup.addElementsConditional(groupField)
+                    if curvaturePenaltyNonZero:
+                        self._curvatureActiveMeshGroup.addElementsConditional(groupField)
+                    if strainPenaltyNonZero or curvaturePenaltyNonZero:
+                        self._deformActiveMeshGroup.addElementsConditional(groupField)
+                if self._diagnosticLevel > 1:
+                    print("Elements", sum(meshGroup.getSize() for meshGroup in meshGroups),
+                          "apply strain penalty", strainPenalty, "curvature penalty", curvaturePenalty)
+        self._deformationPenaltiesFingerprint = fingerprint
+        self.endPhaseTiming("assignDeformationPenalties", startTime)
         return self._deformActiveMeshGroup, self._strainActiveMeshGroup, self._curvatureActiveMeshGroup
 
     def setMarkerGroupByName(self, markerGroupName):
@@ -804,6 +2388,60 @@ class Fitter:
     def getActiveDataNodesetGroup(self):
         return self._activeDataNodesetGroup
 
+    def assignActiveDataSample(self, nodesetGroup, proportion):
+        """
+        Fill nodesetGroup with a sample of the active data, stratified by host element so the sample is spread
+        over the model like the data: in identifier order, proportion of the data points projected onto each
+        host element are taken. All active marker points are included.
+        :param nodesetGroup: Datapoints NodesetGroup to fill. Any existing members are removed.
+        :param proportion: Proportion of active data to sample, 0.0 < proportion <= 1.0.
+        """
+        assert 0.0 < proportion <= 1.0, "Fitter: Data sample proportion must be > 0.0 and <= 1.0"
+        with ChangeManager(self._fieldmodule):
+            nodesetGroup.removeAllNodes()
+            if proportion == 1.0:
+                nodesetGroup.addNodesConditional(self._activeDataGroupField)
+                return
+            if self._markerDataLocationGroupField:
+                nodesetGroup.addNodesConditional(self._markerDataLocationGroupField)
+            meshDimension = self.getHighestDimensionMesh().getDimension()
+            proportionCounters = {}  # map host element identifier -> proportion counter
+            fieldcache = self._fieldmodule.createFieldcache()
+            for dataProjectionNodesetGroup in self._dataProjectionNodesetGroups:
+                nodeIter = dataProjectionNodesetGroup.createNodeiterator()
+                node = nodeIter.next()
+                while node.isValid():
+                    fieldcache.setNode(node)
+                    element, xi = self._dataHostLocationField.evaluateMeshLocation(fieldcache, meshDimension)
+                    if element.isValid():
+                        elementIdentifier = element.getIdentifier()
+                        proportionCounter = proportionCounters.get(elementIdentifier, 0.5) + proportion
+                        if proportionCounter >= 1.0:
+                            proportionCounter -= 1.0
+                            nodesetGroup.addNode(node)
+                        proportionCounters[elementIdentifier] = proportionCounter
+                    node = nodeIter.next()
+            del fieldcache
+
+    def getModelNodeCoordinates(self):
+        """
+        Get model coordinates at nodes, e.g. to measure node displacements between fit iterations.
+        :return: dict node identifier -> list of model coordinates, for nodes where they are defined.
+        """
+        nodeCoordinates = {}
+        componentsCount = self._modelCoordinatesField.getNumberOfComponents()
+        nodes = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_NODES)
+        fieldcache = self._fieldmodule.createFieldcache()
+        nodeIter = nodes.createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            fieldcache.setNode(node)
+            result, x = self._modelCoordinatesField.evaluateReal(fieldcache, componentsCount)
+            if result == RESULT_OK:
+                nodeCoordinates[node.getIdentifier()] = x if (componentsCount > 1) else [x]
+            node = nodeIter.next()
+        return nodeCoordinates
+
     def getDataRMSAndMaximumProjectionError(self, nodesetGroup=None):
         """
         Get RMS and maximum error for all active data and marker point projections.
@@ -921,6 +2559,7 @@ class Fitter:
         """
         self._markerDataLocationGroupField = None
         self._markerDataLocationGroup = None
+        self._dataWeightsFingerprints = {}
         if not (self._markerDataGroup and self._markerDataNameField and self._markerNodeGroup and
                 self._markerLocationField and self._markerNameField):
             return
@@ -1057,6 +2696,12 @@ class Fitter:
         orphanFieldByName(self._fieldmodule, modelReferenceCoordinatesFieldName)
         self._modelReferenceCoordinatesField = \
             createFieldFiniteElementClone(self._modelCoordinatesField, modelReferenceCoordinatesFieldName)
+        self._elementAdjacency = None
+        self._elementParameterIndexes = None
+        self._dataProjectionModelParameters = None
+        self._groupGeometrySummaries = {}
+        self._groupGeometrySummaryModelParameters = None
+        self._groupGeometrySummaryModelChanged = True
         self._defineCommonDataFields()
         self._updateMarkerCoordinatesField()
 
@@ -1220,9 +2865,16 @@ class Fitter:
                 self._dataProjectionNodeGroupFields.append(group)
                 self._dataProjectionNodesetGroups.append(group.createNodesetGroup(datapoints))
             self._defineDataProjectionOrientationField()
+            # locations on lower dimension line/face meshes data were projected onto, for evaluating orientation
+            self._dataProjectionLocationFields = []
+            for d in range(self.getHighestDimensionMesh().getDimension() - 1):
+                mesh = self._mesh[d]
+                self._dataProjectionLocationFields.append(findOrCreateFieldStoredMeshLocation(
+                    self._fieldmodule, mesh, "data_projection_location_" + mesh.getName(), managed=False))
 
     def calculateGroupDataProjections(self, fieldcache, group, dataGroup, meshGroup, meshLocation,
-                                      activeFitterStepConfig: FitterStepConfig):
+                                      activeFitterStepConfig: FitterStepConfig, incremental=False,
+                                      keepLocationNodesetGroup=None, projectNodesetGroup=None):
         """
         Project data points for group. Assumes called while ChangeManager is active for fieldmodule.
         :param fieldcache: Fieldcache for zinc field evaluations in region.
@@ -1231,6 +2883,13 @@ class Fitter:
         :param meshGroup: MeshGroup containing surfaces/lines to project onto.
         :param meshLocation: FieldStoredMeshLocation to store found location in on highest dimension mesh.
         :param activeFitterStepConfig: Where to get current projection modes from.
+        :param incremental: If True, search for each data point's new location near its current location
+        first; see FitterStepFit.setIncrementalProjection. Ignored if activeFitterStepConfig has an
+        approximate projection resolution.
+        :param keepLocationNodesetGroup: Optional NodesetGroup containing data points which keep their current
+        location; see FitterStepFit.setReprojectionTolerance.
+        :param projectNodesetGroup: Optional NodesetGroup limiting data points to search for locations of, other
+        than those keeping their current location.
         """
         groupName = group.getName()
         meshDimension = meshGroup.getDimension()
@@ -1239,45 +2898,28 @@ class Fitter:
         dataCoordinates = self._dataCoordinatesField
         dataProportion = activeFitterStepConfig.getGroupDataProportion(groupName)[0]
         outlierLength = activeFitterStepConfig.getGroupOutlierLength(groupName)[0]
-        maximumProjectionLength = 0.0
-        dataProjectionLengths = []  # For relative outliers: list of (data identifier, projection length)
+        outlierThresholdMode, outlierThresholdValue = activeFitterStepConfig.getGroupOutlierThreshold(groupName)[0]
+        projectedNodes = []
+        projectionLengths = array.array("d")  # projection lengths of projectedNodes, for outlier thresholds
         centralProjection = activeFitterStepConfig.getGroupCentralProjection(groupName)[0]
         if centralProjection:
-            # use centre of bounding box as middle of data; previous use of mean was affected by uneven density
-            minDataCoordinates, maxDataCoordinates = evaluate_field_nodeset_range(dataCoordinates, dataGroup)
-            if (minDataCoordinates is None) or (maxDataCoordinates is None):
-                print("Error: Central projection failed to get mean coordinates of data for group " + groupName)
+            summary = self.getGroupGeometrySummary(group)
+            if not summary:
+                print("Error: Central projection failed to get centres of data and mesh for group " + groupName)
                 return
-            dataCentre = mult(add(minDataCoordinates, maxDataCoordinates), 0.5)
-            # print("Centre Groups dataCentre", dataCentre)
-            # get geometric centre of meshGroup
-            meshGroupCoordinatesIntegral = self._fieldmodule.createFieldMeshIntegral(
-                self._modelCoordinatesField, self._modelCoordinatesField, meshGroup)
-            meshGroupCoordinatesIntegral.setNumbersOfPoints([3])
-            meshGroupArea = self._fieldmodule.createFieldMeshIntegral(
-                self._fieldmodule.createFieldConstant([1.0]), self._modelCoordinatesField, meshGroup)
-            meshGroupArea.setNumbersOfPoints([3])
-            result1, coordinatesIntegral = meshGroupCoordinatesIntegral.evaluateReal(
-                fieldcache, self._modelCoordinatesField.getNumberOfComponents())
-            result2, area = meshGroupArea.evaluateReal(fieldcache, 1)
-            if (result1 != RESULT_OK) or (result2 != RESULT_OK) or (area <= 0.0):
-                print("Error: Centre Groups projection failed to get mean coordinates of mesh for group " + groupName)
-                return
-            meshCentre = [s / area for s in coordinatesIntegral]
-            # print("Centre Groups meshCentre", meshCentre)
-            # offset dataCoordinates to make dataCentre coincide with meshCentre
-            dataCoordinates = dataCoordinates + self._fieldmodule.createFieldConstant(sub(meshCentre, dataCentre))
+            # use centre of bounding box as middle of data; previous use of mean was affected by uneven density
+            dataCentre = mult(add(summary["dataMinimums"], summary["dataMaximums"]), 0.5)
+            # offset dataCoordinates to make dataCentre coincide with geometric centre of meshGroup
+            dataCoordinates = dataCoordinates + self._fieldmodule.createFieldConstant(
+                sub(summary["meshCentre"], dataCentre))
 
         # find nearest locations on 1-D or 2-D feature but store on highest dimension mesh
         storeMesh = self.getHighestDimensionMesh()
-        storeMeshDimension = storeMesh.getDimension()
         if self._modelFitGroup:
             storeMesh = self._modelFitGroup.getMeshGroup(storeMesh)
             assert storeMesh.isValid(), "Model fit group is wrong dimension"
-        findLocation = self._fieldmodule.createFieldFindMeshLocation(
-            dataCoordinates, self._modelCoordinatesField, storeMesh)
-        assert RESULT_OK == findLocation.setSearchMesh(meshGroup)
-        findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+        # get data points to project in proportion
+        projectNodes = []
         nodeIter = dataGroup.createNodeiterator()
         node = nodeIter.next()
         dataProportionCounter = 0.5
@@ -1285,27 +2927,82 @@ class Fitter:
             dataProportionCounter += dataProportion
             if dataProportionCounter >= 1.0:
                 dataProportionCounter -= 1.0
-                fieldcache.setNode(node)
-                element, xi = findLocation.evaluateMeshLocation(fieldcache, storeMeshDimension)
-                if element.isValid():
-                    result = meshLocation.assignMeshLocation(fieldcache, element, xi)
-                    assert result == RESULT_OK, \
-                        "Error: Failed to assign data projection mesh location for group " + groupName
-                    result, projectionLength = self._dataErrorField.evaluateReal(fieldcache, 1)
-                    if projectionLength > maximumProjectionLength:
-                        maximumProjectionLength = projectionLength
-                    if outlierLength < 0.0:
-                        # store and filter once we know the maximum
-                        dataProjectionLengths.append((node.getIdentifier(), projectionLength))
-                    if (outlierLength <= 0.0) or (projectionLength <= outlierLength):
-                        dataProjectionNodesetGroup.addNode(node)
+                projectNodes.append(node)
             node = nodeIter.next()
-        if outlierLength < 0.0:
-            relativeOutlierLength = (1.0 + outlierLength) * maximumProjectionLength
-            for nodeIdentifier, projectionLength in dataProjectionLengths:
-                if projectionLength > relativeOutlierLength:
-                    node = dataGroup.findNodeByIdentifier(nodeIdentifier)
-                    dataProjectionNodesetGroup.removeNode(node)
+        keepNodes = []
+        if keepLocationNodesetGroup or projectNodesetGroup:
+            searchNodes = []
+            for node in projectNodes:
+                if keepLocationNodesetGroup and keepLocationNodesetGroup.containsNode(node):
+                    keepNodes.append(node)
+                elif (not projectNodesetGroup) or projectNodesetGroup.containsNode(node):
+                    searchNodes.append(node)
+            projectNodes = searchNodes
+        self._dataProjectionCounts[0] += len(keepNodes)
+        self._dataProjectionCounts[1] += len(projectNodes)
+        approximateResolution = activeFitterStepConfig.getApproximateProjectionResolution()
+        if approximateResolution > 0.0:
+            nodeLocations = self._getApproximateDataProjectionLocations(
+                fieldcache, dataCoordinates, projectNodes, meshGroup, storeMesh, approximateResolution, groupName)
+        elif incremental:
+            nodeLocations = self._getIncrementalDataProjectionLocations(
+                fieldcache, dataCoordinates, projectNodes, meshGroup, meshLocation, storeMesh, groupName)
+        else:
+            nodeLocations = self._getDataProjectionLocations(
+                fieldcache, dataCoordinates, projectNodes, meshGroup, storeMesh)
+        if keepNodes:
+            nodeLocations = itertools.chain(
+                self._getCurrentDataProjectionLocations(fieldcache, keepNodes, meshLocation), nodeLocations)
+        unprojectedCount = 0
+        for node, element, xi in nodeLocations:
+            fieldcache.setNode(node)
+            if element.isValid():
+                result = meshLocation.assignMeshLocation(fieldcache, element, xi)
+                assert result == RESULT_OK, \
+                    "Error: Failed to assign data projection mesh location for group " + groupName
+                result, projectionLength = self._dataErrorField.evaluateReal(fieldcache, 1)
+                projectedNodes.append(node)
+                projectionLengths.append(projectionLength)
+            else:
+                unprojectedCount += 1
+        # filter outliers once all projection lengths are known, adding only points within all thresholds
+        thresholdLengths = []
+        if projectionLengths:
+            if outlierLength > 0.0:
+                thresholdLengths.append(outlierLength)
+            elif outlierLength < 0.0:
+                thresholdLengths.append((1.0 + outlierLength) * max(projectionLengths))
+            if outlierThresholdMode != "none":
+                thresholdLengths.append(
+                    _get_outlier_threshold(projectionLengths, outlierThresholdMode, outlierThresholdValue))
+        thresholdLength = min(thresholdLengths) if thresholdLengths else math.inf
+        if projectionLengths:
+            # add projected points within thresholds to projection group in one pass by conditional field
+            projectedGroup = None
+            if (dataProportion < 1.0) or unprojectedCount:
+                # sampled points have no field to select them by, and unprojected points may have an old location
+                projectedGroup = self._fieldmodule.createFieldGroup()
+                projectedNodesetGroup = projectedGroup.createNodesetGroup(dataGroup.getMasterNodeset())
+                for node in projectedNodes:
+                    projectedNodesetGroup.addNode(node)
+                del projectedNodesetGroup
+                conditionalField = projectedGroup
+            elif projectNodesetGroup:
+                conditionalField = self._fieldmodule.createFieldAnd(group, projectNodesetGroup.getFieldGroup())
+                if keepLocationNodesetGroup:
+                    conditionalField = self._fieldmodule.createFieldOr(
+                        conditionalField, self._fieldmodule.createFieldAnd(
+                            group, keepLocationNodesetGroup.getFieldGroup()))
+            else:
+                conditionalField = group
+            # points not projected fail to evaluate error so are not added
+            conditionalField = self._fieldmodule.createFieldAnd(
+                conditionalField, self._fieldmodule.createFieldNot(self._fieldmodule.createFieldGreaterThan(
+                    self._dataErrorField, self._fieldmodule.createFieldConstant(
+                        [thresholdLength if thresholdLengths else max(projectionLengths)]))))
+            dataProjectionNodesetGroup.addNodesConditional(conditionalField)
+            del conditionalField
+            del projectedGroup
         pointsProjected = dataProjectionNodesetGroup.getSize() - sizeBefore
         if pointsProjected < dataGroup.getSize():
             if self.getDiagnosticLevel() > 0:
@@ -1315,6 +3012,423 @@ class Fitter:
         self._activeDataNodesetGroup.addNodesConditional(self._dataProjectionNodeGroupFields[meshDimension - 1])
         return
 
+    def _assignDataProjectionFaceLocations(self, fieldcache, meshDimension, keepLocationNodesetGroup=None):
+        """
+        Assign locations of projected data points on the nearest active line/face of meshDimension to their host
+        location, as needed to evaluate data projection orientation. This remains a two-stage search: data are
+        first projected to host locations, then each host location is searched for again here, but only on
+        the active lines/faces of its host element and elements sharing nodes with it, which include all lines
+        and faces the host location can lie on. A single find mesh location field is evaluated in data point
+        order with candidates changed with the host element, so results including ties on shared edges are as
+        for searching all active lines/faces, but much faster.
+        If no candidate line/face is found, all active lines/faces are searched. If still not found, the
+        line/face location is undefined so a stale location is not used, and a warning is printed at diagnostic
+        level > 0; the orientation of such points is not recalculated.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param meshDimension: Dimension of lines/faces data are projected onto, less than highest dimension.
+        :param keepLocationNodesetGroup: Optional NodesetGroup containing data points which keep their current
+        locations.
+        """
+        hostMesh = self.getHighestDimensionMesh()
+        hostMeshDimension = hostMesh.getDimension()
+        activeMeshGroup = self._activeDataProjectionMeshGroups[meshDimension - 1]
+        faceLocation = self._dataProjectionLocationFields[meshDimension - 1]
+        elementAdjacency = self._getElementAdjacency()
+        candidateGroup = self._fieldmodule.createFieldGroup()
+        candidateMeshGroup = candidateGroup.createMeshGroup(activeMeshGroup.getMasterMesh())
+        findLocation = self._fieldmodule.createFieldFindMeshLocation(
+            self._dataHostCoordinatesField, self._modelCoordinatesField, activeMeshGroup.getMasterMesh())
+        assert RESULT_OK == findLocation.setSearchMesh(candidateMeshGroup)
+        findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+        allFindLocation = None  # created on demand to search all active lines/faces
+        undefineNodetemplate = self._dataProjectionNodesetGroups[meshDimension - 1].createNodetemplate()
+        undefineNodetemplate.undefineField(faceLocation)
+        allSearchCount = 0
+        undefinedCount = 0
+        hostCandidateFaces = {}  # map host element identifier -> list of candidate faces
+        candidateHostElementIdentifier = None
+        nodeIter = self._dataProjectionNodesetGroups[meshDimension - 1].createNodeiterator()
+        node = nodeIter.next()
+        while node.isValid():
+            if not (keepLocationNodesetGroup and keepLocationNodesetGroup.containsNode(node)):
+                fieldcache.setNode(node)
+                hostElement, hostXi = self._dataHostLocationField.evaluateMeshLocation(fieldcache, hostMeshDimension)
+                if hostElement.isValid():
+                    hostElementIdentifier = hostElement.getIdentifier()
+                    if hostElementIdentifier != candidateHostElementIdentifier:
+                        candidateFaces = hostCandidateFaces.get(hostElementIdentifier)
+                        if candidateFaces is None:
+                            candidateFaces = hostCandidateFaces[hostElementIdentifier] = []
+                            for elementIdentifier in elementAdjacency[hostElementIdentifier]:
+                                faces = [hostMesh.findElementByIdentifier(elementIdentifier)]
+                                for dimension in range(hostMeshDimension, meshDimension, -1):
+                                    faces = [face.getFaceElement(f)
+                                             for face in faces for f in range(1, face.getNumberOfFaces() + 1)]
+                                for face in faces:
+                                    if face.isValid() and activeMeshGroup.containsElement(face):
+                                        candidateFaces.append(face)
+                        candidateMeshGroup.removeAllElements()
+                        for face in candidateFaces:
+                            candidateMeshGroup.addElement(face)
+                        candidateHostElementIdentifier = hostElementIdentifier
+                    element, xi = findLocation.evaluateMeshLocation(fieldcache, meshDimension)
+                if not (hostElement.isValid() and element.isValid()):
+                    # e.g. no active lines/faces on or adjacent to host element
+                    if not allFindLocation:
+                        allFindLocation = self._fieldmodule.createFieldFindMeshLocation(
+                            self._dataHostCoordinatesField, self._modelCoordinatesField,
+                            activeMeshGroup.getMasterMesh())
+                        assert RESULT_OK == allFindLocation.setSearchMesh(activeMeshGroup)
+                        allFindLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+                    element, xi = allFindLocation.evaluateMeshLocation(fieldcache, meshDimension)
+                    allSearchCount += 1
+                if element.isValid():
+                    faceLocation.assignMeshLocation(fieldcache, element, xi)
+                else:
+                    node.merge(undefineNodetemplate)
+                    undefinedCount += 1
+            node = nodeIter.next()
+        if self.getDiagnosticLevel() > 0:
+            if allSearchCount > 0:
+                print("Warning: " + str(allSearchCount) + " data points not found on candidate " +
+                      ("lines" if (meshDimension == 1) else "faces") + " of host element; searched all")
+            if undefinedCount > 0:
+                print("Warning: " + str(undefinedCount) + " data points have no " +
+                      ("line" if (meshDimension == 1) else "face") + " location; orientation not recalculated")
+        del allFindLocation
+        del findLocation
+        del candidateMeshGroup
+        del candidateGroup
+
+    def _getDataProjectionLocations(self, fieldcache, dataCoordinates, nodes, meshGroup, storeMesh):
+        """
+        Generator of nearest mesh locations for data points, using the spatial index if enabled.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param dataCoordinates: Field giving data coordinates to project.
+        :param nodes: List of data points to project.
+        :param meshGroup: MeshGroup containing surfaces/lines to project onto.
+        :param storeMesh: Mesh or MeshGroup to find locations on.
+        :return: Generator yielding (node, element, xi), with invalid element if not found.
+        """
+        if self._dataProjectionSpatialIndex and (dataCoordinates.getNumberOfComponents() ==
+                                                 self._modelCoordinatesField.getNumberOfComponents()):
+            nodeSearches = self._getSpatialIndexDataProjectionSearches(
+                fieldcache, dataCoordinates, nodes, meshGroup, storeMesh)
+        else:
+            findLocation = self._fieldmodule.createFieldFindMeshLocation(
+                dataCoordinates, self._modelCoordinatesField, storeMesh)
+            assert RESULT_OK == findLocation.setSearchMesh(meshGroup)
+            findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+            nodeSearches = ((node, findLocation) for node in nodes)
+        storeMeshDimension = storeMesh.getDimension()
+        for node, findLocation in nodeSearches:
+            fieldcache.setNode(node)
+            element, xi = findLocation.evaluateMeshLocation(fieldcache, storeMeshDimension)
+            yield node, element, xi
+
+    def _getApproximateDataProjectionLocations(self, fieldcache, dataCoordinates, nodes, meshGroup, storeMesh,
+                                               resolution, groupName):
+        """
+        Generator of approximate nearest mesh locations for data points. Each point is only searched for on the
+        element with the nearest of samples of meshGroup at about resolution spacing, looked up in a grid.
+        Exact projections are also found for a sample of about 100 points, to record the increase in projection
+        distance from approximation in getApproximateDataProjectionErrors.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param dataCoordinates: Field giving data coordinates to project.
+        :param nodes: List of data points to project.
+        :param meshGroup: MeshGroup containing surfaces/lines to project onto.
+        :param storeMesh: Mesh or MeshGroup to find locations on.
+        :param resolution: Sample spacing as a proportion of data scale.
+        :param groupName: Name of group being projected, for recording errors.
+        :return: Generator yielding (node, element, xi), with invalid element if not found.
+        """
+        grid = _NearestSampleGrid(self._modelCoordinatesField, fieldcache, meshGroup, resolution * self._dataScale)
+        componentsCount = dataCoordinates.getNumberOfComponents()
+        elementNodes = {}  # map element identifier -> (element, nodes with nearest sample on element)
+        for node in nodes:
+            fieldcache.setNode(node)
+            result, x = dataCoordinates.evaluateReal(fieldcache, componentsCount)
+            element = grid.findNearestElement(x if (componentsCount > 1) else [x]) if (result == RESULT_OK) else None
+            if element:
+                elementNodes.setdefault(element.getIdentifier(), (element, []))[1].append(node)
+            else:
+                yield node, Element(), None
+        del grid
+        sampleIdentifiers = set(node.getIdentifier() for node in nodes[::max(1, len(nodes) // 100)])
+        sampleLocations = []
+        candidateGroup = self._fieldmodule.createFieldGroup()
+        candidateMeshGroup = candidateGroup.createMeshGroup(meshGroup.getMasterMesh())
+        storeMeshDimension = storeMesh.getDimension()
+        for element, elementNodesList in elementNodes.values():
+            candidateMeshGroup.removeAllElements()
+            candidateMeshGroup.addElement(element)
+            findLocation = self._fieldmodule.createFieldFindMeshLocation(
+                dataCoordinates, self._modelCoordinatesField, storeMesh)
+            assert RESULT_OK == findLocation.setSearchMesh(candidateMeshGroup)
+            findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+            for node in elementNodesList:
+                fieldcache.setNode(node)
+                hostElement, xi = findLocation.evaluateMeshLocation(fieldcache, storeMeshDimension)
+                if node.getIdentifier() in sampleIdentifiers:
+                    sampleLocations.append((node, hostElement, xi))
+                yield node, hostElement, xi
+            del findLocation
+        del candidateMeshGroup
+        del candidateGroup
+        # compare sampled approximate projection distances with exact projections
+        distanceIncreases = array.array("d")
+        exactLocations = self._getDataProjectionLocations(
+            fieldcache, dataCoordinates, [node for node, element, xi in sampleLocations], meshGroup, storeMesh)
+        for (node, element, xi), (exactNode, exactElement, exactXi) in zip(sampleLocations, exactLocations):
+            if element.isValid() and exactElement.isValid():
+                distanceIncreases.append(max(0.0, (
+                    self._evaluateDataLocationDistance(fieldcache, dataCoordinates, node, element, xi) -
+                    self._evaluateDataLocationDistance(fieldcache, dataCoordinates, node, exactElement, exactXi))))
+        if distanceIncreases:
+            errors = (len(distanceIncreases),
+                      math.sqrt(sum(value * value for value in distanceIncreases) / len(distanceIncreases)),
+                      max(distanceIncreases))
+            self._approximateDataProjectionErrors[groupName] = errors
+            if self._diagnosticLevel > 0:
+                print("Approximate projection group", groupName, "sampled", errors[0],
+                      "points: RMS increase in distance", errors[1], "maximum", errors[2])
+
+    def _evaluateDataLocationDistance(self, fieldcache, dataCoordinates, node, element, xi):
+        """
+        :return: Distance from data coordinates of node to model coordinates at element xi.
+        """
+        componentsCount = dataCoordinates.getNumberOfComponents()
+        fieldcache.setNode(node)
+        result, x = dataCoordinates.evaluateReal(fieldcache, componentsCount)
+        fieldcache.setMeshLocation(element, xi if isinstance(xi, list) else [xi])
+        result, modelX = self._modelCoordinatesField.evaluateReal(fieldcache, componentsCount)
+        if componentsCount == 1:
+            return abs(modelX - x)
+        return math.sqrt(sum((modelValue - value) * (modelValue - value) for modelValue, value in zip(modelX, x)))
+
+    def getApproximateDataProjectionErrors(self):
+        """
+        Get errors in approximate data projections against exact projections, found for a sample of about
+        100 points per group. See FitterStepConfig.setApproximateProjectionResolution.
+        :return: dict group name -> (number of points sampled, RMS increase in projection distance, maximum
+        increase in projection distance), for groups projected approximately in the last projection.
+        """
+        return self._approximateDataProjectionErrors
+
+    def _getCurrentDataProjectionLocations(self, fieldcache, nodes, meshLocation):
+        """
+        Generator of current mesh locations of data points.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param nodes: List of data points.
+        :param meshLocation: FieldStoredMeshLocation holding current locations on highest dimension mesh.
+        :return: Generator yielding (node, element, xi), with invalid element if not defined.
+        """
+        meshDimension = self.getHighestDimensionMesh().getDimension()
+        for node in nodes:
+            fieldcache.setNode(node)
+            element, xi = meshLocation.evaluateMeshLocation(fieldcache, meshDimension)
+            yield node, element, xi
+
+    def _getElementAdjacency(self):
+        """
+        Get map from each highest dimension element identifier to the set of identifiers of elements
+        sharing any node with it via the model coordinates field, including itself.
+        Built on first call after each load, as mesh connectivity does not change during a fit.
+        :return: dict element identifier -> set of element identifiers.
+        """
+        if self._elementAdjacency is not None:
+            return self._elementAdjacency
+        mesh = self.getHighestDimensionMesh()
+        elementNodeIdentifiers = {}
+        nodeElementIdentifiers = {}
+        elementIter = mesh.createElementiterator()
+        element = elementIter.next()
+        while element.isValid():
+            elementIdentifier = element.getIdentifier()
+            nodeIdentifiers = set()
+            eft = element.getElementfieldtemplate(self._modelCoordinatesField, 1)
+            if eft.isValid():
+                for n in range(1, eft.getNumberOfLocalNodes() + 1):
+                    node = element.getNode(eft, n)
+                    if node.isValid():
+                        nodeIdentifiers.add(node.getIdentifier())
+            elementNodeIdentifiers[elementIdentifier] = nodeIdentifiers
+            for nodeIdentifier in nodeIdentifiers:
+                nodeElementIdentifiers.setdefault(nodeIdentifier, []).append(elementIdentifier)
+            element = elementIter.next()
+        self._elementAdjacency = {}
+        for elementIdentifier, nodeIdentifiers in elementNodeIdentifiers.items():
+            adjacentIdentifiers = {elementIdentifier}
+            for nodeIdentifier in nodeIdentifiers:
+                adjacentIdentifiers.update(nodeElementIdentifiers[nodeIdentifier])
+            self._elementAdjacency[elementIdentifier] = adjacentIdentifiers
+        return self._elementAdjacency
+
+    def _updateElementDisplacements(self, tolerance):
+        """
+        Add the maximum change in model coordinates parameters of each highest dimension element since
+        the last call to its accumulated displacement, and get elements with accumulated displacement below
+        tolerance. Accumulated displacements of other elements are reset as data near them are reprojected.
+        :param tolerance: Displacement below which elements are unchanged, or 0.0 to reset all.
+        :return: Set of identifiers of elements with accumulated displacement below tolerance.
+        """
+        modelParameters = self._modelCoordinatesField.getFieldparameters()
+        # number of parameters must be queried before getting them
+        parametersCount = modelParameters.getNumberOfParameters()
+        result, parameters = modelParameters.getParameters(parametersCount)
+        assert result == RESULT_OK, "Data projections: Failed to get model coordinates parameters"
+        lastParameters = self._dataProjectionModelParameters
+        self._dataProjectionModelParameters = parameters
+        if (tolerance <= 0.0) or (lastParameters is None) or (len(lastParameters) != parametersCount):
+            self._elementDisplacements = {}
+            return set()
+        if self._elementParameterIndexes is None:
+            self._elementParameterIndexes = {}
+            mesh = self.getHighestDimensionMesh()
+            elementIter = mesh.createElementiterator()
+            element = elementIter.next()
+            while element.isValid():
+                result, indexes = modelParameters.getElementParameterIndexesZero(
+                    element, modelParameters.getNumberOfElementParameters(element))
+                self._elementParameterIndexes[element.getIdentifier()] = indexes if (result == RESULT_OK) else []
+                element = elementIter.next()
+        cleanElementIdentifiers = set()
+        for elementIdentifier, indexes in self._elementParameterIndexes.items():
+            maximumChange = 0.0
+            for index in indexes:
+                change = abs(parameters[index] - lastParameters[index])
+                if change > maximumChange:
+                    maximumChange = change
+            displacement = self._elementDisplacements.get(elementIdentifier, 0.0) + maximumChange
+            if indexes and (displacement < tolerance):
+                self._elementDisplacements[elementIdentifier] = displacement
+                cleanElementIdentifiers.add(elementIdentifier)
+            else:
+                self._elementDisplacements[elementIdentifier] = 0.0
+        return cleanElementIdentifiers
+
+    def _getMeshGroupHostElementIdentifiers(self, meshGroup):
+        """
+        Get map from identifiers of highest dimension elements to elements in meshGroup which are or
+        are on faces/lines of them.
+        :param meshGroup: MeshGroup containing surfaces/lines to project onto.
+        :return: dict host element identifier -> list of elements in meshGroup.
+        """
+        hostDimension = self.getHighestDimensionMesh().getDimension()
+        hostElements = {}
+        elementIter = meshGroup.createElementiterator()
+        element = elementIter.next()
+        while element.isValid():
+            parents = [element]
+            for dimension in range(meshGroup.getDimension(), hostDimension):
+                grandparents = []
+                for parent in parents:
+                    for p in range(1, parent.getNumberOfParents() + 1):
+                        grandparents.append(parent.getParentElement(p))
+                parents = grandparents
+            for hostIdentifier in set(parent.getIdentifier() for parent in parents):
+                hostElements.setdefault(hostIdentifier, []).append(element)
+            element = elementIter.next()
+        return hostElements
+
+    def _getIncrementalDataProjectionLocations(self, fieldcache, dataCoordinates, nodes, meshGroup, meshLocation,
+                                               storeMesh, groupName):
+        """
+        Generator of nearest mesh locations for data points, each first searched for only in a patch of
+        elements of meshGroup on the host elements within 2 layers of adjacency of its current host element.
+        Zinc's find mesh location has no initial guess, so the current host element of each data point
+        serves as the warm start, and points with the same current host element share a patch search.
+        The local result is kept if the found host element and all elements adjacent to it are in the patch,
+        otherwise the data point is searched for globally, as it is if it has no current location.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param dataCoordinates: Field giving data coordinates to project.
+        :param nodes: List of data points to project.
+        :param meshGroup: MeshGroup containing surfaces/lines to project onto.
+        :param meshLocation: FieldStoredMeshLocation holding current locations on highest dimension mesh.
+        :param storeMesh: Mesh or MeshGroup to find locations on.
+        :param groupName: Name of group being projected, for diagnostic output.
+        :return: Generator yielding (node, element, xi), with invalid element if not found.
+        """
+        elementAdjacency = self._getElementAdjacency()
+        hostElements = self._getMeshGroupHostElementIdentifiers(meshGroup)
+        storeMeshDimension = storeMesh.getDimension()
+        hostNodes = {}
+        globalNodes = []
+        for node in nodes:
+            fieldcache.setNode(node)
+            element, xi = meshLocation.evaluateMeshLocation(fieldcache, storeMeshDimension)
+            if element.isValid():
+                hostNodes.setdefault(element.getIdentifier(), []).append(node)
+            else:
+                globalNodes.append(node)
+        patchGroup = self._fieldmodule.createFieldGroup()
+        patchMeshGroup = patchGroup.createMeshGroup(meshGroup.getMasterMesh())
+        localCount = 0
+        for hostIdentifier, patchNodes in hostNodes.items():
+            patchIdentifiers = set()
+            for adjacentIdentifier in elementAdjacency.get(hostIdentifier, ()):
+                patchIdentifiers.update(elementAdjacency[adjacentIdentifier])
+            patchMeshGroup.removeAllElements()
+            for patchIdentifier in patchIdentifiers:
+                for element in hostElements.get(patchIdentifier, ()):
+                    patchMeshGroup.addElement(element)
+            if patchMeshGroup.getSize() == 0:
+                globalNodes += patchNodes
+                continue
+            findLocation = self._fieldmodule.createFieldFindMeshLocation(
+                dataCoordinates, self._modelCoordinatesField, storeMesh)
+            assert RESULT_OK == findLocation.setSearchMesh(patchMeshGroup)
+            findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+            for node in patchNodes:
+                fieldcache.setNode(node)
+                element, xi = findLocation.evaluateMeshLocation(fieldcache, storeMeshDimension)
+                if element.isValid() and patchIdentifiers.issuperset(elementAdjacency[element.getIdentifier()]):
+                    localCount += 1
+                    yield node, element, xi
+                else:
+                    globalNodes.append(node)
+            del findLocation
+        del patchMeshGroup
+        del patchGroup
+        if self.getDiagnosticLevel() > 0:
+            print("Incremental projection of group " + groupName + ": " + str(localCount) + " local, " +
+                  str(len(globalNodes)) + " global searches")
+        yield from self._getDataProjectionLocations(fieldcache, dataCoordinates, globalNodes, meshGroup, storeMesh)
+
+    def _getSpatialIndexDataProjectionSearches(self, fieldcache, dataCoordinates, nodes, meshGroup, storeMesh):
+        """
+        Generator of nearest mesh location searches for data points, each limited to candidate elements
+        found from a grid of element bounding boxes for the cell containing the data point.
+        Builds the grid from current model coordinates on each call.
+        :param fieldcache: Fieldcache for zinc field evaluations in region.
+        :param dataCoordinates: Field giving data coordinates to project.
+        :param nodes: List of data points to project.
+        :param meshGroup: MeshGroup containing surfaces/lines to project onto.
+        :param storeMesh: Mesh or MeshGroup to find locations on.
+        :return: Generator yielding (node, FieldFindMeshLocation), grouped by cell.
+        """
+        grid = _ElementBoundsGrid(self._modelCoordinatesField, fieldcache, meshGroup)
+        componentsCount = dataCoordinates.getNumberOfComponents()
+        cellNodes = {}
+        for node in nodes:
+            fieldcache.setNode(node)
+            result, x = dataCoordinates.evaluateReal(fieldcache, componentsCount)
+            if result == RESULT_OK:
+                cellNodes.setdefault(grid.getCell(x if (componentsCount > 1) else [x]), []).append(node)
+        candidateGroup = self._fieldmodule.createFieldGroup()
+        candidateMeshGroup = candidateGroup.createMeshGroup(meshGroup.getMasterMesh())
+        for cell, nodes in cellNodes.items():
+            candidateMeshGroup.removeAllElements()
+            for element in grid.getCellCandidateElements(cell):
+                candidateMeshGroup.addElement(element)
+            findLocation = self._fieldmodule.createFieldFindMeshLocation(
+                dataCoordinates, self._modelCoordinatesField, storeMesh)
+            assert RESULT_OK == findLocation.setSearchMesh(candidateMeshGroup)
+            findLocation.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+            for node in nodes:
+                yield node, findLocation
+            del findLocation
+
     def getGroupDataProjectionNodesetGroup(self, group: FieldGroup):
         """
         :return: Data NodesetGroup containing points for projection of group, otherwise None.
@@ -1337,15 +3451,88 @@ class Fitter:
                 return meshGroup
         return None
 
-    def calculateDataProjections(self, fitterStep: FitterStep):
+    def _defineDataProjectionFieldsOnGroup(self, group: FieldGroup, meshDimension):
+        """
+        Define host location, data point weight, data projection orientation and the stored location on
+        meshDimension faces/lines on all data points in group which do not already have them. Points already
+        defined, e.g. by an overlapping group, are found in bulk by field conditional and not merged again.
+        :param group: FieldGroup containing data points to project.
+        :param meshDimension: Dimension of mesh group data in group are projected onto.
+        """
+        fields = [self._dataHostLocationField, self._dataWeightField, self._dataProjectionOrientationField]
+        if meshDimension <= len(self._dataProjectionLocationFields):
+            fields.append(self._dataProjectionLocationFields[meshDimension - 1])
+        fieldmodule = self._fieldmodule
+        with ChangeManager(fieldmodule):
+            isDefined = fieldmodule.createFieldIsDefined(fields[0])
+            for field in fields[1:]:
+                isDefined = fieldmodule.createFieldAnd(isDefined, fieldmodule.createFieldIsDefined(field))
+            datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+            undefinedNodesetGroup = fieldmodule.createFieldGroup().createNodesetGroup(datapoints)
+            undefinedNodesetGroup.addNodesConditional(
+                fieldmodule.createFieldAnd(group, fieldmodule.createFieldNot(isDefined)))
+            del isDefined
+            if undefinedNodesetGroup.getSize() > 0:
+                nodetemplate = datapoints.createNodetemplate()
+                for field in fields:
+                    # need to define storage for marker data weight, but don't assign here
+                    nodetemplate.defineField(field)
+                nodeIter = undefinedNodesetGroup.createNodeiterator()
+                node = nodeIter.next()
+                while node.isValid():
+                    node.merge(nodetemplate)
+                    node = nodeIter.next()
+                del nodetemplate
+            del undefinedNodesetGroup
+
+    def calculateDataProjections(self, fitterStep: FitterStep, projectNodesetGroup=None):
         """
         Find projections of datapoints' coordinates onto model coordinates,
         by groups i.e. from datapoints group onto matching 2-D or 1-D mesh group.
         Calculate and store projection direction unit vector.
+        :param fitterStep: Step to calculate projections for, using settings of its active config.
+        :param projectNodesetGroup: Optional NodesetGroup limiting data points to project. Other data points
+        which are currently projected keep their location; those which are not are not projected.
         """
         assert self._dataCoordinatesField and self._modelCoordinatesField
+        startTime = self.startPhaseTiming()
         activeFitterStepConfig = self.getActiveFitterStepConfig(fitterStep)
+        incremental = isinstance(fitterStep, FitterStepFit) and fitterStep.isIncrementalProjection()
+        reprojectionTolerance = (fitterStep.getReprojectionTolerance() * self._dataScale) \
+            if isinstance(fitterStep, FitterStepFit) else 0.0
+        self._dataProjectionCounts = [0, 0]
+        self._approximateDataProjectionErrors = {}
         with ChangeManager(self._fieldmodule):
+            datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+            fieldcache = self._fieldmodule.createFieldcache()
+            # get projected data points whose host element and neighbours have not moved so keep their location
+            keepLocationGroup = None
+            keepLocationNodesetGroup = None
+            cleanElementIdentifiers = self._updateElementDisplacements(reprojectionTolerance)
+            if cleanElementIdentifiers:
+                elementAdjacency = self._getElementAdjacency()
+                meshDimension = self.getHighestDimensionMesh().getDimension()
+                keepLocationGroup = self._fieldmodule.createFieldGroup()
+                keepLocationNodesetGroup = keepLocationGroup.createNodesetGroup(datapoints)
+                for nodesetGroup in self._dataProjectionNodesetGroups:
+                    nodeIter = nodesetGroup.createNodeiterator()
+                    node = nodeIter.next()
+                    while node.isValid():
+                        fieldcache.setNode(node)
+                        element, xi = self._dataHostLocationField.evaluateMeshLocation(fieldcache, meshDimension)
+                        if element.isValid() and \
+                                cleanElementIdentifiers.issuperset(elementAdjacency[element.getIdentifier()]):
+                            keepLocationNodesetGroup.addNode(node)
+                        node = nodeIter.next()
+            if projectNodesetGroup:
+                # currently projected data points not in projectNodesetGroup keep their location
+                if not keepLocationGroup:
+                    keepLocationGroup = self._fieldmodule.createFieldGroup()
+                    keepLocationNodesetGroup = keepLocationGroup.createNodesetGroup(datapoints)
+                keepLocationNodesetGroup.addNodesConditional(self._fieldmodule.createFieldAnd(
+                    self._fieldmodule.createFieldOr(self._dataProjectionNodeGroupFields[0],
+                                                    self._dataProjectionNodeGroupFields[1]),
+                    self._fieldmodule.createFieldNot(projectNodesetGroup.getFieldGroup())))
             # build group of active data and marker points
             self._activeDataNodesetGroup.removeAllNodes()
             if self._markerDataLocationGroupField:
@@ -1355,8 +3542,6 @@ class Fitter:
                 self._dataProjectionNodesetGroups[d].removeAllNodes()
                 self._activeDataProjectionMeshGroups[d].removeAllElements()
 
-            datapoints = self._fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
-            fieldcache = self._fieldmodule.createFieldcache()
             groups = getGroupList(self._fieldmodule)
             for group in groups:
                 if not group.isManaged():
@@ -1379,20 +3564,12 @@ class Fitter:
                             print("Warning: Cannot project data for group " + groupName +
                                   " as field " + self._dataCoordinatesField.getName() + " is not defined on data")
                         continue
-                    # define host location, data point weight and data projection orientation on data Group:
-                    nodetemplate = datapoints.createNodetemplate()
-                    nodetemplate.defineField(self._dataHostLocationField)
-                    # need to define storage for marker data weight, but don't assign here
-                    nodetemplate.defineField(self._dataWeightField)
-                    nodetemplate.defineField(self._dataProjectionOrientationField)
-                    nodeIter = dataGroup.createNodeiterator()
-                    node = nodeIter.next()
-                    while node.isValid():
-                        node.merge(nodetemplate)
-                        node = nodeIter.next()
-                    del nodetemplate
+                    self._defineDataProjectionFieldsOnGroup(group, meshGroup.getDimension())
+                groupStartTime = self.startPhaseTiming()
                 self.calculateGroupDataProjections(fieldcache, group, dataGroup, meshGroup, self._dataHostLocationField,
-                                                   activeFitterStepConfig)
+                                                   activeFitterStepConfig, incremental, keepLocationNodesetGroup,
+                                                   projectNodesetGroup)
+                self.endPhaseTiming("calculateDataProjections", groupStartTime, groupName=groupName)
                 # add elements being projected onto to active group for mesh dimension
                 self._activeDataProjectionMeshGroups[meshGroup.getDimension() - 1].addElementsConditional(group)
 
@@ -1402,15 +3579,13 @@ class Fitter:
             for meshDimension in range(1, 3):
                 nodesetGroup = self._dataProjectionNodesetGroups[meshDimension - 1]
                 if nodesetGroup.getSize() > 0:
+                    if meshDimension < highestMeshDimension:
+                        self._assignDataProjectionFaceLocations(fieldcache, meshDimension, keepLocationNodesetGroup)
                     if meshDimension == highestMeshDimension:
                         faceLocationField = self._dataHostLocationField  # 2-D fit case
                     else:
-                        # unfortunately need to find mesh location again, this time on active line/face mesh
-                        faceLocationField = self._fieldmodule.createFieldFindMeshLocation(
-                            self._dataHostCoordinatesField, self._modelCoordinatesField,
-                            self._activeDataProjectionMeshGroups[meshDimension - 1])
-                        # in theory SEARCH_MODE_EXACT should work, however tests fail
-                        faceLocationField.setSearchMode(FieldFindMeshLocation.SEARCH_MODE_NEAREST)
+                        # location on line/face found after projecting; see _assignDataProjectionFaceLocations
+                        faceLocationField = self._dataProjectionLocationFields[meshDimension - 1]
                     d1 = self._fieldmodule.createFieldDerivative(self._modelCoordinatesField, 1)
                     if meshDimension == 1:
                         d1 = self._fieldmodule.createFieldNormalise(d1)
@@ -1485,6 +3660,8 @@ class Fitter:
                     del faceLocationField
                     fieldassignment = self._dataProjectionOrientationField.createFieldassignment(sourceOrientationField)
                     fieldassignment.setNodeset(nodesetGroup)
+                    if keepLocationGroup:
+                        fieldassignment.setConditionalField(self._fieldmodule.createFieldNot(keepLocationGroup))
                     result = fieldassignment.assign()
                     assert result in [RESULT_OK, RESULT_WARNING_PART_DONE], \
                         "Error:  Failed to assign data projection orientation for mesh dimension " + str(meshDimension)
@@ -1509,9 +3686,22 @@ class Fitter:
                 # Write projection error measures
                 rmsErrorValue, maxErrorValue = self.getDataRMSAndMaximumProjectionError()
                 print("Data projection RMS error", rmsErrorValue, "Max error", maxErrorValue)
+                if keepLocationGroup:
+                    print("Data projection kept", self._dataProjectionCounts[0], "recalculated",
+                          self._dataProjectionCounts[1], "data point locations")
 
             # remove temporary objects before ChangeManager exits
+            del keepLocationNodesetGroup
+            del keepLocationGroup
             del fieldcache
+        self.endPhaseTiming("calculateDataProjections", startTime)
+
+    def getDataProjectionCounts(self):
+        """
+        :return: Number of data points which kept their stored location and orientation, number of data points
+        whose projections were recalculated, in the last call to calculateDataProjections.
+        """
+        return tuple(self._dataProjectionCounts)
 
     def getDataProjectionOrientationField(self):
         return self._dataProjectionOrientationField
@@ -1600,6 +3790,79 @@ class Fitter:
         assert diagnosticLevel >= 0
         self._diagnosticLevel = diagnosticLevel
 
+    def isTimingEnabled(self):
+        """
+        :return: True if recording wall times and counts of fit phases, otherwise False.
+        """
+        return self._timingEnabled
+
+    def setTimingEnabled(self, timingEnabled):
+        """
+        Set whether to record wall times and call counts of phases of load and each fitter step run: loading
+        model and data, data projections per group, assigning data weights and deformation penalties,
+        optimisation and writing models. Enabling clears any previous timing report.
+        :param timingEnabled: True to record timings, False to not record (default).
+        """
+        if timingEnabled and not self._timingEnabled:
+            self._timingEnabled = True
+            self.clearTimingReport()
+        elif not timingEnabled:
+            self._timingEnabled = False
+            self._timingPhases = None
+
+    def clearTimingReport(self):
+        """
+        Clear timings recorded so far, if timing is enabled.
+        """
+        if self._timingEnabled:
+            self._timingReport = {"load": {}, "steps": [], "other": {}}
+            self._timingPhases = self._timingReport["other"]
+
+    def getTimingReport(self):
+        """
+        Get timings recorded while timing enabled. Each phase maps to a dict with "calls" and total wall "time"
+        in seconds, plus optional counters such as "subIterations" for fit step optimisation, and "groups" mapping group
+        name to timings of data projections for that group.
+        :return: dict {"load": phases, "steps": list of {"index": step index, "type": step JSON type id, "phases":
+        phases} for each step run, "other": phases called outside load and steps}, or None if timing not enabled.
+        """
+        return self._timingReport
+
+    def getTimingReportJSON(self):
+        """
+        :return: Timing report encoded as JSON string, or None if timing not enabled. See getTimingReport.
+        """
+        if self._timingReport is None:
+            return None
+        return json.dumps(self._timingReport, sort_keys=False, indent=4)
+
+    def startPhaseTiming(self):
+        """
+        Get start time for timing a phase with endPhaseTiming.
+        :return: Current time if timing enabled, otherwise None.
+        """
+        return time.perf_counter() if self._timingEnabled else None
+
+    def endPhaseTiming(self, phaseName, startTime, counters=None, groupName=None):
+        """
+        Add call and elapsed time since startTime to phase timings of current step or load.
+        :param phaseName: Name of phase in timing report.
+        :param startTime: Time from startPhaseTiming. If None, timing was not enabled and nothing is recorded.
+        :param counters: Optional dict of counter name -> integer value to add to phase.
+        :param groupName: Optional name of group to record under "groups" of the phase, instead of the phase.
+        """
+        if (startTime is None) or (self._timingPhases is None):
+            return
+        elapsedTime = time.perf_counter() - startTime
+        timing = self._timingPhases.setdefault(phaseName, {"calls": 0, "time": 0.0})
+        if groupName is not None:
+            timing = timing.setdefault("groups", {}).setdefault(groupName, {"calls": 0, "time": 0.0})
+        timing["calls"] += 1
+        timing["time"] += elapsedTime
+        if counters:
+            for name, value in counters.items():
+                timing[name] = timing.get(name, 0) + value
+
     def updateModelReferenceCoordinates(self):
         assignFieldParameters(self._modelReferenceCoordinatesField, self._modelCoordinatesField)
 
@@ -1608,6 +3871,7 @@ class Fitter:
         Write model nodes and elements with model coordinates field to file.
         Note: Output field name is prefixed with "fitted ".
         """
+        startTime = self.startPhaseTiming()
         with ChangeManager(self._fieldmodule):
             # temporarily rename model coordinates field to prefix with "fitted "
             # so can be used along with original coordinates in later steps
@@ -1629,6 +3893,7 @@ class Fitter:
             self._modelCoordinatesField.setName(self._modelCoordinatesFieldName)
 
             assert result == RESULT_OK
+        self.endPhaseTiming("writeModel", startTime)
 
     def writeData(self, fileName):
         sir = self._region.createStreaminformationRegion()
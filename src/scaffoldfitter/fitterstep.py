@@ -26,6 +26,10 @@ class FitterStep:
         # Values can be inherited from earlier steps of the same type, however
         # the special value None cancels previous value to restore the default.
         self._groupSettings = {}
+        # map (group name, setting name) -> (value or None, setLocally, inheritable) resolved from this and
+        # earlier steps before falling back to defaults. Cleared when the fitter's group settings version changes
+        self._resolvedGroupSettings = {}
+        self._resolvedGroupSettingsVersion = None
 
     @classmethod
     def getDefaultGroupName(cls):
@@ -54,6 +58,7 @@ class FitterStep:
         groupSettingsIn = dctIn.get("groupSettings")
         if groupSettingsIn:
             self._groupSettings.update(groupSettingsIn)
+            self._groupSettingsChanged()
 
     def encodeSettingsJSONDict(self) -> dict:
         """
@@ -71,6 +76,13 @@ class FitterStep:
         """
         return list(self._groupSettings.keys())
 
+    def _groupSettingsChanged(self):
+        """
+        Invalidate resolved group settings of all steps in fitter, since they may inherit from this step.
+        """
+        if self._fitter:
+            self._fitter.incrementGroupSettingsVersion()
+
     def clearGroupSetting(self, groupName: str, settingName: str):
         """
         Clear setting for group, removing group settings dict if empty.
@@ -84,6 +96,7 @@ class FitterStep:
             groupSettings.pop(settingName, None)
             if len(groupSettings) == 0:
                 self._groupSettings.pop(groupName)
+            self._groupSettingsChanged()
 
     def _getInheritedGroupSetting(self, groupName: str, settingName: str):
         """
@@ -112,23 +125,33 @@ class FitterStep:
         :param defaultValue: Value to use if setting not found for group.
         Value falls back to value for default group if not set or inherited,
         or defaultValue if not set in default group.
+        Values resolved from this and earlier steps are cached until any group settings or steps change.
         The second return value is True if the value is set locally to a value
         or None if reset locally.
         The third return value is True if a previous config has set the value.
         """
         if groupName is None:
             groupName = self._defaultGroupName
-        value = None
-        setLocally = False
-        groupSettings = self._groupSettings.get(groupName)
-        if groupSettings:
-            if settingName in groupSettings:
-                value = groupSettings[settingName]
-                setLocally = None if (value is None) else True
-        inheritedValue = self._getInheritedGroupSetting(groupName, settingName)
-        inheritable = inheritedValue is not None
-        if inheritable and not (setLocally or (setLocally is None)):
-            value = inheritedValue
+        version = self._fitter.getGroupSettingsVersion()
+        if version != self._resolvedGroupSettingsVersion:
+            self._resolvedGroupSettings = {}
+            self._resolvedGroupSettingsVersion = version
+        resolved = self._resolvedGroupSettings.get((groupName, settingName))
+        if resolved:
+            value, setLocally, inheritable = resolved
+        else:
+            value = None
+            setLocally = False
+            groupSettings = self._groupSettings.get(groupName)
+            if groupSettings:
+                if settingName in groupSettings:
+                    value = groupSettings[settingName]
+                    setLocally = None if (value is None) else True
+            inheritedValue = self._getInheritedGroupSetting(groupName, settingName)
+            inheritable = inheritedValue is not None
+            if inheritable and not (setLocally or (setLocally is None)):
+                value = inheritedValue
+            self._resolvedGroupSettings[(groupName, settingName)] = (value, setLocally, inheritable)
         if value is None:
             if groupName != self._defaultGroupName:
                 value = self.getGroupSetting(self._defaultGroupName, settingName, defaultValue)[0]
@@ -154,6 +177,7 @@ class FitterStep:
         if not groupSettings:
             groupSettings = self._groupSettings[groupName] = {}
         groupSettings[settingName] = value
+        self._groupSettingsChanged()
 
     def hasRun(self):
         return self._hasRun
@@ -164,6 +188,23 @@ class FitterStep:
     def getDiagnosticLevel(self):
         return self._fitter.getDiagnosticLevel()
 
+    def _optimise(self, optimisation, subIterationsCount=None):
+        """
+        Run optimisation, printing its solution report if diagnostic level > 1, and recording its time and
+        number of sub-iterations in the fitter's timing report, if enabled.
+        :param optimisation: Zinc Optimisation to run.
+        :param subIterationsCount: Number of sub-iterations the optimisation runs, counted by the caller's
+        optimise loop, or None if not known.
+        :return: Result of optimisation.
+        """
+        startTime = self._fitter.startPhaseTiming()
+        result = optimisation.optimise()
+        self._fitter.endPhaseTiming("optimise", startTime,
+                                    {"subIterations": subIterationsCount} if subIterationsCount else None)
+        if self.getDiagnosticLevel() > 1:
+            print(optimisation.getSolutionReport())
+        return result
+
     def run(self, modelFileNameStem=None):
         """
         Override to perform action of derived FitStep
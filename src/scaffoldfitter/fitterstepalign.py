@@ -4,9 +4,9 @@ Fit step for gross alignment and scale.
 import copy
 import math
 
-from cmlibs.maths.vectorops import add, div, euler_to_rotation_matrix, matrix_vector_mult, mult, sub, identity_matrix
+from cmlibs.maths.vectorops import add, euler_to_rotation_matrix, matrix_vector_mult, mult, sub, identity_matrix
 from cmlibs.utils.zinc.field import get_group_list, create_field_euler_angles_rotation_matrix
-from cmlibs.utils.zinc.finiteelement import evaluate_field_nodeset_range, getNodeNameCentres
+from cmlibs.utils.zinc.finiteelement import getNodeNameCentres
 from cmlibs.utils.zinc.general import ChangeManager
 from cmlibs.zinc.element import Mesh
 from cmlibs.zinc.field import Field
@@ -329,31 +329,20 @@ class FitterStepAlign(FitterStep):
         """
         Perform auto alignment to groups and/or markers.
         """
-        modelCoordinates = self._fitter.getModelCoordinatesField()
         pointMap = {}  # dict group/marker name -> (modelCoordinates, dataCoordinates)
 
         if self._alignGroups:
             fieldmodule = self._fitter.getFieldmodule()
-            dataCoordinates = self._fitter.getDataCoordinatesField()
             groups = get_group_list(fieldmodule)
-            with ChangeManager(fieldmodule):
-                one = fieldmodule.createFieldConstant(1.0)
-                for group in groups:
-                    dataGroup = self._fitter.getGroupDataProjectionNodesetGroup(group)
-                    if not dataGroup:
-                        continue
-                    meshGroup = self._fitter.getGroupDataProjectionMeshGroup(group)
-                    if not meshGroup:
-                        continue
-                    groupName = f"{group.getName()}_group"
-                    # use centre of bounding box as middle of data; previous use of mean was affected by uneven density
-                    minDataCoordinates, maxDataCoordinates = evaluate_field_nodeset_range(dataCoordinates, dataGroup)
-                    middleDataCoordinates = mult(add(minDataCoordinates, maxDataCoordinates), 0.5)
-                    coordinates_integral = evaluate_field_mesh_integral(modelCoordinates, modelCoordinates, meshGroup)
-                    mass = evaluate_field_mesh_integral(one, modelCoordinates, meshGroup)
-                    meanModelCoordinates = div(coordinates_integral, mass)
-                    pointMap[groupName] = (meanModelCoordinates, middleDataCoordinates)
-                del one
+            for group in groups:
+                # cached summary of data range and mesh centroid, shared with central projection
+                summary = self._fitter.getGroupGeometrySummary(group, numberOfPoints=4)
+                if not summary:
+                    continue
+                groupName = f"{group.getName()}_group"
+                # use centre of bounding box as middle of data; previous use of mean was affected by uneven density
+                middleDataCoordinates = mult(add(summary["dataMinimums"], summary["dataMaximums"]), 0.5)
+                pointMap[groupName] = (summary["meshCentre"], middleDataCoordinates)
 
         if self._alignMarkers:
             matches = self._match_markers()
@@ -512,10 +501,7 @@ class FitterStepAlign(FitterStep):
         #    print("Linesearch Tolerance", LinesearchTolerance)
         #    print("Trust Region Size", TrustRegionSize)
 
-        result = optimisation.optimise()
-        if self.getDiagnosticLevel() > 1:
-            solutionReport = optimisation.getSolutionReport()
-            print(solutionReport)
+        result = self._optimise(optimisation)
         assert result == RESULT_OK, "Align:  Alignment to groups/markers optimisation failed"
 
         result1, self._rotation = rotation.evaluateReal(fieldcache, 3)
@@ -10,12 +10,17 @@ class FitterStepConfig(FitterStep):
 
     _jsonTypeId = "_FitterStepConfig"
     _centralProjectionToken = "centralProjection"
+    _dataDecimationToken = "dataDecimation"
+    _dataDecimationModes = ["none", "voxel", "poisson"]
     _dataProportionToken = "dataProportion"
     _outlierLengthToken = "outlierLength"
+    _outlierThresholdToken = "outlierThreshold"
+    _outlierThresholdModes = ["none", "percentile", "mad"]
 
     def __init__(self):
         super(FitterStepConfig, self).__init__()
         self._projectionCentreGroups = False
+        self._approximateProjectionResolution = 0.0
 
     @classmethod
     def getJsonTypeId(cls):
@@ -26,14 +31,43 @@ class FitterStepConfig(FitterStep):
         Decode definition of step from JSON dict.
         """
         super().decodeSettingsJSONDict(dctIn)  # to decode group settings
+        # ensure all new options are in dct
+        dct = self.encodeSettingsJSONDict()
+        dct.update(dctIn)
+        self._approximateProjectionResolution = dct["approximateProjectionResolution"]
 
     def encodeSettingsJSONDict(self) -> dict:
         """
         Encode definition of step in dict.
         :return: Settings in a dict ready for passing to json.dump.
         """
-        # only has group settings for now
-        return super().encodeSettingsJSONDict()
+        dct = super().encodeSettingsJSONDict()
+        dct.update({
+            "approximateProjectionResolution": self._approximateProjectionResolution
+            })
+        return dct
+
+    def getApproximateProjectionResolution(self):
+        return self._approximateProjectionResolution
+
+    def setApproximateProjectionResolution(self, approximateProjectionResolution):
+        """
+        Set resolution for approximate data projections made while this config is active, or 0.0 for exact
+        projections. Approximate projections sample the projection mesh groups at about this spacing into a
+        grid, and only search for each data point's location on the element with the nearest sample. This is
+        much faster on large meshes, but can give a location on a neighbouring element to the nearest one,
+        particularly on coarse resolutions. Suitable for early, coarse iterations. See
+        Fitter.getApproximateDataProjectionErrors for errors against exact projections.
+        :param approximateProjectionResolution: Float sample spacing > 0.0 as a proportion of the data scale,
+        or 0.0 (default) for exact projections.
+        :return: True if value changed, otherwise False.
+        """
+        assert approximateProjectionResolution >= 0.0, \
+            "FitterStepConfig: Approximate projection resolution must be non-negative"
+        if approximateProjectionResolution != self._approximateProjectionResolution:
+            self._approximateProjectionResolution = approximateProjectionResolution
+            return True
+        return False
 
     def clearGroupCentralProjection(self, groupName):
         """
@@ -70,6 +104,60 @@ class FitterStepConfig(FitterStep):
                 centralProjection = False
         self.setGroupSetting(groupName, self._centralProjectionToken, centralProjection)
 
+    def clearGroupDataDecimation(self, groupName):
+        """
+        Clear local group data decimation so fall back to global default.
+        :param groupName:  Exact model group name, or None for default group.
+        """
+        self.clearGroupSetting(groupName, self._dataDecimationToken)
+
+    @classmethod
+    def getDataDecimationModes(cls):
+        """
+        :return: List of valid data decimation mode names.
+        """
+        return cls._dataDecimationModes
+
+    def getGroupDataDecimation(self, groupName):
+        """
+        Get mode and spacing for thinning group data points when loaded, plus flags indicating where it
+        has been set. Only used in the initial config step, and takes effect on the next load.
+        Mode "voxel" keeps the point closest to the centre of each cube of side spacing containing points.
+        Mode "poisson" keeps points in order if no kept point is closer than spacing.
+        Spacing > 0.0 is absolute, < 0.0 is a negative proportion of the data scale.
+        Points in several groups are kept if any of their groups keeps them. Marker points are always kept.
+        If not set, gets value from default group.
+        :param groupName:  Exact model group name, or None for default group.
+        :return:  [mode, spacing], setLocally, inheritable.
+        Mode is "none" (default), "voxel" or "poisson".
+        The second return value is True if the value is set locally to a value
+        or None if reset locally.
+        The third return value is True if a previous config has set the value.
+        """
+        return self.getGroupSetting(groupName, self._dataDecimationToken, ["none", 0.0])
+
+    def setGroupDataDecimation(self, groupName, mode, spacing=0.0):
+        """
+        Set mode and spacing for thinning group data points when loaded, or reset to global default.
+        Only used in the initial config step, and takes effect on the next load.
+        :param groupName:  Exact model group name, or None for default group.
+        :param mode:  "none", "voxel", "poisson" or None to reset to global default ("none").
+        :param spacing:  Float spacing > 0.0 absolute, < 0.0 negative proportion of data scale.
+        Function ensures value is valid.
+        """
+        if mode is None:
+            decimation = None
+        else:
+            if mode not in self._dataDecimationModes:
+                mode = self.getGroupDataDecimation(groupName)[0][0]
+            if isinstance(spacing, int):
+                spacing = float(spacing)
+            if (not isinstance(spacing, float)) or (spacing == 0.0) or (mode == "none"):
+                spacing = 0.0
+                mode = "none"
+            decimation = [mode, spacing]
+        self.setGroupSetting(groupName, self._dataDecimationToken, decimation)
+
     def clearGroupDataProportion(self, groupName):
         """
         Clear local group data proportion so fall back to last config or global default.
@@ -151,6 +239,65 @@ class FitterStepConfig(FitterStep):
                 outlierLength = -1.0
         self.setGroupSetting(groupName, self._outlierLengthToken, outlierLength)
 
+    def clearGroupOutlierThreshold(self, groupName):
+        """
+        Clear local group outlier threshold so fall back to last config or global default.
+        :param groupName:  Exact model group name, or None for default group.
+        """
+        self.clearGroupSetting(groupName, self._outlierThresholdToken)
+
+    @classmethod
+    def getOutlierThresholdModes(cls):
+        """
+        :return: List of valid outlier threshold mode names.
+        """
+        return cls._outlierThresholdModes
+
+    def getGroupOutlierThreshold(self, groupName):
+        """
+        Get mode and value for a statistical threshold on the data projection lengths of the group above
+        which data points are treated as outliers and not included in the fit, plus flags indicating where
+        it has been set. Applied in addition to any outlier length.
+        Mode "percentile" excludes data points with projection length above the value percentile, from 0.0
+        to 100.0, of the group's projection lengths.
+        Mode "mad" excludes data points with projection length more than value median absolute deviations
+        above the median, with the deviation scaled by 1.4826 to match the standard deviation of normally
+        distributed lengths.
+        If not set or inherited, gets value from default group.
+        :param groupName:  Exact model group name, or None for default group.
+        :return:  [mode, value], setLocally, inheritable.
+        Mode is "none" (default), "percentile" or "mad".
+        The second return value is True if the value is set locally to a value
+        or None if reset locally.
+        The third return value is True if a previous config has set the value.
+        """
+        return self.getGroupSetting(groupName, self._outlierThresholdToken, ["none", 0.0])
+
+    def setGroupOutlierThreshold(self, groupName, mode, value=0.0):
+        """
+        Set mode and value for a statistical threshold on the data projection lengths of the group above
+        which data points are treated as outliers, or reset to global default.
+        :param groupName:  Exact model group name, or None for default group.
+        :param mode:  "none", "percentile", "mad" or None to reset to global default ("none").
+        :param value:  Float percentile from 0.0 to 100.0, or number of median absolute deviations >= 0.0.
+        Function ensures value is valid.
+        """
+        if mode is None:
+            threshold = None
+        else:
+            if mode not in self._outlierThresholdModes:
+                mode = self.getGroupOutlierThreshold(groupName)[0][0]
+            if isinstance(value, int):
+                value = float(value)
+            if (not isinstance(value, float)) or (mode == "none"):
+                value = 0.0
+            elif value < 0.0:
+                value = 0.0
+            elif (mode == "percentile") and (value > 100.0):
+                value = 100.0
+            threshold = [mode, value]
+        self.setGroupSetting(groupName, self._outlierThresholdToken, threshold)
+
     def run(self, modelFileNameStem=None):
         """
         Calculate data projections with current settings.
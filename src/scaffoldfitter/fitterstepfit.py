@@ -2,6 +2,7 @@
 Fit step for gross alignment and scale.
 """
 
+from cmlibs.maths.vectorops import magnitude, sub
 from cmlibs.utils.zinc.general import ChangeManager
 from cmlibs.zinc.optimisation import Optimisation
 from cmlibs.zinc.result import RESULT_OK
@@ -23,6 +24,14 @@ class FitterStepFit(FitterStep):
         self._numberOfIterations = 1
         self._maximumSubIterations = 1
         self._updateReferenceState = False
+        self._incrementalProjection = False
+        self._reprojectionTolerance = 0.0
+        self._dataSamplingSchedule = []
+        self._convergenceObjectiveTolerance = 0.0
+        self._convergenceRMSErrorTolerance = 0.0
+        self._convergenceDisplacementTolerance = 0.0
+        self._dataSamplingReport = []
+        self._numberOfIterationsUsed = 0
 
     @classmethod
     def getJsonTypeId(cls):
@@ -39,6 +48,12 @@ class FitterStepFit(FitterStep):
         self._numberOfIterations = dct["numberOfIterations"]
         self._maximumSubIterations = dct["maximumSubIterations"]
         self._updateReferenceState = dct["updateReferenceState"]
+        self._incrementalProjection = dct["incrementalProjection"]
+        self._reprojectionTolerance = dct["reprojectionTolerance"]
+        self._dataSamplingSchedule = dct["dataSamplingSchedule"]
+        self._convergenceObjectiveTolerance = dct["convergenceObjectiveTolerance"]
+        self._convergenceRMSErrorTolerance = dct["convergenceRMSErrorTolerance"]
+        self._convergenceDisplacementTolerance = dct["convergenceDisplacementTolerance"]
 
     def encodeSettingsJSONDict(self) -> dict:
         """
@@ -49,7 +64,13 @@ class FitterStepFit(FitterStep):
         dct.update({
             "numberOfIterations": self._numberOfIterations,
             "maximumSubIterations": self._maximumSubIterations,
-            "updateReferenceState": self._updateReferenceState
+            "updateReferenceState": self._updateReferenceState,
+            "incrementalProjection": self._incrementalProjection,
+            "reprojectionTolerance": self._reprojectionTolerance,
+            "dataSamplingSchedule": self._dataSamplingSchedule,
+            "convergenceObjectiveTolerance": self._convergenceObjectiveTolerance,
+            "convergenceRMSErrorTolerance": self._convergenceRMSErrorTolerance,
+            "convergenceDisplacementTolerance": self._convergenceDisplacementTolerance
             })
         return dct
 
@@ -314,6 +335,179 @@ class FitterStepFit(FitterStep):
             return True
         return False
 
+    def isIncrementalProjection(self):
+        return self._incrementalProjection
+
+    def setIncrementalProjection(self, incrementalProjection):
+        """
+        Set whether data projections recalculated after each iteration start from each data point's current
+        host element, searching only a patch of elements adjacent to it and falling back to a search of the
+        whole group only if the nearest location in the patch is on its boundary. Much faster for large meshes
+        when the fit is converging, but can stay in a local minimum of projection distance.
+        :param incrementalProjection: True to use incremental projections, False to reproject from scratch
+        (default).
+        :return: True if value changed, otherwise False.
+        """
+        if incrementalProjection != self._incrementalProjection:
+            self._incrementalProjection = incrementalProjection
+            return True
+        return False
+
+    def getReprojectionTolerance(self):
+        return self._reprojectionTolerance
+
+    def setReprojectionTolerance(self, reprojectionTolerance):
+        """
+        Set tolerance on displacement of model elements between iterations below which data points projected
+        onto them keep their location and orientation. A data point is reprojected if any model coordinates
+        parameter of its host element or elements sharing nodes with it has changed by at least the tolerance
+        since it was last projected. See Fitter.getDataProjectionCounts for numbers kept and recalculated.
+        :param reprojectionTolerance: Float tolerance >= 0.0 relative to data scale, or 0.0 to reproject all
+        data points (default).
+        :return: True if value changed, otherwise False.
+        """
+        assert reprojectionTolerance >= 0.0
+        if reprojectionTolerance != self._reprojectionTolerance:
+            self._reprojectionTolerance = reprojectionTolerance
+            return True
+        return False
+
+    def getConvergenceObjectiveTolerance(self):
+        return self._convergenceObjectiveTolerance
+
+    def setConvergenceObjectiveTolerance(self, convergenceObjectiveTolerance):
+        """
+        Set tolerance on relative change in data objective over an iteration, below which the fit is converged.
+        Iterations stop early when all non-zero convergence tolerances are met; see getNumberOfIterationsUsed.
+        :param convergenceObjectiveTolerance: Float tolerance >= 0.0, or 0.0 for no criterion (default).
+        :return: True if value changed, otherwise False.
+        """
+        assert convergenceObjectiveTolerance >= 0.0, "FitterStepFit: Convergence tolerance must be >= 0.0"
+        if convergenceObjectiveTolerance != self._convergenceObjectiveTolerance:
+            self._convergenceObjectiveTolerance = convergenceObjectiveTolerance
+            return True
+        return False
+
+    def getConvergenceRMSErrorTolerance(self):
+        return self._convergenceRMSErrorTolerance
+
+    def setConvergenceRMSErrorTolerance(self, convergenceRMSErrorTolerance):
+        """
+        Set tolerance on change in RMS data projection error over an iteration, below which the fit is converged.
+        :param convergenceRMSErrorTolerance: Float tolerance >= 0.0 relative to data scale, or 0.0 for no
+        criterion (default).
+        :return: True if value changed, otherwise False.
+        """
+        assert convergenceRMSErrorTolerance >= 0.0, "FitterStepFit: Convergence tolerance must be >= 0.0"
+        if convergenceRMSErrorTolerance != self._convergenceRMSErrorTolerance:
+            self._convergenceRMSErrorTolerance = convergenceRMSErrorTolerance
+            return True
+        return False
+
+    def getConvergenceDisplacementTolerance(self):
+        return self._convergenceDisplacementTolerance
+
+    def setConvergenceDisplacementTolerance(self, convergenceDisplacementTolerance):
+        """
+        Set tolerance on maximum displacement of model nodes over an iteration, below which the fit is converged.
+        :param convergenceDisplacementTolerance: Float tolerance >= 0.0 relative to data scale, or 0.0 for no
+        criterion (default).
+        :return: True if value changed, otherwise False.
+        """
+        assert convergenceDisplacementTolerance >= 0.0, "FitterStepFit: Convergence tolerance must be >= 0.0"
+        if convergenceDisplacementTolerance != self._convergenceDisplacementTolerance:
+            self._convergenceDisplacementTolerance = convergenceDisplacementTolerance
+            return True
+        return False
+
+    def getNumberOfIterationsUsed(self):
+        """
+        :return: Number of iterations performed in the last run, fewer than the number of iterations if
+        convergence criteria were met. 0 if not run.
+        """
+        return self._numberOfIterationsUsed
+
+    def _getConvergenceValues(self, dataObjective, fieldcache):
+        """
+        Get values needed to test convergence with the data objective over all active data.
+        :return: data objective, RMS error, dict node identifier -> model coordinates or None if not needed.
+        """
+        objective = None
+        if self._convergenceObjectiveTolerance > 0.0:
+            result, objective = dataObjective.evaluateReal(fieldcache, 1)
+        rmsError = None
+        if self._convergenceRMSErrorTolerance > 0.0:
+            rmsError = self._fitter.getDataRMSAndMaximumProjectionError()[0]
+        nodeCoordinates = None
+        if self._convergenceDisplacementTolerance > 0.0:
+            nodeCoordinates = self._fitter.getModelNodeCoordinates()
+        return objective, rmsError, nodeCoordinates
+
+    def _isConverged(self, lastConvergenceValues, convergenceValues):
+        """
+        :return: True if all non-zero convergence tolerances are met between the values before and after an
+        iteration, from _getConvergenceValues.
+        """
+        lastObjective, lastRMSError, lastNodeCoordinates = lastConvergenceValues
+        objective, rmsError, nodeCoordinates = convergenceValues
+        dataScale = self._fitter.getDataScale()
+        if self._convergenceObjectiveTolerance > 0.0:
+            if abs(objective - lastObjective) > (self._convergenceObjectiveTolerance * abs(lastObjective)):
+                return False
+        if self._convergenceRMSErrorTolerance > 0.0:
+            if (rmsError is None) or (lastRMSError is None) or \
+                    (abs(rmsError - lastRMSError) > (self._convergenceRMSErrorTolerance * dataScale)):
+                return False
+        if self._convergenceDisplacementTolerance > 0.0:
+            maximumDisplacement = 0.0
+            for nodeIdentifier, x in nodeCoordinates.items():
+                lastX = lastNodeCoordinates.get(nodeIdentifier)
+                if lastX:
+                    maximumDisplacement = max(maximumDisplacement, magnitude(sub(x, lastX)))
+            if maximumDisplacement > (self._convergenceDisplacementTolerance * dataScale):
+                return False
+        return True
+
+    def getDataSamplingSchedule(self):
+        return self._dataSamplingSchedule[:]
+
+    def setDataSamplingSchedule(self, dataSamplingSchedule):
+        """
+        Set proportions of the active data to fit in the first iterations, e.g. [0.05, 0.25] fits 5% of the data
+        in the first iteration, 25% in the second and all data in later iterations. Samples are stratified by
+        host element and include all marker points; see Fitter.assignActiveDataSample. Only data points in the
+        sample for the next iteration are reprojected after each iteration, and the data objective is scaled
+        by the inverse of the proportion to keep its balance with penalties. The final iteration always uses
+        and reprojects all data. See getDataSamplingReport for the objective and errors in each iteration.
+        :param dataSamplingSchedule: List of proportions 0.0 < proportion <= 1.0 for the first iterations,
+        or empty list to fit all data in all iterations (default).
+        :return: True if value changed, otherwise False.
+        """
+        assert all((0.0 < proportion <= 1.0) for proportion in dataSamplingSchedule), \
+            "FitterStepFit: Data sampling proportions must be > 0.0 and <= 1.0"
+        dataSamplingSchedule = [float(proportion) for proportion in dataSamplingSchedule]
+        if dataSamplingSchedule != self._dataSamplingSchedule:
+            self._dataSamplingSchedule = dataSamplingSchedule
+            return True
+        return False
+
+    def _getIterationDataProportion(self, iterationIndex):
+        """
+        :return: Proportion of active data to fit in iteration from data sampling schedule, 1.0 in last iteration.
+        """
+        if (iterationIndex < len(self._dataSamplingSchedule)) and (iterationIndex < (self._numberOfIterations - 1)):
+            return self._dataSamplingSchedule[iterationIndex]
+        return 1.0
+
+    def getDataSamplingReport(self):
+        """
+        Get report of iterations in the last run with a data sampling schedule.
+        :return: List over iterations of (proportion, number of data points fitted, scaled data objective,
+        RMS error, maximum error) with data objective and errors for the data points fitted after optimisation,
+        before reprojection. Empty if no data sampling schedule.
+        """
+        return self._dataSamplingReport
+
     def run(self, modelFileNameStem=None):
         """
         Fit model geometry parameters to data.
@@ -332,8 +526,18 @@ class FitterStepFit(FitterStep):
         optimisation.setAttributeInteger(Optimisation.ATTRIBUTE_MAXIMUM_ITERATIONS, self._maximumSubIterations)
 
         deformationPenaltyObjective = None
+        samplingNodesetGroup = None
+        self._dataSamplingReport = []
         with ChangeManager(fieldmodule):
-            dataObjective = self.createDataObjectiveField()
+            if self._dataSamplingSchedule:
+                # fit to data points in sampling group, with objective scaled by inverse of sampled proportion
+                samplingGroup = fieldmodule.createFieldGroup()
+                samplingNodesetGroup = samplingGroup.createNodesetGroup(
+                    self._fitter.getActiveDataNodesetGroup().getMasterNodeset())
+                samplingScale = fieldmodule.createFieldConstant([1.0])
+                dataObjective = self.createDataObjectiveField(samplingNodesetGroup) * samplingScale
+            else:
+                dataObjective = self.createDataObjectiveField()
             result = optimisation.addObjectiveField(dataObjective)
             assert result == RESULT_OK, "Fit Geometry:  Could not add data objective field"
             deformationPenaltyObjective = self.createDeformationPenaltyObjectiveField(
@@ -348,10 +552,23 @@ class FitterStepFit(FitterStep):
 
         fieldcache = fieldmodule.createFieldcache()
         objectiveFormat = "{:12e}"
+        proportion = self._getIterationDataProportion(0)
+        if samplingNodesetGroup:
+            self._fitter.assignActiveDataSample(samplingNodesetGroup, proportion)
+            samplingScale.assignReal(fieldcache, [1.0 / proportion])
+        # convergence is only tested over iterations fitting all data
+        checkConvergence = (self._convergenceObjectiveTolerance > 0.0) or \
+            (self._convergenceRMSErrorTolerance > 0.0) or (self._convergenceDisplacementTolerance > 0.0)
+        lastConvergenceValues = self._getConvergenceValues(dataObjective, fieldcache) \
+            if (checkConvergence and (proportion == 1.0)) else None
+        self._numberOfIterationsUsed = 0
         for iterationIndex in range(self._numberOfIterations):
             iterName = str(iterationIndex + 1)
+            iterationProportion = proportion
             if self.getDiagnosticLevel() > 0:
                 print("-------- Iteration " + iterName)
+                if samplingNodesetGroup:
+                    print("    Fitting proportion", proportion, "of data:", samplingNodesetGroup.getSize(), "points")
             if self.getDiagnosticLevel() > 0:
                 result, objective = dataObjective.evaluateReal(fieldcache, 1)
                 print("    Data objective", objectiveFormat.format(objective))
@@ -363,14 +580,43 @@ class FitterStepFit(FitterStep):
                     result, objective = flattenGroupObjective.evaluateReal(
                         fieldcache, flattenGroupObjective.getNumberOfComponents())
                     print("    Flatten group objective", objectiveFormat.format(objective))
-            result = optimisation.optimise()
-            if self.getDiagnosticLevel() > 1:
-                solutionReport = optimisation.getSolutionReport()
-                print(solutionReport)
+            # Zinc's Newton method solves once per optimise call, so each call in this loop is one sub-iteration
+            result = self._optimise(optimisation, subIterationsCount=1)
             assert result == RESULT_OK, "Fit Geometry:  Optimisation failed with result " + str(result)
-            self._fitter.calculateDataProjections(self)
+            if samplingNodesetGroup:
+                result, objective = dataObjective.evaluateReal(fieldcache, 1)
+                self._dataSamplingReport.append(
+                    (proportion, samplingNodesetGroup.getSize(), objective) +
+                    tuple(self._fitter.getDataRMSAndMaximumProjectionError(samplingNodesetGroup)))
+                if self.getDiagnosticLevel() > 0:
+                    print("    Sampled data objective", objectiveFormat.format(objective),
+                          "RMS error", self._dataSamplingReport[-1][3], "maximum", self._dataSamplingReport[-1][4])
+                proportion = self._getIterationDataProportion(iterationIndex + 1)
+                if proportion < 1.0:
+                    # only reproject data sampled for next iteration
+                    self._fitter.assignActiveDataSample(samplingNodesetGroup, proportion)
+                    self._fitter.calculateDataProjections(self, samplingNodesetGroup)
+                    samplingNodesetGroup.removeNodesConditional(
+                        fieldmodule.createFieldNot(self._fitter.getActiveDataNodesetGroup().getFieldGroup()))
+                else:
+                    self._fitter.calculateDataProjections(self)
+                    self._fitter.assignActiveDataSample(samplingNodesetGroup, proportion)
+                samplingScale.assignReal(fieldcache, [1.0 / proportion])
+            else:
+                self._fitter.calculateDataProjections(self)
             if modelFileNameStem:
                 self._fitter.writeModel(modelFileNameStem + "_fit" + iterName + ".exf")
+            self._numberOfIterationsUsed = iterationIndex + 1
+            if checkConvergence:
+                # proportion is now for next iteration
+                convergenceValues = self._getConvergenceValues(dataObjective, fieldcache) \
+                    if (proportion == 1.0) else None
+                if (iterationProportion == 1.0) and lastConvergenceValues and convergenceValues and \
+                        self._isConverged(lastConvergenceValues, convergenceValues):
+                    if self.getDiagnosticLevel() > 0:
+                        print("    Converged after", self._numberOfIterationsUsed, "iterations")
+                    break
+                lastConvergenceValues = convergenceValues
 
         if self.getDiagnosticLevel() > 0:
             print("--------")
@@ -392,10 +638,11 @@ class FitterStepFit(FitterStep):
 
         self.setHasRun(True)
 
-    def createDataObjectiveField(self):
+    def createDataObjectiveField(self, dataNodesetGroup=None):
         """
         Get FieldNodesetSum objective for data projected onto mesh, including markers with fixed locations.
         Assumes ChangeManager(fieldmodule) is in effect.
+        :param dataNodesetGroup: Optional NodesetGroup of data points to sum over, by default the active data.
         :return: Zinc FieldNodesetSum.
         """
         fieldmodule = self._fitter.getFieldmodule()
@@ -411,7 +658,7 @@ class FitterStepFit(FitterStep):
         deltaSq = fieldmodule.createFieldMultiply(orientedDelta, orientedDelta)
         weightedDeltaSq = fieldmodule.createFieldDotProduct(weight, deltaSq)
         dataProjectionObjective = fieldmodule.createFieldNodesetSum(
-            weightedDeltaSq, self._fitter.getActiveDataNodesetGroup())
+            weightedDeltaSq, dataNodesetGroup if dataNodesetGroup else self._fitter.getActiveDataNodesetGroup())
         dataProjectionObjective.setElementMapField(self._fitter.getDataHostLocationField())
         return dataProjectionObjective
 
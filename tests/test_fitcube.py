@@ -1,13 +1,15 @@
+import json
 import math
 import os
 import unittest
 from cmlibs.utils.zinc.field import createFieldMeshIntegral
 from cmlibs.utils.zinc.finiteelement import evaluate_field_nodeset_mean, find_node_with_name, evaluate_field_nodeset_range
+from cmlibs.utils.zinc.general import ChangeManager
 from cmlibs.utils.zinc.region import write_to_buffer, read_from_buffer
 from cmlibs.zinc.context import Context
 from cmlibs.zinc.field import Field
 from cmlibs.zinc.node import Node, Nodeset
-from cmlibs.zinc.result import RESULT_OK
+from cmlibs.zinc.result import RESULT_OK, RESULT_WARNING_PART_DONE
 from scaffoldfitter.fitter import Fitter
 from scaffoldfitter.fitterjson import decodeJSONFitterSteps
 from scaffoldfitter.fitterstepalign import FitterStepAlign, createFieldsTransformations
@@ -785,6 +787,636 @@ class FitCubeToSphereTestCase(unittest.TestCase):
                 self.assertAlmostEqual(expectedLocation[1][1], xi[1], delta=TOL)
                 self.assertAlmostEqual(expectedLocation[1][2], xi[2], delta=TOL)
 
+    def test_dataDecimation(self):
+        """
+        Test voxel and poisson decimation of data points on load.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_random.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        config1 = fitter.getInitialFitterStepConfig()
+        self.assertEqual((["none", 0.0], False, False), config1.getGroupDataDecimation(None))
+        config1.setGroupDataDecimation(None, "poisson", -0.25)
+        config1.setGroupDataDecimation("sides", "voxel", 0.1)
+        config1.setGroupDataDecimation("top", "none")
+        config1.setGroupDataDecimation("bottom", "invalid", 0.2)
+        self.assertEqual((["poisson", -0.25], True, False), config1.getGroupDataDecimation(None))
+        self.assertEqual((["voxel", 0.1], True, False), config1.getGroupDataDecimation("sides"))
+        self.assertEqual((["none", 0.0], True, False), config1.getGroupDataDecimation("top"))
+        self.assertEqual((["poisson", 0.2], True, False), config1.getGroupDataDecimation("bottom"))
+        config1.clearGroupDataDecimation("bottom")
+        self.assertEqual((["poisson", -0.25], False, False), config1.getGroupDataDecimation("bottom"))
+
+        # check settings are serialised
+        s = fitter.encodeSettingsJSON()
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.decodeSettingsJSON(s, decodeJSONFitterSteps)
+        self.assertEqual((["voxel", 0.1], True, False),
+                         fitter.getInitialFitterStepConfig().getGroupDataDecimation("sides"))
+
+        fitter.load()
+        self.assertEqual({"bottom": (25, 5), "sides": (111, 89)}, fitter.getDataDecimationReport())
+        fieldmodule = fitter.getFieldmodule()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        self.assertEqual(124, datapoints.getSize())
+        self.assertEqual(4, fitter.getMarkerGroup().getNodesetGroup(datapoints).getSize())
+        self.assertEqual(26, fieldmodule.findFieldByName("top").castGroup().getNodesetGroup(datapoints).getSize())
+        # poisson decimated points are further apart than spacing
+        dataCoordinates = fitter.getDataCoordinatesField()
+        fieldcache = fieldmodule.createFieldcache()
+        bottomPoints = []
+        bottomGroup = fieldmodule.findFieldByName("bottom").castGroup()
+        nodeiterator = bottomGroup.getNodesetGroup(datapoints).createNodeiterator()
+        node = nodeiterator.next()
+        while node.isValid():
+            fieldcache.setNode(node)
+            bottomPoints.append(dataCoordinates.evaluateReal(fieldcache, 3)[1])
+            node = nodeiterator.next()
+        spacing = 0.25 * fitter.getDataScale()
+        for i in range(len(bottomPoints)):
+            for j in range(i):
+                self.assertGreaterEqual(math.dist(bottomPoints[i], bottomPoints[j]), spacing)
+
+    def test_dataProjectionSpatialIndex(self):
+        """
+        Test data projections with spatial index give the same fit as searching all elements.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        results = []
+        for spatialIndex in (False, True):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fitter.setDataProjectionSpatialIndex(spatialIndex)
+            self.assertEqual(spatialIndex, fitter.isDataProjectionSpatialIndex())
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.01])
+            fit1.setGroupCurvaturePenalty(None, [0.01])
+            fit1.setNumberOfIterations(2)
+            fitter.load()
+            loadErrors = fitter.getDataRMSAndMaximumProjectionError()
+            fitter.run()
+            results.append((fitter.getActiveDataNodesetGroup().getSize(), loadErrors,
+                            fitter.getDataRMSAndMaximumProjectionError()))
+        self.assertEqual(results[0][0], results[1][0])
+        for i in range(1, 3):
+            for expectedError, error in zip(results[0][i], results[1][i]):
+                self.assertAlmostEqual(expectedError, error, delta=1.0E-10)
+
+    def test_approximateProjection(self):
+        """
+        Test approximate data projections are close to exact projections and report their errors.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.load()
+        exactErrors = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertEqual({}, fitter.getApproximateDataProjectionErrors())
+        config = fitter.getInitialFitterStepConfig()
+        self.assertEqual(0.0, config.getApproximateProjectionResolution())
+        self.assertTrue(config.setApproximateProjectionResolution(0.02))
+        self.assertFalse(config.setApproximateProjectionResolution(0.02))
+        self.assertEqual(0.02, config.getApproximateProjectionResolution())
+        self.assertEqual(0.02, config.encodeSettingsJSONDict()["approximateProjectionResolution"])
+        fitter.calculateDataProjections(config)
+        self.assertEqual(292, fitter.getActiveDataNodesetGroup().getSize())
+        rmsError, maxError = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertGreaterEqual(rmsError, exactErrors[0] - 1.0E-12)
+        self.assertAlmostEqual(rmsError, exactErrors[0], delta=0.01 * fitter.getDataScale())
+        errors = fitter.getApproximateDataProjectionErrors()
+        self.assertTrue(errors)
+        for sampledCount, rmsIncrease, maxIncrease in errors.values():
+            self.assertGreater(sampledCount, 0)
+            self.assertLessEqual(rmsIncrease, maxIncrease)
+            self.assertLess(maxIncrease, 0.05 * fitter.getDataScale())
+        config.setApproximateProjectionResolution(0.0)
+        fitter.calculateDataProjections(config)
+        self.assertEqual({}, fitter.getApproximateDataProjectionErrors())
+        for error, exactError in zip(fitter.getDataRMSAndMaximumProjectionError(), exactErrors):
+            self.assertAlmostEqual(error, exactError, delta=1.0E-12)
+
+    def test_incrementalProjection(self):
+        """
+        Test incremental data projections between fit iterations give the same fit as full reprojection.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        results = []
+        for incrementalProjection in (False, True):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.01])
+            fit1.setGroupCurvaturePenalty(None, [0.01])
+            fit1.setNumberOfIterations(3)
+            self.assertEqual(incrementalProjection, fit1.setIncrementalProjection(incrementalProjection))
+            self.assertEqual(incrementalProjection, fit1.isIncrementalProjection())
+            fitter.load()
+            fitter.run()
+            results.append((fitter.getActiveDataNodesetGroup().getSize(),
+                            fitter.getDataRMSAndMaximumProjectionError()))
+        self.assertEqual(results[0][0], results[1][0])
+        for expectedError, error in zip(results[0][1], results[1][1]):
+            self.assertAlmostEqual(expectedError, error, delta=1.0E-10)
+        # check setting is serialised
+        s = fitter.encodeSettingsJSON()
+        fitter2 = Fitter(zinc_model_file, zinc_data_file)
+        fitter2.decodeSettingsJSON(s, decodeJSONFitterSteps)
+        self.assertTrue(fitter2.getFitterSteps()[1].isIncrementalProjection())
+
+    def test_dataSamplingSchedule(self):
+        """
+        Test fitting a progressively larger sample of data in early iterations, with all data in the last.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        results = []
+        for dataSamplingSchedule in ([], [0.25, 0.5]):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.01])
+            fit1.setGroupCurvaturePenalty(None, [0.01])
+            fit1.setNumberOfIterations(3)
+            self.assertEqual(bool(dataSamplingSchedule), fit1.setDataSamplingSchedule(dataSamplingSchedule))
+            self.assertEqual(dataSamplingSchedule, fit1.getDataSamplingSchedule())
+            fitter.load()
+            fitter.run()
+            results.append(fitter.getDataRMSAndMaximumProjectionError())
+        activeDataCount = fitter.getActiveDataNodesetGroup().getSize()
+        report = fit1.getDataSamplingReport()
+        self.assertEqual(3, len(report))
+        self.assertEqual([0.25, 0.5, 1.0], [iteration[0] for iteration in report])
+        self.assertLess(report[0][1], report[1][1])
+        self.assertEqual(activeDataCount, report[2][1])
+        for iteration in report:
+            self.assertGreater(iteration[2], 0.0)
+            self.assertLessEqual(iteration[3], iteration[4])
+        self.assertAlmostEqual(results[0][0], results[1][0], delta=0.01 * fitter.getDataScale())
+        with self.assertRaises(AssertionError):
+            fit1.setDataSamplingSchedule([0.0])
+        # check setting is serialised
+        s = fitter.encodeSettingsJSON()
+        fitter2 = Fitter(zinc_model_file, zinc_data_file)
+        fitter2.decodeSettingsJSON(s, decodeJSONFitterSteps)
+        self.assertEqual([0.25, 0.5], fitter2.getFitterSteps()[1].getDataSamplingSchedule())
+
+    def test_convergenceTermination(self):
+        """
+        Test iterations stop early once convergence tolerances are met.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        results = []
+        for converge in (False, True):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.01])
+            fit1.setGroupCurvaturePenalty(None, [0.01])
+            fit1.setNumberOfIterations(10)
+            if converge:
+                self.assertTrue(fit1.setConvergenceObjectiveTolerance(0.01))
+                self.assertTrue(fit1.setConvergenceRMSErrorTolerance(0.001))
+                self.assertTrue(fit1.setConvergenceDisplacementTolerance(0.25))
+            self.assertEqual(0.25 if converge else 0.0, fit1.getConvergenceDisplacementTolerance())
+            self.assertEqual(0, fit1.getNumberOfIterationsUsed())
+            fitter.load()
+            fitter.run()
+            results.append((fit1.getNumberOfIterationsUsed(), fitter.getDataRMSAndMaximumProjectionError()))
+        self.assertEqual(10, results[0][0])
+        self.assertLess(results[1][0], 10)
+        self.assertGreater(results[1][0], 1)
+        self.assertAlmostEqual(results[0][1][0], results[1][1][0], delta=0.01 * fitter.getDataScale())
+        with self.assertRaises(AssertionError):
+            fit1.setConvergenceObjectiveTolerance(-1.0)
+        # check settings are serialised
+        s = fitter.encodeSettingsJSON()
+        fitter2 = Fitter(zinc_model_file, zinc_data_file)
+        fitter2.decodeSettingsJSON(s, decodeJSONFitterSteps)
+        fit2 = fitter2.getFitterSteps()[1]
+        self.assertEqual(0.01, fit2.getConvergenceObjectiveTolerance())
+        self.assertEqual(0.001, fit2.getConvergenceRMSErrorTolerance())
+        self.assertEqual(0.25, fit2.getConvergenceDisplacementTolerance())
+
+    def test_timingReport(self):
+        """
+        Test wall times and counts of fit phases are recorded per step when timing is enabled.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        self.assertFalse(fitter.isTimingEnabled())
+        self.assertIsNone(fitter.getTimingReport())
+        fitter.setTimingEnabled(True)
+        self.assertTrue(fitter.isTimingEnabled())
+        align = FitterStepAlign()
+        fitter.addFitterStep(align)
+        align.setAlignMarkers(True)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupCurvaturePenalty(None, [0.01])
+        fit1.setNumberOfIterations(2)
+        fitter.load()
+        fitter.run()
+        report = fitter.getTimingReport()
+        self.assertEqual(["loadData", "loadModel"], sorted(report["load"].keys()))
+        self.assertEqual(1, report["load"]["loadModel"]["calls"])
+        self.assertEqual([0, 1, 2], [step["index"] for step in report["steps"]])
+        self.assertEqual(["_FitterStepConfig", "_FitterStepAlign", "_FitterStepFit"],
+                         [step["type"] for step in report["steps"]])
+        projections = report["steps"][0]["phases"]["calculateDataProjections"]
+        self.assertEqual(1, projections["calls"])
+        self.assertEqual(["bottom", "sides", "top"], sorted(projections["groups"].keys()))
+        self.assertLessEqual(sum(group["time"] for group in projections["groups"].values()), projections["time"])
+        alignOptimise = report["steps"][1]["phases"]["optimise"]
+        self.assertEqual(1, alignOptimise["calls"])
+        fitPhases = report["steps"][2]["phases"]
+        for phaseName, calls in (("assignDataWeights", 1), ("assignDeformationPenalties", 1), ("optimise", 2),
+                                 ("calculateDataProjections", 2), ("run", 1)):
+            self.assertEqual(calls, fitPhases[phaseName]["calls"])
+            self.assertGreater(fitPhases[phaseName]["time"], 0.0)
+        self.assertLessEqual(fitPhases["optimise"]["time"], fitPhases["run"]["time"])
+        self.assertEqual(report, json.loads(fitter.getTimingReportJSON()))
+        # calls outside steps are recorded separately
+        fitter.calculateDataProjections(fit1)
+        self.assertEqual(1, report["other"]["calculateDataProjections"]["calls"])
+        fitter.clearTimingReport()
+        self.assertEqual({"load": {}, "steps": [], "other": {}}, fitter.getTimingReport())
+        fitter.setTimingEnabled(False)
+        fitter.calculateDataProjections(fit1)
+        self.assertEqual({"load": {}, "steps": [], "other": {}}, fitter.getTimingReport())
+
+    def test_timingReportSubIterations(self):
+        """
+        Test sub-iterations of fit steps are counted in the timing report, including with data sampling.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.setTimingEnabled(True)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupCurvaturePenalty(None, [0.01])
+        fit1.setNumberOfIterations(3)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        fit2.setNumberOfIterations(2)
+        fit2.setDataSamplingSchedule([0.5])
+        fitter.load()
+        fitter.run()
+        report = fitter.getTimingReport()
+        fitOptimise = report["steps"][1]["phases"]["optimise"]
+        self.assertEqual(3, fitOptimise["calls"])
+        self.assertEqual(3, fitOptimise["subIterations"])
+        samplingOptimise = report["steps"][2]["phases"]["optimise"]
+        self.assertEqual(2, samplingOptimise["calls"])
+        self.assertEqual(2, samplingOptimise["subIterations"])
+        fitter.cleanup()
+
+    def test_groupDeformationPenalties(self):
+        """
+        Test strain and curvature penalties are resolved from the first group with them set, and updated when
+        group membership changes.
+        """
+        zinc_model_file = os.path.join(here, "resources", "two_cubes_hermite_nocross_groups.exf")
+        zinc_data_file = os.path.join(here, "resources", "two_cubes_ellipsoid_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        mesh = fitter.getHighestDimensionMesh()
+        self.assertEqual(2, mesh.getSize())
+        element1 = mesh.findElementByIdentifier(1)
+        element2 = mesh.findElementByIdentifier(2)
+        bothGroup = fieldmodule.createFieldGroup()
+        bothGroup.setName("both")
+        bothGroup.setManaged(True)
+        bothGroup.createMeshGroup(mesh).addElementsConditional(fieldmodule.createFieldConstant(1.0))
+        oneMeshGroup = fieldmodule.findFieldByName("one").castGroup().getMeshGroup(mesh)
+        twoMeshGroup = fieldmodule.findFieldByName("two").castGroup().getMeshGroup(mesh)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupStrainPenalty("both", [0.2])
+        fit1.setGroupStrainPenalty("one", [0.1])
+        fit1.setGroupCurvaturePenalty("two", [0.5])
+        fieldcache = fieldmodule.createFieldcache()
+
+        def getElementPenalties():
+            penalties = []
+            for element in (element1, element2):
+                fieldcache.setElement(element)
+                result, strainPenalty = fitter.getStrainPenaltyField().evaluateReal(fieldcache, 9)
+                self.assertEqual(RESULT_OK, result)
+                result, curvaturePenalty = fitter.getCurvaturePenaltyField().evaluateReal(fieldcache, 27)
+                self.assertEqual(RESULT_OK, result)
+                penalties.append((strainPenalty[0], curvaturePenalty[0]))
+            return penalties
+
+        # penalty from first group in order with it set is used
+        deformActiveMeshGroup, strainActiveMeshGroup, curvatureActiveMeshGroup = \
+            fitter.assignDeformationPenalties(fit1)
+        self.assertEqual([(0.2, 0.0), (0.2, 0.5)], getElementPenalties())
+        self.assertEqual(2, deformActiveMeshGroup.getSize())
+        self.assertEqual(2, strainActiveMeshGroup.getSize())
+        self.assertEqual(1, curvatureActiveMeshGroup.getSize())
+        fit1.clearGroupStrainPenalty("both")
+        fitter.assignDeformationPenalties(fit1)
+        self.assertEqual([(0.1, 0.0), (0.01, 0.5)], getElementPenalties())
+        # changes to group membership are applied
+        oneMeshGroup.addElement(element2)
+        fitter.assignDeformationPenalties(fit1)
+        self.assertEqual([(0.1, 0.0), (0.1, 0.5)], getElementPenalties())
+        twoMeshGroup.removeAllElements()
+        fitter.assignDeformationPenalties(fit1)
+        self.assertEqual([(0.1, 0.0), (0.1, 0.0)], getElementPenalties())
+        self.assertEqual(2, deformActiveMeshGroup.getSize())
+        self.assertEqual(0, curvatureActiveMeshGroup.getSize())
+
+    def test_deformationPenaltiesAssigned(self):
+        """
+        Test the first assignment of deformation penalties after load assigns every element, including zero
+        penalties where not set.
+        """
+        zinc_model_file = os.path.join(here, "resources", "two_cubes_hermite_nocross_groups.exf")
+        zinc_data_file = os.path.join(here, "resources", "two_cubes_ellipsoid_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        mesh = fitter.getHighestDimensionMesh()
+        self.assertTrue(fitter.getStrainPenaltyField().isValid())
+        self.assertTrue(fitter.getCurvaturePenaltyField().isValid())
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty("one", [0.1])
+        fit1.setGroupCurvaturePenalty("two", [0.5])
+        deformActiveMeshGroup, strainActiveMeshGroup, curvatureActiveMeshGroup = \
+            fitter.assignDeformationPenalties(fit1)
+        self.assertEqual(2, deformActiveMeshGroup.getSize())
+        self.assertEqual(1, strainActiveMeshGroup.getSize())
+        self.assertEqual(1, curvatureActiveMeshGroup.getSize())
+        fieldcache = fieldmodule.createFieldcache()
+        penalties = []
+        for identifier in (1, 2):
+            fieldcache.setElement(mesh.findElementByIdentifier(identifier))
+            result, strainPenalty = fitter.getStrainPenaltyField().evaluateReal(fieldcache, 9)
+            self.assertEqual(RESULT_OK, result)
+            result, curvaturePenalty = fitter.getCurvaturePenaltyField().evaluateReal(fieldcache, 27)
+            self.assertEqual(RESULT_OK, result)
+            penalties.append((strainPenalty, curvaturePenalty))
+        # penalties are zero where not set
+        self.assertEqual([0.1] * 9, penalties[0][0])
+        self.assertEqual([0.0] * 27, penalties[0][1])
+        self.assertEqual([0.0] * 9, penalties[1][0])
+        self.assertEqual([0.5] * 27, penalties[1][1])
+        del fieldcache
+        fitter.cleanup()
+
+    def test_skipUnchangedAssignments(self):
+        """
+        Test data weights and deformation penalties are not reassigned when settings are unchanged.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupDataWeight(None, 2.0)
+        # data stretch with sliding makes weights depend on current projections, so always reassigned
+        fit1.setGroupDataStretch(None, False)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupCurvaturePenalty(None, [0.01])
+        # inherits all settings
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        # changes data weight only
+        fit3 = FitterStepFit()
+        fitter.addFitterStep(fit3)
+        fit3.setGroupDataWeight("top", 4.0)
+        fitter.load()
+        self.assertEqual({"dataWeights": 0, "deformationPenalties": 0}, fitter.getSkippedAssignmentCounts())
+        fitter.run(endStep=fit1)
+        fitter.run(endStep=fit2)
+        # 3 data groups and markers
+        self.assertEqual({"dataWeights": 4, "deformationPenalties": 1}, fitter.getSkippedAssignmentCounts())
+        fitter.run(endStep=fit3)
+        self.assertEqual({"dataWeights": 7, "deformationPenalties": 2}, fitter.getSkippedAssignmentCounts())
+        fieldmodule = fitter.getFieldmodule()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        for groupName, expectedWeight in (("top", 4.0), ("bottom", 2.0)):
+            dataGroup = fieldmodule.findFieldByName(groupName).castGroup().getNodesetGroup(datapoints)
+            minimums, maximums = evaluate_field_nodeset_range(fitter.getDataWeightField(), dataGroup)
+            self.assertAlmostEqual(expectedWeight, maximums[2], delta=1.0E-12)
+        rmsError, maxError = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertLess(rmsError, 0.1)
+
+    def test_skipUnchangedAssignmentsMembership(self):
+        """
+        Test data weights are reassigned when group membership changes with no change in size, and for
+        groups overlapping points assigned from an earlier group.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupDataWeight(None, 2.0)
+        fit1.setGroupDataWeight("top", 4.0)
+        fit1.setGroupDataStretch(None, False)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupCurvaturePenalty(None, [0.01])
+        fit1.setNumberOfIterations(1)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        fit3 = FitterStepFit()
+        fitter.addFitterStep(fit3)
+        # bottom is assigned before sides and top
+        fit3.setGroupDataWeight("bottom", 3.0)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        fieldcache = fieldmodule.createFieldcache()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        dataWeight = fitter.getDataWeightField()
+        bottomDataGroup = fieldmodule.findFieldByName("bottom").castGroup().getNodesetGroup(datapoints)
+        topDataGroup = fieldmodule.findFieldByName("top").castGroup().getNodesetGroup(datapoints)
+        self.assertEqual(["bottom", "sides", "top"], fitter.getDataProjectionGroupNames())
+
+        def getWeight(node):
+            fieldcache.setNode(node)
+            result, weight = dataWeight.evaluateReal(fieldcache, 3)
+            self.assertEqual(RESULT_OK, result)
+            return weight[2]
+
+        fitter.run(endStep=fit1)
+        self.assertEqual({"dataWeights": 0, "deformationPenalties": 0}, fitter.getSkippedAssignmentCounts())
+
+        # swap a point between bottom and top so group sizes are unchanged
+        bottomNode = bottomDataGroup.createNodeiterator().next()
+        topNode = topDataGroup.createNodeiterator().next()
+        with ChangeManager(fieldmodule):
+            self.assertEqual(RESULT_OK, bottomDataGroup.removeNode(bottomNode))
+            self.assertEqual(RESULT_OK, topDataGroup.removeNode(topNode))
+            self.assertEqual(RESULT_OK, bottomDataGroup.addNode(topNode))
+            self.assertEqual(RESULT_OK, topDataGroup.addNode(bottomNode))
+        self.assertEqual(72, bottomDataGroup.getSize())
+        self.assertEqual(72, topDataGroup.getSize())
+        # also make top overlap bottom at another point
+        overlapNode = bottomDataGroup.createNodeiterator().next()
+        self.assertEqual(RESULT_OK, topDataGroup.addNode(overlapNode))
+        fitter.run(endStep=fit2)
+        # only sides and markers are unchanged
+        self.assertEqual({"dataWeights": 2, "deformationPenalties": 1}, fitter.getSkippedAssignmentCounts())
+        self.assertAlmostEqual(4.0, getWeight(bottomNode), delta=1.0E-12)
+        self.assertAlmostEqual(2.0, getWeight(topNode), delta=1.0E-12)
+        self.assertAlmostEqual(4.0, getWeight(overlapNode), delta=1.0E-12)
+
+        # top is unchanged but must be reassigned as it overlaps points of reassigned bottom
+        fitter.run(endStep=fit3)
+        self.assertEqual({"dataWeights": 4, "deformationPenalties": 2}, fitter.getSkippedAssignmentCounts())
+        self.assertAlmostEqual(4.0, getWeight(overlapNode), delta=1.0E-12)
+        self.assertAlmostEqual(3.0, getWeight(topNode), delta=1.0E-12)
+        self.assertAlmostEqual(4.0, getWeight(bottomNode), delta=1.0E-12)
+        del fieldcache
+        fitter.cleanup()
+
+    def test_reprojectionTolerance(self):
+        """
+        Test data points keep their projections when elements move less than reprojection tolerance.
+        """
+        zinc_model_file = os.path.join(here, "resources", "cube_to_sphere.exf")
+        zinc_data_file = os.path.join(here, "resources", "cube_to_sphere_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.01])
+        fit1.setGroupCurvaturePenalty(None, [0.01])
+        fit1.setNumberOfIterations(2)
+        self.assertEqual(0.0, fit1.getReprojectionTolerance())
+        fitter.load()
+        self.assertEqual((0, 288), fitter.getDataProjectionCounts())
+        fieldmodule = fitter.getFieldmodule()
+        fieldcache = fieldmodule.createFieldcache()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        dataHostLocation = fitter.getDataHostLocationField()
+        dataProjectionOrientation = fitter.getDataProjectionOrientationField()
+        node = datapoints.findNodeByIdentifier(1)
+        fieldcache.setNode(node)
+        element, loadXi = dataHostLocation.evaluateMeshLocation(fieldcache, 3)
+        result, loadOrientation = dataProjectionOrientation.evaluateReal(fieldcache, 9)
+        fitter.run()
+        self.assertEqual((0, 288), fitter.getDataProjectionCounts())
+        element, fitXi = dataHostLocation.evaluateMeshLocation(fieldcache, 3)
+        self.assertNotAlmostEqual(loadXi[0], fitXi[0], delta=1.0E-6)
+
+        # tolerance greater than any displacement keeps all projections from load
+        self.assertTrue(fit1.setReprojectionTolerance(100.0))
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        fieldcache = fieldmodule.createFieldcache()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        dataHostLocation = fitter.getDataHostLocationField()
+        dataProjectionOrientation = fitter.getDataProjectionOrientationField()
+        fitter.run()
+        fieldcache.setNode(datapoints.findNodeByIdentifier(1))
+        self.assertEqual((288, 0), fitter.getDataProjectionCounts())
+        element, keptXi = dataHostLocation.evaluateMeshLocation(fieldcache, 3)
+        result, keptOrientation = dataProjectionOrientation.evaluateReal(fieldcache, 9)
+        for c in range(3):
+            self.assertEqual(loadXi[c], keptXi[c])
+        for c in range(9):
+            self.assertEqual(loadOrientation[c], keptOrientation[c])
+
+        # check setting is serialised
+        s = fitter.encodeSettingsJSON()
+        fitter2 = Fitter(zinc_model_file, zinc_data_file)
+        fitter2.decodeSettingsJSON(s, decodeJSONFitterSteps)
+        self.assertEqual(100.0, fitter2.getFitterSteps()[1].getReprojectionTolerance())
+
+    def test_groupGeometrySummary(self):
+        """
+        Test cached group geometry summaries are reused until model coordinates change beyond tolerance.
+        """
+        zinc_model_file = os.path.join(here, "resources", "two_cubes_hermite_nocross_groups.exf")
+        zinc_data_file = os.path.join(here, "resources", "two_cubes_ellipsoid_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        topGroup = fieldmodule.findFieldByName("top").castGroup()
+        summary = fitter.getGroupGeometrySummary(topGroup)
+        assertAlmostEqualList(self, summary["meshCentre"], [1.0, 0.5, 1.0], delta=1.0E-12)
+        self.assertAlmostEqual(summary["meshSize"], 2.0, delta=1.0E-12)
+        self.assertIs(summary, fitter.getGroupGeometrySummary(topGroup))
+        self.assertIsNot(summary, fitter.getGroupGeometrySummary(topGroup, numberOfPoints=4))
+        self.assertIsNone(fitter.getGroupGeometrySummary(fieldmodule.findFieldByName("marker").castGroup()))
+
+        # any change to model coordinates invalidates summaries with default zero tolerance
+        self.assertEqual(fitter.getGroupGeometrySummaryTolerance(), 0.0)
+        coordinates = fitter.getModelCoordinatesField()
+        fieldassignment = coordinates.createFieldassignment(
+            coordinates + fieldmodule.createFieldConstant([0.001, 0.0, 0.0]))
+        self.assertIn(fieldassignment.assign(), [RESULT_OK, RESULT_WARNING_PART_DONE])
+        movedSummary = fitter.getGroupGeometrySummary(topGroup)
+        self.assertIsNot(summary, movedSummary)
+        assertAlmostEqualList(self, movedSummary["meshCentre"], [1.001, 0.5, 1.0], delta=1.0E-12)
+        self.assertEqual(movedSummary["dataMinimums"], summary["dataMinimums"])
+
+        fitter.setGroupGeometrySummaryTolerance(0.01)
+        self.assertEqual(fitter.getGroupGeometrySummaryTolerance(), 0.01)
+        self.assertIn(fieldassignment.assign(), [RESULT_OK, RESULT_WARNING_PART_DONE])
+        self.assertIs(movedSummary, fitter.getGroupGeometrySummary(topGroup))
+        for i in range(10):
+            self.assertIn(fieldassignment.assign(), [RESULT_OK, RESULT_WARNING_PART_DONE])
+        self.assertIsNot(movedSummary, fitter.getGroupGeometrySummary(topGroup))
+        del fieldassignment
+
+    def test_groupGeometrySummaryMembership(self):
+        """
+        Test cached group geometry summaries are invalidated when group membership changes with no change in size,
+        and that model parameters are only compared after model coordinates change.
+        """
+        zinc_model_file = os.path.join(here, "resources", "two_cubes_hermite_nocross_groups.exf")
+        zinc_data_file = os.path.join(here, "resources", "two_cubes_ellipsoid_data_regular.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        topGroup = fieldmodule.findFieldByName("top").castGroup()
+        bottomGroup = fieldmodule.findFieldByName("bottom").castGroup()
+        summary = fitter.getGroupGeometrySummary(topGroup)
+        bottomSummary = fitter.getGroupGeometrySummary(bottomGroup)
+        self.assertFalse(fitter._groupGeometrySummaryModelChanged)
+        self.assertIs(summary, fitter.getGroupGeometrySummary(topGroup))
+
+        # swap a top face for a bottom face so mesh group size is unchanged
+        topMeshGroup = fitter.getGroupDataProjectionMeshGroup(topGroup)
+        bottomMeshGroup = fitter.getGroupDataProjectionMeshGroup(bottomGroup)
+        meshSize = topMeshGroup.getSize()
+        topFace = topMeshGroup.createElementiterator().next()
+        bottomFace = bottomMeshGroup.createElementiterator().next()
+        with ChangeManager(fieldmodule):
+            self.assertEqual(RESULT_OK, topMeshGroup.removeElement(topFace))
+            self.assertEqual(RESULT_OK, topMeshGroup.addElement(bottomFace))
+        self.assertEqual(meshSize, topMeshGroup.getSize())
+        changedSummary = fitter.getGroupGeometrySummary(topGroup)
+        self.assertIsNot(summary, changedSummary)
+        self.assertNotAlmostEqual(changedSummary["meshCentre"][2], summary["meshCentre"][2], delta=0.1)
+        # other groups are unaffected
+        self.assertIs(bottomSummary, fitter.getGroupGeometrySummary(bottomGroup))
+        self.assertFalse(fitter._groupGeometrySummaryModelChanged)
+
+        # model coordinates change is noted by notifier
+        coordinates = fitter.getModelCoordinatesField()
+        fieldassignment = coordinates.createFieldassignment(
+            coordinates + fieldmodule.createFieldConstant([0.001, 0.0, 0.0]))
+        self.assertIn(fieldassignment.assign(), [RESULT_OK, RESULT_WARNING_PART_DONE])
+        del fieldassignment
+        self.assertTrue(fitter._groupGeometrySummaryModelChanged)
+        self.assertIsNot(bottomSummary, fitter.getGroupGeometrySummary(bottomGroup))
+        self.assertFalse(fitter._groupGeometrySummaryModelChanged)
+        fitter.cleanup()
+
     def test_nodeset_max_and_min(self):
         zinc_model_file = os.path.join(here, "resources", "two_element_cube.exf")
 
@@ -1,7 +1,11 @@
 import math
 import os
+import tempfile
 import unittest
-from cmlibs.utils.zinc.field import createFieldMeshIntegral
+from cmlibs.utils.zinc.field import createFieldMeshIntegral, findOrCreateFieldCoordinates, getGroupList
+from cmlibs.utils.zinc.region import write_to_buffer
+from cmlibs.zinc.context import Context
+from cmlibs.zinc.field import Field
 from cmlibs.zinc.result import RESULT_OK
 from scaffoldfitter.fitter import Fitter
 from scaffoldfitter.fitterstepconfig import FitterStepConfig
@@ -79,6 +83,196 @@ class GeneralTestCase(unittest.TestCase):
             self.assertEqual(1, min_jac_el)
             self.assertAlmostEqual(0.0, min_jac_value, delta=TOL)
 
+    def test_fit_1d_outlier_thresholds(self):
+        """
+        Test 1D fit of nerve path with statistical outlier thresholds filtering data too far away.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.0001])
+        fit1.setGroupCurvaturePenalty(None, [0.001])
+        config1 = FitterStepConfig()
+        fitter.addFitterStep(config1)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+
+        for case in range(2):
+            if case == 0:
+                # percentile outlier threshold applied to "trunk" group
+                config1.setGroupOutlierThreshold("trunk", "percentile", 97.0)
+            else:
+                # median absolute deviation outlier threshold applied to default group
+                config1.clearGroupOutlierThreshold("trunk")
+                config1.setGroupOutlierThreshold(None, "mad", 10.0)
+            fitter.load()
+            fieldmodule = fitter.getFieldmodule()
+            coordinates = fitter.getModelCoordinatesField()
+            fitter.setFibreField(fieldmodule.findFieldByName("zero fibres"))
+            fitter.run()
+
+            # same outlier is filtered as with outlier lengths in test_fit_1d_outliers
+            self.assertEqual(26, fitter.getActiveDataNodesetGroup().getSize())
+            lengthField = createFieldMeshIntegral(coordinates, fitter.getMesh(1), number_of_points=4)
+            fieldcache = fieldmodule.createFieldcache()
+            result, length = lengthField.evaluateReal(fieldcache, 1)
+            self.assertEqual(result, RESULT_OK)
+            TOL = 1.0E-8
+            self.assertAlmostEqual(length, 3.0331818804905284, delta=TOL)
+            rmsError, maxError = fitter.getDataRMSAndMaximumProjectionError()
+            self.assertAlmostEqual(rmsError, 0.009620758125514172, delta=TOL)
+            self.assertAlmostEqual(maxError, 0.017088084995279192, delta=TOL)
+
+    def test_checkpoints(self):
+        """
+        Test running back to earlier steps restores checkpoints rather than reloading.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupStrainPenalty(None, [0.0001])
+        fit1.setGroupCurvaturePenalty(None, [0.001])
+        config1 = FitterStepConfig()
+        fitter.addFitterStep(config1)
+        config1.setGroupOutlierLength(None, 0.1)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        fitter.setFibreField(fieldmodule.findFieldByName("zero fibres"))
+        fieldparameters = fitter.getModelCoordinatesField().getFieldparameters()
+        parametersCount = fieldparameters.getNumberOfParameters()
+
+        self.assertFalse(fitter.run(fit1))
+        parameters1 = fieldparameters.getParameters(parametersCount)[1]
+        activeDataSize1 = fitter.getActiveDataNodesetGroup().getSize()
+        rmsError1, maxError1 = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertFalse(fitter.run())
+        parameters2 = fieldparameters.getParameters(parametersCount)[1]
+        activeDataSize2 = fitter.getActiveDataNodesetGroup().getSize()
+        rmsError2, maxError2 = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertEqual(activeDataSize1, 27)
+        self.assertEqual(activeDataSize2, 26)
+        # initial config checkpoint was made before fibre field was set
+        self.assertEqual([False, True, True, True], [fitter.hasCheckpoint(step) for step in fitter.getFitterSteps()])
+
+        region = fitter.getRegion()
+        self.assertTrue(fitter.run(fit1))
+        self.assertEqual(region, fitter.getRegion())  # not reloaded
+        self.assertEqual([True, True, False, False], [step.hasRun() for step in fitter.getFitterSteps()])
+        self.assertEqual(parameters1, fieldparameters.getParameters(parametersCount)[1])
+        self.assertEqual(activeDataSize1, fitter.getActiveDataNodesetGroup().getSize())
+        rmsError, maxError = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertAlmostEqual(rmsError, rmsError1, delta=1.0E-12)
+        self.assertAlmostEqual(maxError, maxError1, delta=1.0E-12)
+        self.assertFalse(fitter.run())
+        TOL = 1.0E-12
+        for parameter, expectedParameter in zip(fieldparameters.getParameters(parametersCount)[1], parameters2):
+            self.assertAlmostEqual(parameter, expectedParameter, delta=TOL)
+        self.assertEqual(activeDataSize2, fitter.getActiveDataNodesetGroup().getSize())
+        rmsError, maxError = fitter.getDataRMSAndMaximumProjectionError()
+        self.assertAlmostEqual(rmsError, rmsError2, delta=TOL)
+        self.assertAlmostEqual(maxError, maxError2, delta=TOL)
+
+        # changing settings of a step invalidates its checkpoint and those after it
+        config1.setGroupOutlierLength(None, 0.2)
+        self.assertTrue(fitter.hasCheckpoint(fit1))
+        self.assertFalse(fitter.hasCheckpoint(config1))
+        self.assertFalse(fitter.hasCheckpoint(fit2))
+        config1.setGroupOutlierLength(None, 0.1)
+
+        # without checkpoints must reload
+        fitter.setCheckpointMemoryLimit(0)
+        self.assertFalse(fitter.hasCheckpoint(fit1))
+        self.assertTrue(fitter.run(fit1))
+        self.assertNotEqual(region, fitter.getRegion())
+
+    def test_load_cache(self):
+        """
+        Test loading from the cache directory gives the same state and fit as loading from files.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+
+        def load_and_fit(cache_directory):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fitter.setCacheDirectory(cache_directory)
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.0001])
+            fit1.setGroupCurvaturePenalty(None, [0.001])
+            fitter.load()
+            fieldmodule = fitter.getFieldmodule()
+            fitter.setFibreField(fieldmodule.findFieldByName("zero fibres"))
+            datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+            groupNames = sorted(group.getName() for group in getGroupList(fieldmodule))
+            fitter.run()
+            return datapoints.getSize(), groupNames, fitter.getDataRMSAndMaximumProjectionError()
+
+        expected = load_and_fit(None)
+        with tempfile.TemporaryDirectory() as cache_directory:
+            self.assertEqual(expected, load_and_fit(cache_directory))
+            cacheFileNames = os.listdir(cache_directory)
+            self.assertEqual(1, len(cacheFileNames))
+            self.assertTrue(cacheFileNames[0].endswith(".exf"))
+            self.assertEqual(expected, load_and_fit(cache_directory))
+            self.assertEqual(cacheFileNames, os.listdir(cache_directory))
+
+    def test_data_projections_file(self):
+        """
+        Test resuming from data projections written to file gives the same fit as calculating them.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+
+        def load_and_fit(data_projections_file_name, write, central_projection=False):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fitter.setDataProjectionsFileName(None if write else data_projections_file_name)
+            if central_projection:
+                fitter.getInitialFitterStepConfig().setGroupCentralProjection(None, True)
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.0001])
+            fit1.setGroupCurvaturePenalty(None, [0.001])
+            fitter.load()
+            if write:
+                fitter.writeDataProjections(data_projections_file_name)
+            projectionCounts = fitter.getDataProjectionCounts()
+            loadErrors = fitter.getDataRMSAndMaximumProjectionError()
+            activeDataSize = fitter.getActiveDataNodesetGroup().getSize()
+            fitter.setFibreField(fitter.getFieldmodule().findFieldByName("zero fibres"))
+            fitter.run()
+            return fitter, projectionCounts, loadErrors, activeDataSize, fitter.getDataRMSAndMaximumProjectionError()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "projections.bin")
+            fitter, projectionCounts, loadErrors, activeDataSize, fitErrors = load_and_fit(file_name, True)
+            self.assertEqual(projectionCounts, (0, 25))
+            self.assertEqual(activeDataSize, 27)
+            fitter, projectionCounts, resumeLoadErrors, resumeActiveDataSize, resumeFitErrors = \
+                load_and_fit(file_name, False)
+            # initial projections were read, not calculated
+            self.assertEqual(projectionCounts, (0, 0))
+            self.assertEqual(resumeActiveDataSize, activeDataSize)
+            for value, expectedValue in zip(resumeLoadErrors + resumeFitErrors, loadErrors + fitErrors):
+                self.assertAlmostEqual(value, expectedValue, delta=1.0E-12)
+            # model coordinates have changed in fit so fingerprint does not match
+            self.assertFalse(fitter.readDataProjections(file_name))
+            # initial config projection settings differ so file is not read and projections are calculated
+            fitter, projectionCounts, loadErrors, activeDataSize, fitErrors = \
+                load_and_fit(file_name, False, central_projection=True)
+            self.assertEqual(projectionCounts, (0, 25))
+            with open(file_name, "wb") as f:
+                f.write(b"not a data projections file")
+            self.assertFalse(fitter.readDataProjections(file_name))
+            self.assertFalse(fitter.readDataProjections(os.path.join(directory, "missing.bin")))
+
     def test_setting_group_outlier_length(self):
         zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
         zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
@@ -91,6 +285,204 @@ class GeneralTestCase(unittest.TestCase):
         config1.setGroupOutlierLength(None, -3.0)
         self.assertEqual(-1.0, config1.getGroupOutlierLength(None)[0])
 
+        self.assertEqual(["none", 0.0], config1.getGroupOutlierThreshold(None)[0])
+        config1.setGroupOutlierThreshold(None, "percentile", 120)
+        self.assertEqual(["percentile", 100.0], config1.getGroupOutlierThreshold(None)[0])
+        config1.setGroupOutlierThreshold(None, "invalid", -2.0)
+        self.assertEqual(["percentile", 0.0], config1.getGroupOutlierThreshold(None)[0])
+
+    def test_group_setting_inheritance_cache(self):
+        """
+        Test resolved group settings are updated when settings or the sequence of steps change.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        fit1.setGroupDataWeight(None, 2.0)
+        fit1.setGroupDataWeight("trunk", 3.0)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        fit3 = FitterStepFit()
+        fitter.addFitterStep(fit3)
+        self.assertEqual((3.0, False, True), fit3.getGroupDataWeight("trunk"))
+        self.assertEqual((2.0, False, False), fit3.getGroupDataWeight("branch"))
+        version = fitter.getGroupSettingsVersion()
+        self.assertEqual((3.0, False, True), fit3.getGroupDataWeight("trunk"))
+        self.assertEqual(version, fitter.getGroupSettingsVersion())
+        # change to earlier step is inherited
+        fit2.setGroupDataWeight("trunk", 4.0)
+        self.assertEqual((4.0, True, True), fit2.getGroupDataWeight("trunk"))
+        self.assertEqual((4.0, False, True), fit3.getGroupDataWeight("trunk"))
+        fit2.clearGroupDataWeight("trunk")
+        self.assertEqual((3.0, False, True), fit3.getGroupDataWeight("trunk"))
+        fit1.setGroupDataWeight(None, None)
+        self.assertEqual((1.0, False, False), fit3.getGroupDataWeight("branch"))
+        # moving and removing steps changes inheritance
+        fit3.setGroupDataWeight("trunk", 5.0)
+        self.assertEqual((3.0, False, True), fit2.getGroupDataWeight("trunk"))
+        fitter.moveFitterStep(3, 2, None)
+        self.assertEqual((5.0, False, True), fit2.getGroupDataWeight("trunk"))
+        fitter.removeFitterStep(fit1)
+        self.assertEqual((5.0, True, False), fit3.getGroupDataWeight("trunk"))
+        self.assertEqual((5.0, False, True), fit2.getGroupDataWeight("trunk"))
+        config2 = FitterStepConfig()
+        fitter.addFitterStep(config2, fitter.getInitialFitterStepConfig())
+        self.assertEqual((5.0, False, True), fit2.getGroupDataWeight("trunk"))
+
+    def test_fitter_step_links(self):
+        """
+        Test inheritance and active config lookups follow fitter steps being added, moved and removed.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        config1 = fitter.getInitialFitterStepConfig()
+        fit1 = FitterStepFit()
+        fitter.addFitterStep(fit1)
+        config2 = FitterStepConfig()
+        fitter.addFitterStep(config2)
+        fit2 = FitterStepFit()
+        fitter.addFitterStep(fit2)
+        self.assertEqual([0, 1, 2, 3], [fitter.getFitterStepIndex(step) for step in (config1, fit1, config2, fit2)])
+        self.assertIsNone(fitter.getInheritFitterStep(fit1))
+        self.assertIs(fit1, fitter.getInheritFitterStep(fit2))
+        self.assertIs(config1, fitter.getInheritFitterStep(config2))
+        self.assertIsNone(fitter.getInheritFitterStepConfig(config1))
+        self.assertIs(config1, fitter.getInheritFitterStepConfig(config2))
+        self.assertIs(config2, fitter.getActiveFitterStepConfig(config2))
+        self.assertIs(config2, fitter.getActiveFitterStepConfig(fit2))
+        fit0 = FitterStepFit()
+        fitter.addFitterStep(fit0, config1)
+        self.assertIs(fit0, fitter.getInheritFitterStep(fit1))
+        self.assertEqual(4, fitter.getFitterStepIndex(fit2))
+        fitter.moveFitterStep(3, 4, None)
+        self.assertIs(config1, fitter.getActiveFitterStepConfig(fit2))
+        self.assertIs(config1, fitter.getInheritFitterStepConfig(config2))
+        fitter.removeFitterStep(fit1)
+        self.assertIs(fit0, fitter.getInheritFitterStep(fit2))
+        self.assertEqual(3, fitter.getFitterStepIndex(config2))
+        with self.assertRaises(ValueError):
+            fitter.getFitterStepIndex(fit1)
+
+    def test_direct_data_transfer(self):
+        """
+        Test direct transfer of data into model region gives same datapoints and groups as via text buffers.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+        buffers = []
+        for directDataTransfer in (False, True):
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fitter.setDirectDataTransfer(directDataTransfer)
+            self.assertEqual(directDataTransfer, fitter.isDirectDataTransfer())
+            fitter.load()
+            self.assertEqual("marker_name", fitter.getMarkerDataFields()[2].getName())
+            buffers.append(write_to_buffer(fitter.getRegion(), resource_domain_type=Field.DOMAIN_TYPE_DATAPOINTS))
+        self.assertEqual(buffers[0], buffers[1])
+
+    def test_data_arrays(self):
+        """
+        Test supplying data as arrays gives the same fit as the equivalent data file.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        zinc_data_file = os.path.join(here, "resources", "nerve_path_data.exf")
+
+        def fit(fitter):
+            fit1 = FitterStepFit()
+            fitter.addFitterStep(fit1)
+            fit1.setGroupStrainPenalty(None, [0.0001])
+            fit1.setGroupCurvaturePenalty(None, [0.001])
+            fitter.load()
+            fitter.setFibreField(fitter.getFieldmodule().findFieldByName("zero fibres"))
+            fitter.run()
+            return fitter.getActiveDataNodesetGroup().getSize(), fitter.getDataRMSAndMaximumProjectionError()
+
+        # get arrays from data loaded from file
+        fitter = Fitter(zinc_model_file, zinc_data_file)
+        expectedActiveDataSize, expectedErrors = fit(fitter)
+        fieldmodule = fitter.getFieldmodule()
+        fieldcache = fieldmodule.createFieldcache()
+        dataCoordinates = fitter.getDataCoordinatesField()
+        markerGroup, markerDataCoordinates, markerDataName = fitter.getMarkerDataFields()
+        groupNames = ["TRUNK ", "branch1", "branch2"]  # case and whitespace differences are matched
+        groups = [fieldmodule.findFieldByName(name.strip().lower()).castGroup() for name in groupNames]
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        coordinates = []
+        groupLabels = []
+        markerCoordinates = []
+        markerNames = []
+        datapointIterator = datapoints.createNodeiterator()
+        datapoint = datapointIterator.next()
+        while datapoint.isValid():
+            fieldcache.setNode(datapoint)
+            x = dataCoordinates.evaluateReal(fieldcache, 3)[1]
+            if markerGroup.containsNode(datapoint):
+                markerCoordinates.append(x)
+                markerNames.append(markerDataName.evaluateString(fieldcache))
+            else:
+                coordinates.append(x)
+                for label, group in enumerate(groups):
+                    if group.getNodesetGroup(datapoints).containsNode(datapoint):
+                        break
+                else:
+                    label = None
+                groupLabels.append(label)
+            datapoint = datapointIterator.next()
+        self.assertEqual(44, len(coordinates))
+        self.assertEqual(2, len(markerCoordinates))
+
+        fitter = Fitter(zinc_model_file, None)
+        fitter.setDataArrays(coordinates, groupLabels, groupNames, markerCoordinates, markerNames)
+        activeDataSize, errors = fit(fitter)
+        self.assertEqual("data_coordinates", fitter.getDataCoordinatesField().getName())
+        self.assertEqual("marker", fitter.getMarkerGroup().getName())
+        self.assertEqual(expectedActiveDataSize, activeDataSize)
+        TOL = 1.0E-10
+        self.assertAlmostEqual(expectedErrors[0], errors[0], delta=TOL)
+        self.assertAlmostEqual(expectedErrors[1], errors[1], delta=TOL)
+
+    def test_load_data_identifiers(self):
+        """
+        Test datapoints get lowest identifiers unused by nodes when both are in data file.
+        """
+        zinc_model_file = os.path.join(here, "resources", "nerve_trunk_model.exf")
+        context = Context("data")
+        region = context.getDefaultRegion()
+        fieldmodule = region.getFieldmodule()
+        coordinates = findOrCreateFieldCoordinates(fieldmodule)
+        fieldcache = fieldmodule.createFieldcache()
+        # datapoint identifiers clash with nodes and with the identifiers they are changed to
+        for nodesetName, identifiers in (("nodes", [1, 2, 3, 7]), ("datapoints", [1, 2, 3, 4, 5, 6])):
+            nodeset = fieldmodule.findNodesetByName(nodesetName)
+            nodetemplate = nodeset.createNodetemplate()
+            nodetemplate.defineField(coordinates)
+            for identifier in identifiers:
+                node = nodeset.createNode(identifier, nodetemplate)
+                fieldcache.setNode(node)
+                coordinates.assignReal(fieldcache, [float(identifier), 0.0, 1.0 if (nodesetName == "nodes") else 0.0])
+        with tempfile.TemporaryDirectory() as data_directory:
+            zinc_data_file = os.path.join(data_directory, "data.exf")
+            self.assertEqual(RESULT_OK, region.writeFile(zinc_data_file))
+            fitter = Fitter(zinc_model_file, zinc_data_file)
+            fitter.load()
+        fieldmodule = fitter.getFieldmodule()
+        datapoints = fieldmodule.findNodesetByFieldDomainType(Field.DOMAIN_TYPE_DATAPOINTS)
+        dataCoordinates = fitter.getDataCoordinatesField()
+        fieldcache = fieldmodule.createFieldcache()
+        expectedCoordinates = {}
+        for identifier in [1, 2, 3, 7]:
+            expectedCoordinates[identifier] = [float(identifier), 0.0, 1.0]
+        for oldIdentifier, identifier in zip([1, 2, 3, 4, 5, 6], [4, 5, 6, 8, 9, 10]):
+            expectedCoordinates[identifier] = [float(oldIdentifier), 0.0, 0.0]
+        self.assertEqual(len(expectedCoordinates), datapoints.getSize())
+        for identifier, expected in expectedCoordinates.items():
+            fieldcache.setNode(datapoints.findNodeByIdentifier(identifier))
+            result, x = dataCoordinates.evaluateReal(fieldcache, 3)
+            self.assertEqual(RESULT_OK, result)
+            self.assertEqual(expected, x)
+
 
 if __name__ == "__main__":
     unittest.main()